@@ -0,0 +1,64 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Optional, TypeVar
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger("books_api")
+
+# Worker processes for CPU-heavy exports; 0 runs them on the threadpool instead.
+PROCESS_WORKERS = int(os.getenv("EXEC_PROCESS_WORKERS", str(min(2, os.cpu_count() or 1))))
+
+T = TypeVar("T")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the server process has live threads (threadpool, log listener).
+            _pool = ProcessPoolExecutor(
+                max_workers=PROCESS_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+async def run_heavy(fn: Callable[..., T], *args: Any) -> T:
+    """Run `fn(*args)` in the process pool, off this process's GIL.
+
+    `fn` must be a module-level function; it runs against the worker's own
+    catalog cache (same file, same refresh rules), so jobs that must match
+    the caller's snapshot pass its version along (see
+    `ml_data.render_at_version`). It should return something cheap to
+    pickle, such as already-encoded bytes.
+    """
+    if PROCESS_WORKERS <= 0:
+        return await run_in_threadpool(fn, *args)
+    pool = _get_pool()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, partial(fn, *args))
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM-killed); start a fresh pool for the next request.
+        global _pool
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        logger.exception("Process pool broke; it will be recreated")
+        raise
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,103 @@
+import json
+import os
+from typing import Any, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from fastapi.responses import JSONResponse, Response
+
+try:  # optional: ~5-10x faster than the stdlib encoder
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson installed
+    orjson = None
+
+FAST_JSON_ENABLED = os.getenv("FAST_JSON_RESPONSES", "true").lower() in {"1", "true", "yes"}
+
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+# Other names clients use for the same formats.
+MEDIA_TYPE_ALIASES = {
+    "application/ndjson": NDJSON_MEDIA_TYPE,
+    "application/jsonl": NDJSON_MEDIA_TYPE,
+    "application/jsonlines": NDJSON_MEDIA_TYPE,
+    "application/csv": CSV_MEDIA_TYPE,
+    "application/x-parquet": PARQUET_MEDIA_TYPE,
+}
+# `?format=` values, for clients that cannot set `Accept`.
+FORMAT_MEDIA_TYPES = {
+    "json": JSON_MEDIA_TYPE,
+    "ndjson": NDJSON_MEDIA_TYPE,
+    "csv": CSV_MEDIA_TYPE,
+    "arrow": ARROW_STREAM_MEDIA_TYPE,
+    "parquet": PARQUET_MEDIA_TYPE,
+}
+
+
+def _numpy_default(value: Any) -> Any:
+    # Mirrors orjson's OPT_SERIALIZE_NUMPY for the stdlib fallback.
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        value, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_numpy_default
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_array_response(
+    fragments: Iterable[bytes],
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """Join already-serialized JSON values into an array without re-encoding them."""
+    return Response(
+        content=b"[" + b",".join(fragments) + b"]",
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
+
+
+def _parse_accept(accept: str) -> List[Tuple[str, float]]:
+    ranges = []
+    for part in accept.split(","):
+        media_range, *params = [piece.strip() for piece in part.split(";")]
+        if not media_range:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        media_range = media_range.lower()
+        ranges.append((MEDIA_TYPE_ALIASES.get(media_range, media_range), quality))
+    # Stable sort: equal q-values keep the client's order.
+    return sorted(ranges, key=lambda item: -item[1])
+
+
+def negotiate_media_type(accept: Optional[str], offered: Sequence[str]) -> str:
+    """Pick the entry of `offered` the `Accept` header prefers; `offered[0]` is the fallback."""
+    for media_range, quality in _parse_accept(accept or ""):
+        if quality <= 0:
+            continue
+        for media_type in offered:
+            if media_range in ("*/*", media_type) or (
+                media_range.endswith("/*") and media_type.startswith(media_range[:-1])
+            ):
+                return media_type
+    return offered[0]
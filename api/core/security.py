@@ -1,18 +1,164 @@
+import base64
+import hashlib
+import json
 import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import UTC, datetime, timedelta
-from typing import Any, Dict, Optional
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
 
 import jwt
 from fastapi import HTTPException, Security, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge
+from prometheus_fastapi_instrumentator.metrics import Info
 
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "change-me")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 DEFAULT_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRE_MINUTES", "30"))
+# Asymmetric mode (e.g. RS256, EdDSA; needs `PyJWT[crypto]`): tokens are signed with the private
+# key and verified with public keys, which are published at /auth/jwks for other services.
+PRIVATE_KEY_PATH = os.getenv("JWT_PRIVATE_KEY_PATH")
+# Comma separated; keys beyond the private key's own pair keep verifying tokens across a rotation.
+PUBLIC_KEY_PATHS = os.getenv("JWT_PUBLIC_KEY_PATHS", "")
+TOKEN_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "4096"))
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
+def is_asymmetric(algorithm: str = ALGORITHM) -> bool:
+    return not algorithm.upper().startswith("HS")
+
+
+def _jwk_thumbprint(jwk: Dict[str, Any]) -> str:
+    """RFC 7638 thumbprint, used as the key id (`kid`)."""
+    required = {name: jwk[name] for name in ("crv", "e", "kty", "n", "x", "y") if name in jwk}
+    digest = hashlib.sha256(json.dumps(required, separators=(",", ":"), sort_keys=True).encode()).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+@dataclass(frozen=True)
+class KeySet:
+    algorithm: str
+    signing_key: Any
+    kid: Optional[str] = None
+    verification_keys: Dict[Optional[str], Any] = field(default_factory=dict)
+    jwks: List[Dict[str, Any]] = field(default_factory=list)
+
+    def verification_key(self, token: str) -> Any:
+        if len(self.verification_keys) == 1:
+            return next(iter(self.verification_keys.values()))
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid not in self.verification_keys:
+            raise jwt.InvalidTokenError("Unknown signing key")
+        return self.verification_keys[kid]
+
+
+def load_key_set(
+    algorithm: str = ALGORITHM,
+    secret: str = SECRET_KEY,
+    private_key_path: Optional[str] = PRIVATE_KEY_PATH,
+    public_key_paths: str = PUBLIC_KEY_PATHS,
+) -> KeySet:
+    """Parse the configured keys once; PEM parsing is far too slow to repeat per request."""
+    if not is_asymmetric(algorithm):
+        return KeySet(algorithm, secret, verification_keys={None: secret})
+
+    algorithms = jwt.algorithms.get_default_algorithms()
+    if algorithm not in algorithms:
+        raise RuntimeError(f"JWT_ALGORITHM={algorithm} needs `cryptography` (pip install 'PyJWT[crypto]')")
+    codec = algorithms[algorithm]
+    private_key = codec.prepare_key(Path(private_key_path).read_bytes()) if private_key_path else None
+    public_keys = [
+        codec.prepare_key(Path(path.strip()).read_bytes()) for path in public_key_paths.split(",") if path.strip()
+    ]
+    if private_key is not None:
+        public_keys.insert(0, private_key.public_key())
+    if not public_keys:
+        raise RuntimeError(f"JWT_ALGORITHM={algorithm} needs JWT_PUBLIC_KEY_PATHS or JWT_PRIVATE_KEY_PATH")
+
+    verification_keys: Dict[Optional[str], Any] = {}
+    jwks = []
+    for public_key in public_keys:
+        jwk = codec.to_jwk(public_key, as_dict=True)
+        kid = _jwk_thumbprint(jwk)
+        if kid not in verification_keys:
+            verification_keys[kid] = public_key
+            jwks.append({**jwk, "kid": kid, "alg": algorithm, "use": "sig"})
+    signing_kid = jwks[0]["kid"] if private_key is not None else None
+    return KeySet(algorithm, private_key, signing_kid, verification_keys, jwks)
+
+
+@lru_cache(maxsize=1)
+def get_key_set() -> KeySet:
+    return load_key_set()
+
+
+class TokenCache:
+    """LRU of verified token payloads keyed by the token's SHA-256, each kept until its `exp`.
+
+    A client reuses one bearer token for many requests; after the first
+    full verification, the rest cost a hash and a dict lookup. Only tokens
+    that passed verification are stored, and only while still unexpired.
+    """
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_SIZE, clock: Callable[[], float] = time.time) -> None:
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            payload, expires_at = entry
+            if expires_at <= self.clock():
+                # Dropped so the next decode raises ExpiredSignatureError as usual.
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key: bytes, payload: Dict[str, Any]) -> None:
+        expires_at = payload.get("exp")
+        if self.max_entries <= 0 or not isinstance(expires_at, (int, float)) or expires_at <= self.clock():
+            return
+        with self._lock:
+            self._entries[key] = (payload, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
 def create_access_token(
     subject: str,
     expires_delta: Optional[timedelta] = None,
@@ -23,10 +169,39 @@ def create_access_token(
         to_encode.update(extra_claims)
     expire = datetime.now(UTC) + (expires_delta or timedelta(minutes=DEFAULT_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    keys = get_key_set()
+    if keys.signing_key is None:
+        raise RuntimeError("Token signing needs JWT_PRIVATE_KEY_PATH in asymmetric mode")
+    headers = {"kid": keys.kid} if keys.kid else None
+    return jwt.encode(to_encode, keys.signing_key, algorithm=keys.algorithm, headers=headers)
+
+
+def decode_token(token: str) -> Dict[str, Any]:
+    """Validate signature and claims; raises `jwt.InvalidTokenError` subclasses."""
+    key = TokenCache.key(token)
+    payload = token_cache.get(key)
+    if payload is None:
+        keys = get_key_set()
+        payload = jwt.decode(token, keys.verification_key(token), algorithms=[keys.algorithm])
+        token_cache.put(key, payload)
+    # Callers get their own copy; the cached payload is shared across requests.
+    return dict(payload)
 
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Security(bearer_scheme)) -> Dict[str, Any]:
+def has_valid_bearer_token(authorization: Optional[str]) -> bool:
+    """Check a raw `Authorization` header, for middleware that runs before route dependencies."""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        decode_token(token.strip())
+    except jwt.InvalidTokenError:
+        return False
+    return True
+
+
+async def verify_token(credentials: HTTPAuthorizationCredentials = Security(bearer_scheme)) -> Dict[str, Any]:
+    # async: a JWT check is microseconds of CPU, cheaper than the threadpool hop a sync dependency costs.
     if credentials is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -36,7 +211,7 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Security(bearer_sch
 
     token = credentials.credentials
     try:
-        payload: Dict[str, Any] = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -50,3 +225,28 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Security(bearer_sch
             headers={"WWW-Authenticate": "Bearer"},
         ) from None
     return payload
+
+
+def token_cache_metrics(cache: TokenCache, registry: CollectorRegistry = REGISTRY) -> Callable[[Info], None]:
+    """Instrumentator hook publishing the verified-token cache counters."""
+    counters = {
+        name: Counter(f"books_api_token_cache_{name}_total", f"Verified-token cache {name}.", registry=registry)
+        for name in ("hits", "misses", "evictions", "expirations")
+    }
+    entries = Gauge(
+        "books_api_token_cache_entries",
+        "Tokens held by the verified-token cache.",
+        registry=registry,
+        multiprocess_mode="livesum",
+    )
+    reported = {name: 0 for name in counters}
+
+    def instrumentation(_info: Info) -> None:
+        for name, counter in counters.items():
+            current = getattr(cache, name)
+            if current > reported[name]:
+                counter.inc(current - reported[name])
+                reported[name] = current
+        entries.set(len(cache))
+
+    return instrumentation
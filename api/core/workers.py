@@ -0,0 +1,107 @@
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from api.services import insights
+from api.services.storage import publish_catalog
+
+logger = logging.getLogger("books_api")
+
+WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+# Uncompressed Arrow IPC; put it on /dev/shm to keep it in RAM regardless of disk.
+CATALOG_SNAPSHOT_PATH = Path(os.getenv("CATALOG_SNAPSHOT_PATH", "data/catalog-snapshot.arrow"))
+SNAPSHOT_POLL_SECONDS = float(os.getenv("CATALOG_REFRESH_INTERVAL", "1.0"))
+MULTIPROC_ENV = "PROMETHEUS_MULTIPROC_DIR"
+DEFAULT_MULTIPROC_DIR = Path(os.getenv("TMPDIR", "/tmp")) / "books-api-metrics"
+
+
+def prepare_metrics_dir(directory: Path) -> Path:
+    """Create the multiprocess metrics directory, dropping files left by a previous run."""
+    directory.mkdir(parents=True, exist_ok=True)
+    for stale in directory.glob("*.db"):
+        stale.unlink()
+    return directory
+
+
+def _signature(path: Path) -> Optional[tuple]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class SnapshotPublisher:
+    """Re-publishes `source` to `destination` whenever it changes, from a daemon thread.
+
+    Workers keep watching `destination` with their usual freshness checks
+    and remap it after each atomic replace.
+    """
+
+    def __init__(self, source: Path, destination: Path, interval: float = SNAPSHOT_POLL_SECONDS) -> None:
+        self.source = Path(source)
+        self.destination = Path(destination)
+        self.interval = interval
+        self.publications = 0
+        self._signature: Optional[tuple] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def publish_if_changed(self) -> bool:
+        signature = _signature(self.source)
+        if signature is None or signature == self._signature:
+            return False
+        df = publish_catalog(self.source, self.destination)
+        self._signature = signature
+        self.publications += 1
+        logger.info({"event": "catalog_snapshot_published", "path": str(self.destination), "rows": len(df)})
+        return True
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.publish_if_changed()
+            except Exception:
+                # A half-written source (scraper still running) is retried on the next tick.
+                logger.exception({"event": "catalog_snapshot_failed", "path": str(self.source)})
+
+    def start(self) -> "SnapshotPublisher":
+        self._thread = threading.Thread(target=self._watch, name="catalog-snapshot", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def configure_multiworker(
+    snapshot_path: Path = CATALOG_SNAPSHOT_PATH,
+    metrics_dir: Optional[Path] = None,
+) -> Dict[str, str]:
+    """Environment for N uvicorn workers; call in the supervisor, before they are spawned.
+
+    Workers are pointed at an uncompressed Arrow snapshot of the catalog that
+    each one memory-maps read-only, so the numeric columns live once in the
+    page cache rather than once per worker, and `prometheus_client` writes to
+    a shared directory so `/metrics` from any worker reports all of them.
+    """
+    env: Dict[str, str] = {}
+    directory = metrics_dir or Path(os.environ.get(MULTIPROC_ENV) or DEFAULT_MULTIPROC_DIR)
+    env[MULTIPROC_ENV] = str(prepare_metrics_dir(directory))
+    source = insights.catalog_path()
+    if Path(source).suffix.lower() not in {".feather", ".arrow"}:
+        # CSV and Parquet are decoded on read; hand workers something they can map instead.
+        env["BOOKS_DATA_PATH"] = str(snapshot_path)
+    return env
+
+
+def mark_worker_dead() -> None:
+    """Drop this worker's live gauges from the shared metrics (call on shutdown)."""
+    if MULTIPROC_ENV in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(os.getpid())
@@ -3,15 +3,26 @@ from contextlib import asynccontextmanager
 
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from prometheus_fastapi_instrumentator import Instrumentator
+from prometheus_fastapi_instrumentator import Instrumentator, metrics
 
-from api.core.security import verify_token
-from api.middleware.logging import RequestLoggingMiddleware
+from api.core import execution, workers
+from api.core.responses import FastJSONResponse
+from api.core.security import token_cache, token_cache_metrics, verify_token
+from api.middleware.admission import AdmissionControlMiddleware, admission_metrics, route_limiters
+from api.middleware.http_cache import HTTPCacheMiddleware
+from api.middleware.logging import RequestLoggingMiddleware, start_log_listener, stop_log_listener
+from api.middleware.response_cache import (
+    ResponseCacheMiddleware,
+    response_cache,
+    response_cache_metrics,
+)
 from api.routes.auth import router as auth_router
 from api.routes.books import router as books_router
 from api.routes.categories import router as categories_router
 from api.routes.ml import router as ml_router
 from api.routes.stats import router as stats_router
+from api.services.catalog import catalog
+from api.services.price_model import load_price_model, price_batcher
 
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 
@@ -23,25 +34,50 @@ instrumentator = Instrumentator(
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Request logs are serialized and written by a background thread, off the event loop.
+    log_listener = start_log_listener()
     instrumentator.expose(app, include_in_schema=False)
+    catalog.refresh(force=True)
+    load_price_model()
     yield
+    await price_batcher.close()
+    execution.shutdown()
+    workers.mark_worker_dead()
+    stop_log_listener(log_listener)
 
 
-app = FastAPI(title="Books API", version="1.0.0", lifespan=lifespan)
+app = FastAPI(
+    title="Books API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
 
+# Innermost, so cache hits never take a slot and shed requests still get CORS headers and a log line.
+app.add_middleware(AdmissionControlMiddleware)
+app.add_middleware(ResponseCacheMiddleware)
+app.add_middleware(HTTPCacheMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Feature-Columns", "X-Target", "X-Feature-Schema", "X-Request-ID"],
 )
 app.add_middleware(RequestLoggingMiddleware)
 
+# Registering any instrumentation drops the implicit defaults, so keep them explicitly.
+instrumentator.add(
+    metrics.default(registry=instrumentator.registry),
+    response_cache_metrics(response_cache, registry=instrumentator.registry),
+    admission_metrics(route_limiters, registry=instrumentator.registry),
+    token_cache_metrics(token_cache, registry=instrumentator.registry),
+)
 instrumentator.instrument(app)
 
 @app.get("/api/v1/health")
-def health():
+async def health():
     return {"status": "ok"}
 
 app.include_router(auth_router, prefix="/api/v1")
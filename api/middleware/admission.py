@@ -0,0 +1,168 @@
+import asyncio
+import os
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Sequence
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge
+from prometheus_fastapi_instrumentator.metrics import Info
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from api.core.responses import dumps
+
+# "<path prefix>=<max concurrent>:<max queued>", comma separated; the longest matching prefix wins.
+DEFAULT_ROUTE_LIMITS = (
+    "/api/v1/ml/features=2:8,"
+    "/api/v1/ml/training-data=2:8,"
+    "/api/v1/ml/feature-matrix=2:8,"
+    "/api/v1/books/search=16:64,"
+    "/api/v1/books/price-range=16:64"
+)
+ROUTE_LIMITS = os.getenv("ROUTE_LIMITS", DEFAULT_ROUTE_LIMITS)
+RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))
+
+
+class Overloaded(Exception):
+    pass
+
+
+class ConcurrencyLimiter:
+    """At most `max_concurrent` requests in flight and `max_queue` waiting; the rest are refused."""
+
+    def __init__(self, prefix: str, max_concurrent: int, max_queue: int) -> None:
+        self.prefix = prefix
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.active = 0
+        self.rejected = 0
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, timeout: float = QUEUE_TIMEOUT_SECONDS) -> None:
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded(self.prefix)
+        waiter: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            self.rejected += 1
+            raise Overloaded(self.prefix) from None
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+
+    def _abandon(self, waiter: "asyncio.Future[None]") -> None:
+        if waiter.done() and not waiter.cancelled():
+            # The slot was handed over just as we gave up; pass it on.
+            self.release()
+        else:
+            waiter.cancel()
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self) -> None:
+        # Hand the slot straight to the oldest waiter, so `active` never dips and lets a newcomer cut in.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+def parse_route_limits(spec: str) -> List[ConcurrencyLimiter]:
+    limiters = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        prefix, _, limits = entry.partition("=")
+        concurrent, _, queued = limits.partition(":")
+        limiters.append(ConcurrencyLimiter(prefix.strip(), int(concurrent), int(queued or 0)))
+    return sorted(limiters, key=lambda limiter: len(limiter.prefix), reverse=True)
+
+
+class AdmissionControlMiddleware:
+    """Per-route concurrency limits with a bounded queue and fast 503 load shedding.
+
+    Requests beyond a route's queue, or that wait longer than the queue
+    timeout, get `503 Service Unavailable` with `Retry-After` instead of
+    piling up behind slow work and dragging every other route's latency.
+    """
+
+    def __init__(self, app: ASGIApp, limiters: Optional[Sequence[ConcurrencyLimiter]] = None) -> None:
+        self.app = app
+        self.limiters = list(limiters if limiters is not None else route_limiters)
+
+    def _limiter(self, path: str) -> Optional[ConcurrencyLimiter]:
+        for limiter in self.limiters:
+            if path.startswith(limiter.prefix):
+                return limiter
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limiter = self._limiter(scope["path"]) if scope["type"] == "http" else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await limiter.acquire()
+        except Overloaded:
+            body = dumps({"detail": "Server busy, retry later."})
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 503,
+                    "headers": [
+                        (b"content-type", b"application/json"),
+                        (b"content-length", str(len(body)).encode("latin-1")),
+                        (b"retry-after", str(RETRY_AFTER_SECONDS).encode("latin-1")),
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": body})
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+
+def admission_metrics(
+    limiters: Sequence[ConcurrencyLimiter], registry: CollectorRegistry = REGISTRY
+) -> Callable[[Info], None]:
+    """Instrumentator hook publishing in-flight, queued and rejected counts per limited route."""
+    in_flight = Gauge(
+        "books_api_admission_in_flight", "Requests running.", ["route"], registry=registry, multiprocess_mode="livesum"
+    )
+    queued = Gauge(
+        "books_api_admission_queued",
+        "Requests waiting for a slot.",
+        ["route"],
+        registry=registry,
+        multiprocess_mode="livesum",
+    )
+    rejected = Counter(
+        "books_api_admission_rejected_total", "Requests shed with 503.", ["route"], registry=registry
+    )
+    reported: Dict[str, int] = {limiter.prefix: 0 for limiter in limiters}
+
+    def instrumentation(_info: Info) -> None:
+        for limiter in limiters:
+            in_flight.labels(limiter.prefix).set(limiter.active)
+            queued.labels(limiter.prefix).set(limiter.queued)
+            if limiter.rejected > reported[limiter.prefix]:
+                rejected.labels(limiter.prefix).inc(limiter.rejected - reported[limiter.prefix])
+                reported[limiter.prefix] = limiter.rejected
+
+    return instrumentation
+
+
+route_limiters = parse_route_limits(ROUTE_LIMITS)
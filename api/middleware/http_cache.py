@@ -0,0 +1,109 @@
+import hashlib
+import os
+from typing import List, Optional, Sequence, Tuple
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.core.security import has_valid_bearer_token
+from api.services.catalog import get_catalog_async
+
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "0"))
+
+CACHEABLE_PREFIXES = (
+    "/api/v1/books",
+    "/api/v1/categories",
+    "/api/v1/stats",
+    "/api/v1/ml",
+)
+# Not derived from books.csv, so the catalog version says nothing about their freshness.
+UNCACHEABLE_PATHS = (
+    "/api/v1/stats/catalog",
+    "/api/v1/ml/model",
+    "/api/v1/ml/predictions",
+    "/api/v1/ml/predictions/models",
+)
+
+
+def _cache_control(max_age: int) -> str:
+    if max_age > 0:
+        return f"private, max-age={max_age}"
+    return "private, max-age=0, must-revalidate"
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class HTTPCacheMiddleware:
+    """Conditional GET for catalog-backed endpoints.
+
+    The ETag combines the catalog version with the path, query string and
+    `Accept` header, so a client holding a current copy gets `304 Not
+    Modified` without the route running. Only requests carrying a valid
+    bearer token are short-circuited; the rest go through normal auth.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        prefixes: Sequence[str] = CACHEABLE_PREFIXES,
+        excluded: Sequence[str] = UNCACHEABLE_PATHS,
+        max_age: int = HTTP_CACHE_MAX_AGE,
+    ) -> None:
+        self.app = app
+        self.prefixes = tuple(prefixes)
+        self.excluded = tuple(excluded)
+        self.cache_control = _cache_control(max_age).encode("latin-1")
+
+    def _cacheable(self, scope: Scope) -> bool:
+        path = scope["path"]
+        return (
+            scope["method"] in ("GET", "HEAD")
+            and path.startswith(self.prefixes)
+            and path not in self.excluded
+        )
+
+    def _etag(self, scope: Scope, headers: Headers, version: str) -> str:
+        variant = hashlib.blake2b(digest_size=8)
+        variant.update(scope["path"].encode("utf-8"))
+        variant.update(b"?" + scope.get("query_string", b""))
+        variant.update(b"|" + headers.get("accept", "").encode("latin-1"))
+        return f'"{version[:16]}-{variant.hexdigest()}"'
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._cacheable(scope):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        # A due freshness check or reload runs in the threadpool, not on the event loop.
+        snapshot = await get_catalog_async()
+        etag = self._etag(scope, headers, snapshot.version)
+        cache_headers: List[Tuple[bytes, bytes]] = [
+            (b"etag", etag.encode("latin-1")),
+            (b"cache-control", self.cache_control),
+            (b"vary", b"Accept"),
+        ]
+
+        if _etag_matches(headers.get("if-none-match"), etag) and has_valid_bearer_token(
+            headers.get("authorization")
+        ):
+            await send({"type": "http.response.start", "status": 304, "headers": cache_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_cache_headers(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                existing = [
+                    (name, value)
+                    for name, value in message.get("headers", [])
+                    if name.lower() not in (b"etag", b"cache-control", b"vary")
+                ]
+                message = {**message, "headers": existing + cache_headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cache_headers)
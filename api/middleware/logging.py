@@ -1,50 +1,157 @@
-import json
+import atexit
 import logging
+import os
+import queue
+import random
+import re
+import sys
 import time
-from typing import Awaitable, Callable
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from api.core.responses import dumps
 
 logger = logging.getLogger("books_api")
 
+# Fraction of successful (< 400) requests that are logged; errors are always logged.
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+REQUEST_ID_HEADER = "x-request-id"
+# Incoming ids are echoed into logs and headers, so only accept short, plain tokens.
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Loga todas as requisições com payload JSON estruturado."""
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
 
-    async def dispatch(
+
+class JSONMessageFormatter(logging.Formatter):
+    """Serializes dict messages to JSON; runs on the listener thread, not the event loop."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not isinstance(record.msg, dict):
+            return super().format(record)
+        message = dumps(record.msg).decode("utf-8")
+        if record.exc_info:
+            message = f"{message}\n{self.formatException(record.exc_info)}"
+        return message
+
+
+class _DeferredQueueHandler(QueueHandler):
+    # The stock `prepare` formats the record in the calling thread; hand it over untouched instead.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _LogListener(QueueListener):
+    # Tracks its own state so stopping twice is harmless (shutdown and atexit may both get there).
+    running = False
+
+    def start(self) -> None:
+        super().start()
+        self.running = True
+
+    def stop(self) -> None:
+        if self.running:
+            self.running = False
+            super().stop()
+
+
+def start_log_listener(target: Optional[logging.Handler] = None) -> QueueListener:
+    """Route `books_api` logs through a queue drained by a background thread writing to stdout."""
+    if target is None:
+        target = logging.StreamHandler(sys.stdout)
+        target.setFormatter(JSONMessageFormatter("%(message)s"))
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    for handler in [h for h in logger.handlers if isinstance(h, _DeferredQueueHandler)]:
+        logger.removeHandler(handler)
+    logger.addHandler(_DeferredQueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    listener = _LogListener(log_queue, target, respect_handler_level=True)
+    listener.start()
+    atexit.register(stop_log_listener, listener)  # flush what is still queued
+    return listener
+
+
+def stop_log_listener(listener: QueueListener) -> None:
+    """Flush and stop `listener`; `books_api` logs go back to the root handlers if it was the active one."""
+    feeding = [h for h in logger.handlers if isinstance(h, _DeferredQueueHandler) and h.queue is listener.queue]
+    for handler in feeding:
+        logger.removeHandler(handler)
+    if feeding:
+        logger.propagate = True
+    listener.stop()
+
+
+def _incoming_request_id(scope: Scope) -> Optional[str]:
+    for name, value in scope.get("headers", []):
+        if name == b"x-request-id":
+            candidate = value.decode("latin-1")
+            return candidate if REQUEST_ID_PATTERN.match(candidate) else None
+    return None
+
+
+class RequestLoggingMiddleware:
+    """Logs every request as a structured JSON payload.
+
+    Pure ASGI: no per-request task or body-stream wrapping, so streaming
+    responses pass straight through. The request id (incoming
+    `X-Request-ID` or a new one) is echoed in the response, stored in
+    `scope["state"]` and `request_id_var`, and added to the log line.
+    """
+
+    def __init__(
         self,
-        request: Request,
-        call_next: Callable[[Request], Awaitable[Response]],
-    ) -> Response:
+        app: ASGIApp,
+        sample_rate: float = LOG_SAMPLE_RATE,
+        log: logging.Logger = logger,
+    ) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+        self.log = log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         start_time = time.perf_counter()
-        client_host = request.client.host if request.client else None
+        request_id = _incoming_request_id(scope) or uuid.uuid4().hex
+        scope.setdefault("state", {})["request_id"] = request_id
+        token = request_id_var.set(request_id)
+        status_code = 500
+        header = (REQUEST_ID_HEADER.encode("latin-1"), request_id.encode("latin-1"))
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), header]}
+            await send(message)
 
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, send_with_request_id)
         except Exception:
-            duration_ms = (time.perf_counter() - start_time) * 1000
-            log_payload = {
-                "event": "request_failed",
-                "method": request.method,
-                "path": request.url.path,
-                "client_ip": client_host,
-                "duration_ms": round(duration_ms, 2),
-            }
-            logger.exception(json.dumps(log_payload))
+            self.log.exception(self._payload("request_failed", scope, request_id, start_time))
             raise
+        finally:
+            request_id_var.reset(token)
 
-        duration_ms = (time.perf_counter() - start_time) * 1000
-        log_payload = {
-            "event": "request_completed",
-            "method": request.method,
-            "path": request.url.path,
-            "status_code": response.status_code,
-            "client_ip": client_host,
-            "duration_ms": round(duration_ms, 2),
-        }
-        logger.info(json.dumps(log_payload))
+        if status_code >= 400 or self.sample_rate >= 1 or random.random() < self.sample_rate:
+            payload = self._payload("request_completed", scope, request_id, start_time)
+            payload["status_code"] = status_code
+            self.log.info(payload)
 
-        return response
+    @staticmethod
+    def _payload(event: str, scope: Scope, request_id: str, start_time: float) -> dict:
+        client = scope.get("client")
+        return {
+            "event": event,
+            "method": scope["method"],
+            "path": scope["path"],
+            "client_ip": client[0] if client else None,
+            "duration_ms": round((time.perf_counter() - start_time) * 1000, 2),
+            "request_id": request_id,
+        }
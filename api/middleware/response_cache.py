@@ -0,0 +1,229 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge
+from prometheus_fastapi_instrumentator.metrics import Info
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.core.security import has_valid_bearer_token
+from api.middleware.http_cache import CACHEABLE_PREFIXES, UNCACHEABLE_PATHS
+from api.services.catalog import CatalogSnapshot, catalog, get_catalog_async
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in {"1", "true", "yes"}
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESPONSE_CACHE_MAX_ENTRY_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRY_BYTES", str(2 * 1024 * 1024)))
+
+CacheKey = Tuple[str, str, str, str]
+
+
+@dataclass
+class CachedResponse:
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    expires_at: float
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(name) + len(value) for name, value in self.headers)
+
+
+class ResponseCache:
+    """Byte-bounded LRU of serialized responses with a per-entry TTL."""
+
+    def __init__(
+        self,
+        max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+        max_entry_bytes: int = RESPONSE_CACHE_MAX_ENTRY_BYTES,
+        ttl: float = RESPONSE_CACHE_TTL,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self.ttl = ttl
+        self._entries: "OrderedDict[CacheKey, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CacheKey) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: CacheKey, status: int, headers: List[Tuple[bytes, bytes]], body: bytes) -> bool:
+        entry = CachedResponse(status, headers, body, time.monotonic() + self.ttl)
+        if entry.size > self.max_entry_bytes:
+            return False
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            self.current_bytes += entry.size
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+        return True
+
+    def clear(self, _snapshot: Optional[CatalogSnapshot] = None) -> None:
+        with self._lock:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _drop(self, key: CacheKey) -> None:
+        self.current_bytes -= self._entries.pop(key).size
+
+
+def cache_key(scope: Scope, headers: Headers, version: str) -> CacheKey:
+    query = scope.get("query_string", b"").decode("latin-1")
+    normalized_query = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+    return (scope["path"], normalized_query, headers.get("accept", ""), version)
+
+
+class ResponseCacheMiddleware:
+    """Serve repeated GETs on catalog-backed endpoints from `ResponseCache`.
+
+    Keys include the catalog version and the cache is cleared on every
+    reload, so entries never outlive the data they were built from.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        cache: Optional["ResponseCache"] = None,
+        prefixes: Sequence[str] = CACHEABLE_PREFIXES,
+        excluded: Sequence[str] = UNCACHEABLE_PATHS,
+    ) -> None:
+        self.app = app
+        self.cache = cache if cache is not None else response_cache
+        self.prefixes = tuple(prefixes)
+        self.excluded = tuple(excluded)
+
+    def _cacheable(self, scope: Scope) -> bool:
+        if scope["type"] != "http":
+            return False
+        path = scope["path"]
+        return (
+            RESPONSE_CACHE_ENABLED
+            and scope["method"] == "GET"
+            and path.startswith(self.prefixes)
+            and path not in self.excluded
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self._cacheable(scope):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        # Cached bytes must never reach a client the route's auth dependency would reject.
+        if not has_valid_bearer_token(headers.get("authorization")):
+            await self.app(scope, receive, send)
+            return
+
+        snapshot = await get_catalog_async()
+        key = cache_key(scope, headers, snapshot.version)
+        entry = self.cache.get(key)
+        if entry is not None:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": entry.status,
+                    "headers": entry.headers + [(b"x-cache", b"HIT")],
+                }
+            )
+            await send({"type": "http.response.body", "body": entry.body})
+            return
+
+        start: Dict[str, object] = {}
+        chunks: List[bytes] = []
+        size = 0
+        storable = True
+
+        async def capture(message: Message) -> None:
+            nonlocal size, storable
+            if message["type"] == "http.response.start":
+                storable = message["status"] == 200
+                start.update(message)
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-cache", b"MISS")]}
+            elif message["type"] == "http.response.body" and storable:
+                body = message.get("body", b"")
+                size += len(body)
+                if size > self.cache.max_entry_bytes:
+                    storable, chunks[:] = False, []
+                else:
+                    chunks.append(body)
+                if not message.get("more_body", False) and storable:
+                    self.cache.put(key, start["status"], list(start.get("headers", [])), b"".join(chunks))
+            await send(message)
+
+        await self.app(scope, receive, capture)
+
+
+def response_cache_metrics(
+    cache: ResponseCache, registry: CollectorRegistry = REGISTRY
+) -> Callable[[Info], None]:
+    """Instrumentator hook publishing `cache`'s counters (see `Instrumentator.add`)."""
+    counters = {
+        name: Counter(
+            f"books_api_response_cache_{name}_total",
+            f"Response cache {name}.",
+            registry=registry,
+        )
+        for name in ("hits", "misses", "evictions", "expirations", "invalidations")
+    }
+    # Each worker has its own cache; with several workers these report the sum over live ones.
+    size_bytes = Gauge(
+        "books_api_response_cache_bytes",
+        "Bytes held by the response cache.",
+        registry=registry,
+        multiprocess_mode="livesum",
+    )
+    entries = Gauge(
+        "books_api_response_cache_entries",
+        "Entries held by the response cache.",
+        registry=registry,
+        multiprocess_mode="livesum",
+    )
+    reported = {name: 0 for name in counters}
+
+    def instrumentation(_info: Info) -> None:
+        for name, counter in counters.items():
+            current = getattr(cache, name)
+            if current > reported[name]:
+                counter.inc(current - reported[name])
+                reported[name] = current
+        size_bytes.set(cache.current_bytes)
+        entries.set(len(cache))
+
+    return instrumentation
+
+
+response_cache = ResponseCache()
+catalog.add_listener(response_cache.clear)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, HttpUrl
-from typing import Optional
+from pydantic import BaseModel, Field, HttpUrl
+from typing import List, Optional
 
 class Book(BaseModel):
     id: int
@@ -10,3 +10,7 @@ class Book(BaseModel):
     category: str
     link: Optional[HttpUrl] = None
     image: Optional[HttpUrl] = None
+
+
+class BookBatchRequest(BaseModel):
+    ids: List[int] = Field(..., max_length=500, description="IDs dos livros a buscar")
@@ -4,7 +4,7 @@ from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 
-from api.core.security import create_access_token, DEFAULT_EXPIRE_MINUTES
+from api.core.security import create_access_token, DEFAULT_EXPIRE_MINUTES, get_key_set
 
 router = APIRouter(tags=["auth"])
 
@@ -31,3 +31,13 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
         expires_delta=timedelta(minutes=expires_in_minutes),
     )
     return {"access_token": access_token, "token_type": "bearer", "expires_in": expires_in_minutes * 60}
+
+
+@router.get("/auth/jwks")
+def get_jwks():
+    """Public verification keys (JWK Set), so other services can check tokens without calling this API."""
+    keys = get_key_set()
+    if not keys.jwks:
+        # Shared HMAC secrets are never published.
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No public keys configured")
+    return {"keys": keys.jwks}
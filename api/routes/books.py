@@ -1,56 +1,156 @@
-from typing import Optional
+from typing import List, Optional, Sequence, Union
 
-from fastapi import APIRouter, HTTPException, Query
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query, Response
 
-from api.services.insights import (
-    filter_books_by_price,
-    get_top_rated_books,
-    load_books_dataframe,
-)
+from api.core.responses import FAST_JSON_ENABLED, json_array_response
+from api.models.book_model import BookBatchRequest
+from api.services.catalog import CatalogSnapshot, get_catalog, get_catalog_async
+from api.services.insights import top_rated_positions
+from api.services.ranges import intersect_positions
 
 router = APIRouter(tags=["books"])
 
+MAX_BATCH_IDS = 500
+MAX_SIMILAR = 50
+TOTAL_COUNT_HEADER = "X-Total-Count"
+SORT_PATTERN = r"^-?(id|title|price|rating)$"
+
+def _parse_ids(raw: str) -> List[int]:
+    try:
+        ids = [int(part) for part in raw.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be a comma-separated list of integers") from None
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    return ids
+
+def _sorted(snapshot: CatalogSnapshot, positions: np.ndarray, sort: str, needed: int) -> np.ndarray:
+    """Order `positions` by `sort`, fully ordering only the first `needed` rows."""
+    keys = snapshot.sort_rank(sort.lstrip("-"), descending=sort.startswith("-"))[positions]
+    # Ranks are unique, so partial selection is deterministic.
+    if 0 < needed < len(keys):
+        head = np.argpartition(keys, needed - 1)[:needed]
+        return positions[head[np.argsort(keys[head])]]
+    return positions[np.argsort(keys)]
+
+def _records(
+    snapshot: CatalogSnapshot, response: Response, positions: Sequence[int], total: int
+) -> Union[Response, List[dict]]:
+    """Serve rows from the per-version JSON fragments, or as plain dicts when fast JSON is off."""
+    response.headers[TOTAL_COUNT_HEADER] = str(total)
+    if FAST_JSON_ENABLED:
+        fragments = snapshot.record_json
+        return json_array_response(
+            (fragments[position] for position in positions),
+            headers={TOTAL_COUNT_HEADER: str(total)},
+        )
+    return [snapshot.records[position] for position in positions]
+
+def _page(
+    snapshot: CatalogSnapshot,
+    response: Response,
+    positions: np.ndarray,
+    skip: int,
+    limit: int,
+    sort: Optional[str] = None,
+) -> Union[Response, List[dict]]:
+    total = len(positions)
+    if sort:
+        positions = _sorted(snapshot, positions, sort, skip + limit)
+    return _records(snapshot, response, positions[skip: skip + limit], total)
+
 @router.get("/books")
-def list_books(skip: int = 0, limit: int = Query(100, le=500)):
-    df = load_books_dataframe()
-    data = df.iloc[skip: skip + limit].to_dict(orient="records")
-    return data
+def list_books(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=0, le=500),
+    sort: Optional[str] = Query(None, pattern=SORT_PATTERN, description="Campo de ordenação; prefixe com '-' para ordem decrescente"),
+    ids: Optional[str] = Query(None, description="Lista de IDs separados por vírgula, ex.: 1,2,3"),
+):
+    snapshot = get_catalog()
+    if ids is not None:
+        positions = [snapshot.id_index[book_id] for book_id in _parse_ids(ids) if book_id in snapshot.id_index]
+        return _records(snapshot, response, positions, len(positions))
+    return _page(snapshot, response, np.arange(len(snapshot)), skip, limit, sort)
+
+@router.post("/books/batch")
+async def get_books_batch(payload: BookBatchRequest):
+    snapshot = await get_catalog_async("records", "id_index")
+    return {
+        "books": snapshot.get_records(payload.ids),
+        "missing": [book_id for book_id in payload.ids if book_id not in snapshot.id_index],
+    }
 
 @router.get("/books/search")
 def search_books(
+    response: Response,
     title: Optional[str] = None,
     category: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     min_rating: Optional[int] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=0, le=500),
+    sort: Optional[str] = Query(None, pattern=SORT_PATTERN, description="Padrão: relevância quando `title` é informado"),
 ):
-    df = load_books_dataframe()
-    if title:
-        df = df[df["title"].str.contains(title, case=False, na=False)]
-    if category:
-        df = df[df["category"].str.contains(category, case=False, na=False)]
-    if min_price is not None:
-        df = df[df["price"] >= min_price]
-    if max_price is not None:
-        df = df[df["price"] <= max_price]
-    if min_rating is not None:
-        df = df[df["rating"] >= min_rating]
-    return df.to_dict(orient="records")
+    snapshot = get_catalog()
+    range_matches = intersect_positions(
+        snapshot.price_index.range(min_price, max_price)
+        if min_price is not None or max_price is not None
+        else None,
+        snapshot.rating_index.range(min_rating) if min_rating is not None else None,
+    )
+    if title or category:
+        positions = np.asarray(snapshot.search_index.search(title=title, category=category), dtype=np.intp)
+        if range_matches is not None:
+            positions = positions[np.isin(positions, range_matches, assume_unique=True)]
+    elif range_matches is not None:
+        positions = range_matches
+    else:
+        positions = np.arange(len(snapshot))
+    return _page(snapshot, response, positions, skip, limit, sort)
 
 @router.get("/books/top-rated")
-def top_rated(limit: int = Query(10, le=100)):
-    df = load_books_dataframe()
-    return get_top_rated_books(df, limit=limit)
+def top_rated(response: Response, skip: int = Query(0, ge=0), limit: int = Query(10, ge=0, le=100)):
+    snapshot = get_catalog()
+    positions = top_rated_positions(snapshot.ratings, snapshot.prices, skip + limit)
+    return _records(snapshot, response, positions[skip:], len(positions))
 
 @router.get("/books/price-range")
-def price_range(min: float, max: float):
-    df = load_books_dataframe()
-    return filter_books_by_price(df, min_price=min, max_price=max)
+def price_range(
+    response: Response,
+    min: float,
+    max: float,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=0, le=500),
+    sort: Optional[str] = Query(None, pattern=SORT_PATTERN),
+):
+    snapshot = get_catalog()
+    positions = snapshot.price_index.range(min, max)
+    if not sort:
+        positions = np.sort(positions)
+    return _page(snapshot, response, positions, skip, limit, sort)
+
+@router.get("/books/{book_id}/similar")
+def similar_books(book_id: int, k: int = Query(10, ge=1, le=MAX_SIMILAR)):
+    """Content-based neighbors (title, category, price band, rating), most similar first."""
+    snapshot = get_catalog()
+    position = snapshot.id_index.get(book_id)
+    if position is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    positions, scores = snapshot.similarity_index.similar(position, k)
+    return [
+        {**snapshot.records[neighbor], "similarity": round(float(score), 4)}
+        for neighbor, score in zip(positions.tolist(), scores.tolist())
+    ]
 
 @router.get("/books/{book_id}")
-def get_book(book_id: int):
-    df = load_books_dataframe()
-    row = df[df["id"] == book_id]
-    if row.empty:
+async def get_book(book_id: int):
+    snapshot = await get_catalog_async("record_json", "id_index")
+    position = snapshot.id_index.get(book_id)
+    if position is None:
         raise HTTPException(status_code=404, detail="Book not found")
-    return row.iloc[0].to_dict()
+    if FAST_JSON_ENABLED:
+        return Response(content=snapshot.record_json[position], media_type="application/json")
+    return snapshot.records[position]
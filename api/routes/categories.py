@@ -1,13 +1,12 @@
 from fastapi import APIRouter
-import pandas as pd
 
-router = APIRouter(tags=["categories"])
+from api.services.catalog import get_catalog_async
 
-def _load_df() -> pd.DataFrame:
-    return pd.read_csv("data/books.csv")
+router = APIRouter(tags=["categories"])
 
 @router.get("/categories")
-def categories():
-    df = _load_df()
-    cats = sorted([c for c in df["category"].dropna().unique() if str(c).strip() != ""])
-    return {"categories": cats}
+async def categories(with_counts: bool = False):
+    snapshot = await get_catalog_async("category_counts")
+    if with_counts:
+        return {"categories": snapshot.category_names, "counts": snapshot.category_counts}
+    return {"categories": snapshot.category_names}
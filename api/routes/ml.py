@@ -1,21 +1,80 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Union
 
-from fastapi import APIRouter, HTTPException, status
+import numpy as np
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
 
+from api.core.responses import (
+    ARROW_STREAM_MEDIA_TYPE,
+    CSV_MEDIA_TYPE,
+    FORMAT_MEDIA_TYPES,
+    JSON_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE,
+    negotiate_media_type,
+)
+from api.core.execution import run_heavy
 from api.services.ml_data import (
-    prepare_feature_matrix,
-    prepare_training_dataset,
-    summarize_predictions,
+    FEATURE_COLUMNS,
+    TARGET,
+    DEFAULT_SPLIT_SEED,
+    DEFAULT_VALIDATION_FRACTION,
+    MAX_TITLE_HASH_BUCKETS,
+    TITLE_HASH_BUCKETS,
+    ExportBatches,
+    encode_arrow_stream,
+    cached_feature_matrix,
+    encode_csv,
+    encode_ndjson,
+    encode_parquet,
+    feature_batches,
+    feature_matrix,
+    render_at_version,
+    render_feature_matrix,
+    render_features_json,
+    render_training_json,
+    training_batches,
 )
+from api.services.catalog import CatalogSnapshot, CatalogVersionMismatch, get_catalog_async
+from api.services.prediction_store import prediction_store
+from api.services.price_model import get_price_model, price_batcher
 
 router = APIRouter(prefix="/ml", tags=["ml"])
 
+EXPORT_MEDIA_TYPES = (
+    JSON_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    CSV_MEDIA_TYPE,
+    ARROW_STREAM_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE,
+)
+STREAM_ENCODERS = {
+    NDJSON_MEDIA_TYPE: encode_ndjson,
+    CSV_MEDIA_TYPE: encode_csv,
+    ARROW_STREAM_MEDIA_TYPE: encode_arrow_stream,
+    PARQUET_MEDIA_TYPE: encode_parquet,
+}
+EXPORT_FILE_SUFFIXES = {CSV_MEDIA_TYPE: "csv", ARROW_STREAM_MEDIA_TYPE: "arrows", PARQUET_MEDIA_TYPE: "parquet"}
+FORMAT_PATTERN = "^(" + "|".join(FORMAT_MEDIA_TYPES) + ")$"
+# Handlers build their own Response, so the OpenAPI schema learns the media types from here.
+EXPORT_RESPONSES: Dict[Union[int, str], Dict[str, Any]] = {
+    200: {"content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES}}
+}
+FEATURE_MATRIX_RESPONSES: Dict[Union[int, str], Dict[str, Any]] = {
+    200: {"content": {JSON_MEDIA_TYPE: {}, ARROW_STREAM_MEDIA_TYPE: {}}}
+}
+# Snapshot data the batch iterators read up front, built in the threadpool rather than on the loop.
+STREAM_WARM = ("category_column",)
+
 
 class PredictionItem(BaseModel):
     book_id: Optional[int] = Field(None, description="Identificador interno do livro")
     model: Optional[str] = Field(None, description="Nome ou versão do modelo que gerou a predição")
-    score: Optional[float] = Field(None, description="Score numérico da predição")
+    score: Optional[float] = Field(
+        None, strict=True, allow_inf_nan=False, description="Score numérico da predição"
+    )
     label: Optional[str] = Field(None, description="Classe prevista (se aplicável)")
     metadata: Optional[Dict[str, Any]] = Field(
         default=None, description="Metadados adicionais fornecidos pelo modelo"
@@ -26,16 +85,96 @@ class PredictionPayload(BaseModel):
     predictions: List[PredictionItem]
 
 
-@router.get("/features")
-def ml_features() -> List[Dict[str, Any]]:
-    dataset = prepare_feature_matrix()
-    return dataset
+MAX_PREDICT_ROWS = 500
+
+
+class PredictRequest(BaseModel):
+    book_ids: Optional[List[int]] = Field(
+        None, max_length=MAX_PREDICT_ROWS, description="Livros do catálogo a pontuar"
+    )
+    features: Optional[List[List[float]]] = Field(
+        None,
+        max_length=MAX_PREDICT_ROWS,
+        description="Linhas de features na ordem de `columns` em GET /ml/model",
+    )
+
+
+def _export_media_type(format: Optional[str], accept: Optional[str]) -> str:
+    if format is not None:
+        return FORMAT_MEDIA_TYPES[format]
+    return negotiate_media_type(accept, EXPORT_MEDIA_TYPES)
 
 
-@router.get("/training-data")
-def ml_training_data() -> Dict[str, Any]:
-    dataset = prepare_training_dataset()
-    return dataset
+def _stream(
+    media_type: str,
+    snapshot: CatalogSnapshot,
+    batches: Callable[..., ExportBatches],
+    filename: str,
+    headers: Optional[Dict[str, str]] = None,
+) -> StreamingResponse:
+    """Batches are encoded as the response is sent; Starlette iterates sync generators in the threadpool."""
+    headers = dict(headers or {})
+    if media_type in EXPORT_FILE_SUFFIXES:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}.{EXPORT_FILE_SUFFIXES[media_type]}"'
+    export = batches(snapshot=snapshot)
+    return StreamingResponse(STREAM_ENCODERS[media_type](export), media_type=media_type, headers=headers)
+
+
+async def _render(render: Callable[..., Any], snapshot: CatalogSnapshot, *args: Any) -> Any:
+    """`render(snapshot, *args)` in the process pool, pinned to the version the caching middleware keyed on.
+
+    If the worker's catalog has moved past `snapshot`, render it here instead.
+    """
+    try:
+        return await run_heavy(render_at_version, render, snapshot.version, *args)
+    except CatalogVersionMismatch:
+        return await run_in_threadpool(render, snapshot, *args)
+
+
+@router.get("/features", responses=EXPORT_RESPONSES)
+async def ml_features(
+    format: Optional[str] = Query(None, pattern=FORMAT_PATTERN, description="Sobrescreve o header Accept"),
+    accept: Optional[str] = Header(None),
+) -> Response:
+    """JSON by default; NDJSON, CSV, Arrow IPC and Parquet are streamed in batches."""
+    media_type = _export_media_type(format, accept)
+    if media_type in STREAM_ENCODERS:
+        return _stream(media_type, await get_catalog_async(*STREAM_WARM), feature_batches, "features")
+    return Response(await _render(render_features_json, await get_catalog_async()), media_type=JSON_MEDIA_TYPE)
+
+
+@router.get("/training-data", responses=EXPORT_RESPONSES)
+async def ml_training_data(
+    format: Optional[str] = Query(None, pattern=FORMAT_PATTERN, description="Sobrescreve o header Accept"),
+    accept: Optional[str] = Header(None),
+) -> Response:
+    """Streamed variants carry only the records; feature columns and target move to headers."""
+    media_type = _export_media_type(format, accept)
+    if media_type in STREAM_ENCODERS:
+        headers = {"X-Feature-Columns": ",".join(FEATURE_COLUMNS), "X-Target": TARGET}
+        return _stream(media_type, await get_catalog_async(*STREAM_WARM), training_batches, "training-data", headers)
+    return Response(await _render(render_training_json, await get_catalog_async()), media_type=JSON_MEDIA_TYPE)
+
+
+@router.get("/feature-matrix", responses=FEATURE_MATRIX_RESPONSES)
+async def ml_feature_matrix(
+    split: Optional[str] = Query(None, pattern="^(train|validation)$", description="Parte do split"),
+    validation_fraction: float = Query(DEFAULT_VALIDATION_FRACTION, gt=0, lt=1),
+    seed: int = Query(DEFAULT_SPLIT_SEED, ge=0),
+    title_buckets: int = Query(TITLE_HASH_BUCKETS, ge=0, le=MAX_TITLE_HASH_BUCKETS),
+    format: Optional[str] = Query(None, pattern="^(json|arrow)$", description="Sobrescreve o header Accept"),
+    accept: Optional[str] = Header(None),
+) -> Response:
+    """Model-ready float32 features, cached per catalog version; `X-Feature-Schema` identifies the layout."""
+    arrow = _export_media_type(format, accept) == ARROW_STREAM_MEDIA_TYPE
+    body, schema_hash = await _render(
+        render_feature_matrix, await get_catalog_async(), split, validation_fraction, seed, title_buckets, arrow
+    )
+    return Response(
+        body,
+        media_type=ARROW_STREAM_MEDIA_TYPE if arrow else JSON_MEDIA_TYPE,
+        headers={"X-Feature-Schema": schema_hash},
+    )
 
 
 @router.post("/predictions")
@@ -45,5 +184,82 @@ def ml_predictions(payload: PredictionPayload) -> Dict[str, Any]:
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Predictions payload is empty.",
         )
-    summary = summarize_predictions([prediction.model_dump() for prediction in payload.predictions])
-    return {"status": "accepted", "summary": summary}
+    summary = prediction_store.append(prediction.model_dump() for prediction in payload.predictions)
+    return {"status": "accepted", "batch_id": summary.pop("batch_id"), "summary": summary}
+
+
+@router.get("/predictions")
+def ml_list_predictions(
+    response: Response,
+    book_id: Optional[int] = Query(None),
+    model: Optional[str] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+) -> List[Dict[str, Any]]:
+    """Stored predictions, newest first; the total matching count is in `X-Total-Count`."""
+    items, total = prediction_store.query(book_id=book_id, model=model, skip=skip, limit=limit)
+    response.headers["X-Total-Count"] = str(total)
+    return items
+
+
+@router.get("/predictions/models")
+def ml_prediction_models() -> List[Dict[str, Any]]:
+    """Per-model aggregates, maintained on ingest."""
+    return prediction_store.model_stats()
+
+
+async def _catalog_features(book_ids: List[int]):
+    snapshot = await get_catalog_async("id_index")
+    matrix = cached_feature_matrix(snapshot)
+    if matrix is None:
+        matrix = await run_in_threadpool(feature_matrix, snapshot)
+    found = [book_id for book_id in book_ids if book_id in snapshot.id_index]
+    positions = [snapshot.id_index[book_id] for book_id in found]
+    missing = [book_id for book_id in book_ids if book_id not in snapshot.id_index]
+    return found, missing, matrix.features[positions], matrix.schema
+
+
+def _require_price_model():
+    model = get_price_model()
+    if model is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="No price model is loaded; the catalog has no priced books to train on.",
+        )
+    return model
+
+
+@router.get("/model")
+async def ml_model() -> Dict[str, Any]:
+    return _require_price_model().describe()
+
+
+@router.post("/predict")
+async def ml_predict(payload: PredictRequest) -> Dict[str, Any]:
+    """Score books with the in-process price model; concurrent calls are micro-batched."""
+    if (payload.book_ids is None) == (payload.features is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Send exactly one of book_ids or features.",
+        )
+    model = _require_price_model()
+
+    if payload.book_ids is not None:
+        found, missing, rows, schema = await _catalog_features(payload.book_ids)
+        rows = model.align(rows, schema)
+    else:
+        found, missing = None, []
+        width = len(model.columns)
+        if any(len(row) != width for row in payload.features):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Each feature row must have {width} values (see GET /api/v1/ml/model).",
+            )
+        rows = np.asarray(payload.features, dtype=np.float32).reshape(-1, width)
+
+    scores = (await price_batcher.submit(rows)).tolist() if len(rows) else []
+    if found is None:
+        predictions = [{"price": round(score, 2)} for score in scores]
+    else:
+        predictions = [{"book_id": book_id, "price": round(score, 2)} for book_id, score in zip(found, scores)]
+    return {"model": model.name, "model_version": model.version, "predictions": predictions, "missing": missing}
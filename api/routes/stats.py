@@ -1,19 +1,18 @@
 from fastapi import APIRouter
 
-from api.services.insights import (
-    compute_categories_stats,
-    compute_overview,
-    load_books_dataframe,
-)
+from api.services.catalog import catalog, get_catalog, get_catalog_async
 
 router = APIRouter(tags=["stats"])
 
 @router.get("/stats/overview")
-def stats_overview():
-    df = load_books_dataframe()
-    return compute_overview(df)
+async def stats_overview():
+    return (await get_catalog_async("aggregates")).aggregates.overview()
 
 @router.get("/stats/categories")
-def stats_by_category():
-    df = load_books_dataframe()
-    return compute_categories_stats(df)
+async def stats_by_category():
+    return (await get_catalog_async("aggregates")).aggregates.category_stats()
+
+@router.get("/stats/catalog")
+def stats_catalog():
+    get_catalog()
+    return catalog.stats()
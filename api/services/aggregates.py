@@ -0,0 +1,231 @@
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+TRACKED_COLUMNS = ["title", "category", "price", "rating", "availability"]
+
+# Above this share of changed rows a full rebuild is cheaper than applying the delta.
+MAX_INCREMENTAL_RATIO = 0.1
+
+
+def _is_missing(value: object) -> bool:
+    return value is None or (isinstance(value, float) and np.isnan(value))
+
+
+@dataclass
+class CategoryAggregate:
+    books: int = 0
+    price_sum: float = 0.0
+    price_count: int = 0
+    rating_sum: float = 0.0
+    rating_count: int = 0
+    # Price multiset, so min/max stay exact when records are removed.
+    prices: Counter = field(default_factory=Counter)
+
+    def as_dict(self, category: str) -> Dict[str, object]:
+        return {
+            "category": category,
+            "books": self.books,
+            "avg_price": round(self.price_sum / self.price_count, 2) if self.price_count else None,
+            "max_price": max(self.prices) if self.prices else None,
+            "min_price": min(self.prices) if self.prices else None,
+            "avg_rating": round(self.rating_sum / self.rating_count, 2) if self.rating_count else None,
+        }
+
+
+class StatsAggregates:
+    """Running counters behind /stats/overview and /stats/categories.
+
+    Built once per catalog version with vectorized group-bys, then kept up
+    to date record by record (`add`/`remove`) when only a few rows change.
+    """
+
+    def __init__(self) -> None:
+        self.total_books = 0
+        self.price_sum = 0.0
+        self.price_count = 0
+        self.ratings: Counter = Counter()
+        self.availability: Counter = Counter()
+        self.categories: Dict[str, CategoryAggregate] = {}
+        self._overview: Optional[Dict[str, object]] = None
+        self._category_stats: Optional[List[Dict[str, object]]] = None
+        # Per-row hashes of the frame these totals describe (see `apply_changes`).
+        self.row_hashes: Optional[np.ndarray] = None
+        # Categories this instance may mutate in place; None means all of them.
+        self._owned: Optional[Set[str]] = None
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "StatsAggregates":
+        aggregates = cls()
+        aggregates.total_books = int(len(df))
+        if df.empty:
+            return aggregates
+
+        prices = pd.to_numeric(df["price"], errors="coerce")
+        ratings = pd.to_numeric(df["rating"], errors="coerce")
+        aggregates.price_sum = float(prices.sum())
+        aggregates.price_count = int(prices.count())
+        aggregates.ratings = Counter({int(k): int(v) for k, v in ratings.dropna().value_counts().items()})
+        aggregates.availability = Counter(df["availability"].dropna().value_counts().to_dict())
+
+        frame = pd.DataFrame(
+            {"category": df["category"], "title": df["title"], "price": prices, "rating": ratings}
+        ).dropna(subset=["category"])
+        grouped = frame.groupby("category").agg(
+            books=("title", "count"),
+            price_sum=("price", "sum"),
+            price_count=("price", "count"),
+            rating_sum=("rating", "sum"),
+            rating_count=("rating", "count"),
+        )
+        price_counts = frame.dropna(subset=["price"]).groupby(["category", "price"]).size()
+        for category, row in grouped.iterrows():
+            aggregates.categories[category] = CategoryAggregate(
+                books=int(row["books"]),
+                price_sum=float(row["price_sum"]),
+                price_count=int(row["price_count"]),
+                rating_sum=float(row["rating_sum"]),
+                rating_count=int(row["rating_count"]),
+            )
+        for (category, price), count in price_counts.items():
+            aggregates.categories[category].prices[float(price)] = int(count)
+        return aggregates
+
+    def _apply(self, record: Dict[str, object], sign: int) -> None:
+        self._overview = None
+        self._category_stats = None
+        self.total_books += sign
+
+        price = None if _is_missing(record.get("price")) else float(record["price"])
+        rating = None if _is_missing(record.get("rating")) else int(record["rating"])
+        if price is not None:
+            self.price_sum += sign * price
+            self.price_count += sign
+        if rating is not None:
+            self.ratings[rating] += sign
+        if not _is_missing(record.get("availability")):
+            self.availability[record["availability"]] += sign
+
+        category = record.get("category")
+        if _is_missing(category):
+            return
+        aggregate = self.categories.get(category)
+        if self._owned is not None and category not in self._owned:
+            # Shared with the instance this one was copied from: copy on first write.
+            aggregate = replace(aggregate, prices=Counter(aggregate.prices)) if aggregate else None
+            self._owned.add(category)
+        if aggregate is None:
+            aggregate = CategoryAggregate()
+        self.categories[category] = aggregate
+        if not _is_missing(record.get("title")):
+            aggregate.books += sign
+        if price is not None:
+            aggregate.price_sum += sign * price
+            aggregate.price_count += sign
+            aggregate.prices[price] += sign
+            if aggregate.prices[price] <= 0:
+                del aggregate.prices[price]
+        if rating is not None:
+            aggregate.rating_sum += sign * rating
+            aggregate.rating_count += sign
+        if aggregate.books <= 0 and aggregate.price_count <= 0 and aggregate.rating_count <= 0:
+            del self.categories[category]
+
+    def add(self, record: Dict[str, object]) -> None:
+        self._apply(record, 1)
+
+    def remove(self, record: Dict[str, object]) -> None:
+        self._apply(record, -1)
+
+    def _copy(self) -> "StatsAggregates":
+        """Copy sharing the per-category totals until `_apply` first touches them."""
+        updated = StatsAggregates()
+        updated.total_books = self.total_books
+        updated.price_sum = self.price_sum
+        updated.price_count = self.price_count
+        updated.ratings = Counter(self.ratings)
+        updated.availability = Counter(self.availability)
+        updated.categories = dict(self.categories)
+        updated._owned = set()
+        return updated
+
+    def apply_changes(self, old_df: pd.DataFrame, new_df: pd.DataFrame) -> Optional["StatsAggregates"]:
+        """Return a copy updated with the rows that differ between two catalog versions.
+
+        Rows are compared by a hash of `id` and what the totals depend on, so
+        only changed rows are turned into records; the previous version's
+        hashes are kept from the last call. Returns `None` when too much
+        changed or reordered rows cannot be matched by a unique `id`, in
+        which case callers rebuild from scratch.
+        """
+        old_hashes = self.row_hashes if self.row_hashes is not None else _row_hashes(old_df)
+        new_hashes = _row_hashes(new_df)
+        common = min(len(old_hashes), len(new_hashes))
+        old_ids, new_ids = _ids(old_df), _ids(new_df)
+        if np.array_equal(old_ids[:common], new_ids[:common], equal_nan=True):
+            # Same rows in the same order (the usual edit or append): compare position by position.
+            changed = np.flatnonzero(old_hashes[:common] != new_hashes[:common])
+            removed = np.concatenate([changed, np.arange(common, len(old_hashes))])
+            added = np.concatenate([changed, np.arange(common, len(new_hashes))])
+        elif pd.Index(old_ids).is_unique and pd.Index(new_ids).is_unique:
+            removed = np.flatnonzero(~np.isin(old_hashes, new_hashes))
+            added = np.flatnonzero(~np.isin(new_hashes, old_hashes))
+        else:
+            return None
+
+        if max(len(removed), len(added)) > MAX_INCREMENTAL_RATIO * max(len(new_df), 1):
+            return None
+
+        updated = self._copy()
+        for record in _records(old_df, removed):
+            updated.remove(record)
+        for record in _records(new_df, added):
+            updated.add(record)
+        updated.row_hashes = new_hashes
+        return updated
+
+    def overview(self) -> Dict[str, object]:
+        if self._overview is None:
+            avg_price = self.price_sum / self.price_count if self.price_count else 0.0
+            self._overview = {
+                "total_books": self.total_books,
+                "avg_price": round(avg_price, 2),
+                "rating_distribution": {
+                    rating: count for rating, count in sorted(self.ratings.items()) if count > 0
+                },
+                "availability": {
+                    status: count
+                    for status, count in sorted(self.availability.items(), key=lambda item: -item[1])
+                    if count > 0
+                },
+            }
+        return self._overview
+
+    def category_stats(self) -> List[Dict[str, object]]:
+        if self._category_stats is None:
+            self._category_stats = [
+                self.categories[category].as_dict(category) for category in sorted(self.categories)
+            ]
+        return self._category_stats
+
+
+def _ids(df: pd.DataFrame) -> np.ndarray:
+    if "id" not in df.columns:
+        return np.arange(len(df))
+    return pd.to_numeric(df["id"], errors="coerce").to_numpy(dtype=float)
+
+
+def _row_hashes(df: pd.DataFrame) -> np.ndarray:
+    columns = [column for column in ["id"] + TRACKED_COLUMNS if column in df.columns]
+    frame = df[columns]
+    if "title" in frame.columns:
+        # Only a title's presence counts towards the totals, and hashing the text dominates the cost.
+        frame = frame.assign(title=frame["title"].isna())
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+def _records(df: pd.DataFrame, positions: np.ndarray) -> List[Dict[str, object]]:
+    return df.iloc[positions][TRACKED_COLUMNS].to_dict(orient="records")
@@ -0,0 +1,98 @@
+import asyncio
+import os
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+BATCH_MAX_ROWS = int(os.getenv("ML_BATCH_MAX_ROWS", "2048"))
+# 0 = only coalesce requests already queued; a linear model is too cheap for waiting to pay off.
+BATCH_MAX_WAIT_MS = float(os.getenv("ML_BATCH_MAX_WAIT_MS", "0"))
+
+_Pending = Tuple[np.ndarray, "asyncio.Future[np.ndarray]"]
+
+
+class MicroBatcher:
+    """Coalesce concurrent `submit` calls into one vectorized `predict(rows)` call.
+
+    The first queued request opens a batch; requests already queued, or
+    arriving within `max_wait_ms`, join it up to `max_rows` rows. Each caller
+    gets back the slice of the result that matches its own rows.
+    """
+
+    def __init__(
+        self,
+        predict: Callable[[np.ndarray], np.ndarray],
+        max_rows: int = BATCH_MAX_ROWS,
+        max_wait_ms: float = BATCH_MAX_WAIT_MS,
+    ) -> None:
+        self.predict = predict
+        self.max_rows = max_rows
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.rows = 0
+        self._queue: Optional["asyncio.Queue[_Pending]"] = None
+        self._worker: Optional["asyncio.Task[None]"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_worker(self) -> "asyncio.Queue[_Pending]":
+        loop = asyncio.get_running_loop()
+        # A new event loop (tests, a restarted server) needs its own queue and worker.
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run(self._queue))
+        return self._queue
+
+    async def submit(self, rows: np.ndarray) -> np.ndarray:
+        queue = self._ensure_worker()
+        future: "asyncio.Future[np.ndarray]" = asyncio.get_running_loop().create_future()
+        await queue.put((rows, future))
+        return await future
+
+    async def _run(self, queue: "asyncio.Queue[_Pending]") -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await queue.get()]
+            total = len(pending[0][0])
+            deadline = loop.time() + self.max_wait
+            while total < self.max_rows:
+                try:
+                    remaining = deadline - loop.time()
+                    item = queue.get_nowait() if remaining <= 0 else await asyncio.wait_for(queue.get(), remaining)
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                pending.append(item)
+                total += len(item[0])
+            self._dispatch(pending)
+
+    def _dispatch(self, pending: List[_Pending]) -> None:
+        try:
+            results = self.predict(np.concatenate([rows for rows, _ in pending]))
+        except Exception as exc:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        self.batches += 1
+        offset = 0
+        for rows, future in pending:
+            if not future.done():  # the caller may have gone away
+                future.set_result(results[offset : offset + len(rows)])
+            offset += len(rows)
+        self.rows += offset
+
+    async def close(self) -> None:
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_rows": round(self.rows / self.batches, 2) if self.batches else 0.0,
+        }
@@ -0,0 +1,308 @@
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from starlette.concurrency import run_in_threadpool
+
+from api.core.responses import dumps
+from api.services import insights
+from api.services.aggregates import StatsAggregates
+from api.services.ranges import SortedIndex
+from api.services.search import SearchIndex
+from api.services.similarity import SimilarityIndex
+from api.services.storage import map_file, storage_for
+
+REFRESH_INTERVAL_SECONDS = float(os.getenv("CATALOG_REFRESH_INTERVAL", "1.0"))
+
+EMPTY_VERSION = "empty"
+
+SORTABLE_FIELDS = ("id", "title", "price", "rating")
+
+
+@dataclass(frozen=True)
+class FileSignature:
+    mtime_ns: int
+    size: int
+
+
+class CatalogSnapshot:
+    """Immutable, fully cleaned view of the catalog for one version of the source file."""
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        version: str,
+        path: Path,
+        aggregates: Optional[StatsAggregates] = None,
+    ) -> None:
+        self.df = df
+        self.version = version
+        self.path = path
+        self.loaded_at = time.time()
+        self._sort_ranks: Dict[Tuple[str, bool], np.ndarray] = {}
+        if aggregates is not None:
+            self.__dict__["aggregates"] = aggregates
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    @cached_property
+    def records(self) -> List[Dict[str, object]]:
+        """Rows as dicts, built on first use; lookups hand out these dicts as-is."""
+        return self.df.to_dict(orient="records")
+
+    @cached_property
+    def id_index(self) -> Dict[int, int]:
+        """Book id -> row position (the first row wins when an id repeats)."""
+        if "id" not in self.df.columns:
+            return {}
+        ids = pd.to_numeric(self.df["id"], errors="coerce").to_numpy(dtype=float)
+        positions = np.flatnonzero(~np.isnan(ids))
+        # Reversed so earlier positions overwrite later duplicates.
+        return dict(zip(ids[positions[::-1]].astype(np.int64).tolist(), positions[::-1].tolist()))
+
+    @cached_property
+    def record_json(self) -> List[bytes]:
+        """Per-row JSON fragments, encoded once per version for the fast response path."""
+        return [dumps(record) for record in self.records]
+
+    @cached_property
+    def category_column(self) -> pd.Categorical:
+        """Dictionary-encoded category column (sorted categories + int codes)."""
+        return pd.Categorical(self.df["category"])
+
+    @cached_property
+    def category_counts(self) -> Dict[str, int]:
+        column = self.category_column
+        codes = column.codes
+        counts = np.bincount(codes[codes >= 0], minlength=len(column.categories))
+        return {
+            str(name): int(count)
+            for name, count in zip(column.categories, counts)
+            if str(name).strip() != ""
+        }
+
+    @cached_property
+    def category_names(self) -> List[str]:
+        return list(self.category_counts)
+
+    @cached_property
+    def aggregates(self) -> StatsAggregates:
+        return StatsAggregates.from_dataframe(self.df)
+
+    @cached_property
+    def search_index(self) -> SearchIndex:
+        return SearchIndex(self.df["title"].tolist(), self.df["category"].tolist())
+
+    @cached_property
+    def similarity_index(self) -> SimilarityIndex:
+        return SimilarityIndex(
+            self.df["title"].tolist(), self.df["category"].tolist(), self.prices, self.ratings
+        )
+
+    @cached_property
+    def prices(self) -> np.ndarray:
+        return pd.to_numeric(self.df["price"], errors="coerce").to_numpy(dtype=float)
+
+    @cached_property
+    def ratings(self) -> np.ndarray:
+        return pd.to_numeric(self.df["rating"], errors="coerce").to_numpy(dtype=float)
+
+    @cached_property
+    def price_index(self) -> SortedIndex:
+        return SortedIndex(self.prices)
+
+    @cached_property
+    def rating_index(self) -> SortedIndex:
+        return SortedIndex(self.ratings)
+
+    def sort_rank(self, field: str, descending: bool = False) -> np.ndarray:
+        """Rank of every row when the catalog is ordered by `field`.
+
+        Ties keep catalog order in both directions, and missing values rank last.
+        """
+        rank = self._sort_ranks.get((field, descending))
+        if rank is None:
+            if field not in SORTABLE_FIELDS:
+                raise ValueError(f"Unsupported sort field: {field}")
+            if field == "title":
+                titles = self.df["title"].fillna("").astype(str).str.lower()
+                # Codes follow sorted order, so negating them reverses it without reordering ties.
+                keys = pd.factorize(titles, sort=True)[0].astype(float)
+            else:
+                keys = pd.to_numeric(self.df[field], errors="coerce").to_numpy(dtype=float)
+            # argsort puts NaN last; negating keeps it there.
+            order = np.argsort(-keys if descending else keys, kind="stable")
+            rank = np.empty(len(order), dtype=np.intp)
+            rank[order] = np.arange(len(order))
+            self._sort_ranks[(field, descending)] = rank
+        return rank
+
+    def get_record(self, book_id: int) -> Optional[Dict[str, object]]:
+        position = self.id_index.get(book_id)
+        return None if position is None else self.records[position]
+
+    def get_records(self, book_ids: Iterable[int]) -> List[Dict[str, object]]:
+        """Return the records for `book_ids` in request order, skipping unknown ids."""
+        index, records = self.id_index, self.records
+        return [records[index[book_id]] for book_id in book_ids if book_id in index]
+
+
+class CatalogCache:
+    """Process-wide catalog, reloaded only when the source file actually changes.
+
+    Readers always get a complete snapshot: a reload builds a new
+    `CatalogSnapshot` and swaps the reference in a single assignment.
+    """
+
+    def __init__(self, refresh_interval: float = REFRESH_INTERVAL_SECONDS) -> None:
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._signature: Optional[FileSignature] = None
+        self._path: Optional[Path] = None
+        self._last_check = 0.0
+        self.hits = 0
+        self.reloads = 0
+        self.revalidations = 0
+        self._listeners: List[Callable[[CatalogSnapshot], None]] = []
+
+    def add_listener(self, callback: Callable[[CatalogSnapshot], None]) -> None:
+        """Call `callback(snapshot)` after every reload that produces a new version."""
+        self._listeners.append(callback)
+
+    def peek(self) -> Optional[CatalogSnapshot]:
+        """The current snapshot if no freshness check is due; never touches the filesystem."""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._last_check < self.refresh_interval:
+            self.hits += 1
+            return snapshot
+        return None
+
+    def get(self) -> CatalogSnapshot:
+        snapshot = self.peek()
+        return snapshot if snapshot is not None else self.refresh()
+
+    def refresh(self, force: bool = False) -> CatalogSnapshot:
+        path = Path(insights.catalog_path())
+        signature = _stat(path)
+        snapshot = self._snapshot
+        if not force and snapshot is not None and path == self._path and signature == self._signature:
+            self._last_check = time.monotonic()
+            self.hits += 1
+            return snapshot
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock.
+            if not force and self._snapshot is not None and path == self._path and signature == self._signature:
+                self.hits += 1
+                return self._snapshot
+            previous = self._snapshot
+            self._swap(path, signature)
+            self._last_check = time.monotonic()
+            snapshot = self._snapshot
+        if snapshot is not previous:
+            for callback in self._listeners:
+                callback(snapshot)
+        return snapshot
+
+    def stats(self) -> Dict[str, object]:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version if snapshot else None,
+            "path": str(snapshot.path) if snapshot else None,
+            "rows": len(snapshot) if snapshot else 0,
+            "loaded_at": snapshot.loaded_at if snapshot else None,
+            "hits": self.hits,
+            "reloads": self.reloads,
+            "revalidations": self.revalidations,
+        }
+
+    def _swap(self, path: Path, signature: Optional[FileSignature]) -> None:
+        if signature is None:
+            empty = pd.DataFrame(columns=insights.DEFAULT_COLUMNS)
+            self._snapshot = CatalogSnapshot(empty, EMPTY_VERSION, path)
+            self._signature, self._path = None, path
+            self.reloads += 1
+            return
+
+        storage = storage_for(path)
+        # Arrow files are mapped, not copied: workers share the raw file bytes through the page
+        # cache. Anything built from them (records, indexes, string columns) is still per worker.
+        content = map_file(path) if storage.memory_mapped else path.read_bytes()
+        version = hashlib.blake2b(content, digest_size=16).hexdigest()
+        current = self._snapshot
+        if current is not None and path == self._path and current.version == version:
+            # Touched but not modified: keep the parsed frame, remember the new stat.
+            self._signature = signature
+            self.revalidations += 1
+            return
+
+        df = storage.read(path, content)
+        aggregates = None
+        if current is not None and "aggregates" in current.__dict__:
+            aggregates = current.aggregates.apply_changes(current.df, df)
+        self._snapshot = CatalogSnapshot(df, version, path, aggregates=aggregates)
+        self._signature, self._path = signature, path
+        self.reloads += 1
+
+
+def _stat(path: Path) -> Optional[FileSignature]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return FileSignature(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+
+
+catalog = CatalogCache()
+
+
+class CatalogVersionMismatch(Exception):
+    pass
+
+
+def get_catalog() -> CatalogSnapshot:
+    return catalog.get()
+
+
+def get_catalog_version(version: str) -> CatalogSnapshot:
+    """This process's snapshot of catalog `version`, revalidating once if it holds another one.
+
+    Raises `CatalogVersionMismatch` when the source file no longer matches
+    `version`, e.g. in a pool worker asked to render a snapshot the file has
+    since moved on from.
+    """
+    snapshot = catalog.get()
+    if snapshot.version != version:
+        snapshot = catalog.refresh()
+    if snapshot.version != version:
+        raise CatalogVersionMismatch(f"catalog is at {snapshot.version}, expected {version}")
+    return snapshot
+
+
+def _warmed(attributes: Sequence[str]) -> CatalogSnapshot:
+    snapshot = catalog.get()
+    for attribute in attributes:
+        getattr(snapshot, attribute)
+    return snapshot
+
+
+async def get_catalog_async(*warm: str) -> CatalogSnapshot:
+    """`get_catalog` for `async` handlers.
+
+    Returns straight from memory when the snapshot is fresh and the derived
+    data named in `warm` (e.g. "record_json") is already built; otherwise the
+    stat/reload and the build run in the threadpool, never on the event loop.
+    """
+    snapshot = catalog.peek()
+    if snapshot is None or any(attribute not in snapshot.__dict__ for attribute in warm):
+        snapshot = await run_in_threadpool(_warmed, warm)
+    return snapshot
@@ -1,65 +1,34 @@
 import os
 from pathlib import Path
-from typing import Dict, List
+from typing import IO, Dict, List, Optional, Union
 
 import numpy as np
 import pandas as pd
 
+from api.services.normalization import (  # noqa: F401 - RATING_MAP kept importable from here
+    DEFAULT_COLUMNS,
+    RATING_MAP,
+    normalize_books,
+    nulls_to_none,
+)
+
 BOOKS_CSV_PATH = Path(os.getenv("BOOKS_CSV_PATH", "data/books.csv"))
+# Optional columnar copy of the catalog (.feather/.arrow/.parquet); CSV stays the import format.
+BOOKS_DATA_PATH: Optional[Path] = Path(os.environ["BOOKS_DATA_PATH"]) if os.getenv("BOOKS_DATA_PATH") else None
 
-RATING_MAP = {
-    "One": 1,
-    "Two": 2,
-    "Three": 3,
-    "Four": 4,
-    "Five": 5,
-    "one": 1,
-    "two": 2,
-    "three": 3,
-    "four": 4,
-    "five": 5,
-}
-
-DEFAULT_COLUMNS = [
-    "id",
-    "title",
-    "category",
-    "price",
-    "rating",
-    "availability",
-    "link",
-    "image",
-]
-
-
-def load_books_dataframe() -> pd.DataFrame:
-    if not BOOKS_CSV_PATH.exists():
-        return pd.DataFrame(columns=DEFAULT_COLUMNS)
-
-    df = pd.read_csv(BOOKS_CSV_PATH)
-
-    if "price" in df.columns:
-        cleaned_price = (
-            df["price"]
-            .astype(str)
-            .str.replace(r"[^\d.,-]", "", regex=True)
-            .str.replace(",", ".", regex=False)
-        )
-        df["price"] = pd.to_numeric(cleaned_price, errors="coerce")
 
-    if "rating" in df.columns:
-        df["rating"] = df["rating"].apply(lambda r: RATING_MAP.get(str(r), r))
-        df["rating"] = pd.to_numeric(df["rating"], errors="coerce").fillna(0).astype(int)
+def catalog_path() -> Path:
+    return BOOKS_DATA_PATH or BOOKS_CSV_PATH
 
-    if "id" not in df.columns:
-        df = df.reset_index(drop=True).reset_index().rename(columns={"index": "id"})
 
-    for column in DEFAULT_COLUMNS:
-        if column not in df.columns:
-            df[column] = None
+def load_books_dataframe(source: Optional[Union[Path, IO[bytes]]] = None) -> pd.DataFrame:
+    if source is None:
+        if not BOOKS_CSV_PATH.exists():
+            return pd.DataFrame(columns=DEFAULT_COLUMNS)
+        source = BOOKS_CSV_PATH
 
-    df = df.replace({pd.NA: None, np.nan: None})
-    return df[DEFAULT_COLUMNS + [col for col in df.columns if col not in DEFAULT_COLUMNS]]
+    df = pd.read_csv(source)
+    return nulls_to_none(normalize_books(df))
 
 
 def compute_overview(df: pd.DataFrame) -> Dict[str, object]:
@@ -107,15 +76,51 @@ def compute_categories_stats(df: pd.DataFrame) -> List[Dict[str, object]]:
     return grouped.to_dict(orient="records")
 
 
+def top_rated_positions(ratings: np.ndarray, prices: np.ndarray, limit: int) -> np.ndarray:
+    """Positions of the `limit` best books (rating desc, price asc, then catalog order).
+
+    Ratings are whole stars, so both orderings fold into one float key;
+    `np.partition` finds the k-th key and only the `limit` rows at or above
+    it are sorted.
+    """
+    size = len(ratings)
+    if size == 0 or limit <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    # Each rating gets a band wider than the price range; NaN ratings sort last, NaN prices last in their band.
+    low, high = np.fmin.reduce(prices), np.fmax.reduce(prices)
+    band = high - low + 1 if not np.isnan(low) else 1.0
+    key = prices - ratings * band
+    missing = np.flatnonzero(np.isnan(key))
+    if len(missing):
+        missing_ratings = ratings[missing]
+        worst = np.fmin.reduce(ratings)
+        missing_ratings[np.isnan(missing_ratings)] = (worst if not np.isnan(worst) else 0.0) - 1
+        missing_prices = prices[missing]
+        missing_prices[np.isnan(missing_prices)] = (high if not np.isnan(high) else 0.0) + 0.5
+        key[missing] = missing_prices - missing_ratings * band
+
+    if limit >= size:
+        candidates = np.arange(size)
+    else:
+        threshold = np.partition(key, limit - 1)[limit - 1]
+        better = np.flatnonzero(key < threshold)
+        tied = np.flatnonzero(key == threshold)[: limit - len(better)]
+        candidates = np.concatenate([better, tied])
+    order = np.lexsort((candidates, key[candidates]))
+    return candidates[order[:limit]]
+
+
 def get_top_rated_books(df: pd.DataFrame, limit: int) -> List[Dict[str, object]]:
     if df.empty:
         return []
 
-    ordered = (
-        df.sort_values(by=["rating", "price"], ascending=[False, True])
-        .head(limit)
-        .replace({pd.NA: None, np.nan: None})
+    positions = top_rated_positions(
+        pd.to_numeric(df["rating"], errors="coerce").to_numpy(dtype=float),
+        pd.to_numeric(df["price"], errors="coerce").to_numpy(dtype=float),
+        limit,
     )
+    ordered = df.iloc[positions].replace({pd.NA: None, np.nan: None})
     return ordered.to_dict(orient="records")
 
 
@@ -125,8 +130,6 @@ def filter_books_by_price(
     if df.empty or "price" not in df.columns:
         return []
 
-    filtered = df[
-        (df["price"].astype(float) >= float(min_price))
-        & (df["price"].astype(float) <= float(max_price))
-    ]
+    prices = df["price"].astype(float)
+    filtered = df[prices.between(float(min_price), float(max_price))]
     return filtered.replace({pd.NA: None, np.nan: None}).to_dict(orient="records")
@@ -1,8 +1,34 @@
-from typing import Dict, List
+import hashlib
+import io
+import json
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
 
+import numpy as np
 import pandas as pd
 
-from api.services.insights import load_books_dataframe
+from api.core.responses import dumps
+from api.services.catalog import CatalogSnapshot, catalog, get_catalog, get_catalog_version
+from api.services.similarity import hashed_token_counts
+from api.services.storage import _pyarrow
+
+T = TypeVar("T")
+
+# Rows serialized per chunk by the streaming exports; memory stays bounded by this, not the catalog.
+STREAM_BATCH_ROWS = int(os.getenv("ML_STREAM_BATCH_ROWS", "5000"))
+
+FEATURE_COLUMNS = ["category", "price", "rating", "in_stock"]
+TARGET = "price"
+
+FEATURE_EXPORT_COLUMNS = ["id", "title", "category", "price", "rating", "in_stock"]
+# Hashed title-token buckets appended to the numeric feature matrix (0 disables them).
+TITLE_HASH_BUCKETS = int(os.getenv("ML_TITLE_HASH_BUCKETS", "0"))
+MAX_TITLE_HASH_BUCKETS = 1024
+DEFAULT_SPLIT_SEED = 42
+DEFAULT_VALIDATION_FRACTION = 0.2
+TRAINING_EXPORT_COLUMNS = ["id", "title", "category", "price", "rating", "availability", "link", "in_stock"]
 
 
 def _clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
@@ -10,12 +36,7 @@ def _clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     return df.replace({pd.NA: None})
 
 
-def prepare_feature_matrix() -> List[Dict[str, object]]:
-    """Return feature-ready rows prioritising numeric/categorical fields."""
-    df = load_books_dataframe()
-    if df.empty:
-        return []
-
+def _feature_frame(df: pd.DataFrame) -> pd.DataFrame:
     features = df[
         [
             "id",
@@ -28,17 +49,10 @@ def prepare_feature_matrix() -> List[Dict[str, object]]:
     ].copy()
     features["in_stock"] = features["availability"].astype(str).str.contains("In stock", case=False)
     features["category"] = features["category"].fillna("unknown")
+    return features.drop(columns=["availability"])
 
-    features = features.drop(columns=["availability"])
-    return _clean_dataframe(features).to_dict(orient="records")
-
-
-def prepare_training_dataset() -> Dict[str, List[Dict[str, object]]]:
-    """Return a simplified dataset suitable for model training."""
-    df = load_books_dataframe()
-    if df.empty:
-        return {"records": [], "feature_columns": [], "target": None}
 
+def _training_frame(df: pd.DataFrame) -> pd.DataFrame:
     dataset = df[
         [
             "id",
@@ -51,32 +65,351 @@ def prepare_training_dataset() -> Dict[str, List[Dict[str, object]]]:
         ]
     ].copy()
     dataset["in_stock"] = dataset["availability"].astype(str).str.contains("In stock", case=False)
+    return dataset
+
+
+def prepare_feature_matrix(snapshot: Optional[CatalogSnapshot] = None) -> List[Dict[str, object]]:
+    """Return feature-ready rows prioritising numeric/categorical fields."""
+    df = (snapshot or get_catalog()).df
+    if df.empty:
+        return []
+    return _clean_dataframe(_feature_frame(df)).to_dict(orient="records")
 
-    feature_columns = ["category", "price", "rating", "in_stock"]
-    target = "price"
+
+def prepare_training_dataset(snapshot: Optional[CatalogSnapshot] = None) -> Dict[str, List[Dict[str, object]]]:
+    """Return a simplified dataset suitable for model training."""
+    df = (snapshot or get_catalog()).df
+    if df.empty:
+        return {"records": [], "feature_columns": [], "target": None}
 
     return {
-        "records": _clean_dataframe(dataset).to_dict(orient="records"),
-        "feature_columns": feature_columns,
-        "target": target,
+        "records": _clean_dataframe(_training_frame(df)).to_dict(orient="records"),
+        "feature_columns": FEATURE_COLUMNS,
+        "target": TARGET,
+    }
+
+
+@dataclass
+class ExportBatches:
+    """A catalog export split into DataFrames of at most `batch_rows` rows.
+
+    `categories` is the category dictionary of the whole snapshot, so every
+    batch dictionary-encodes `category` against the same values.
+    """
+
+    columns: List[str]
+    categories: List[str]
+    batches: Iterator[pd.DataFrame]
+
+
+def _batches(
+    snapshot: CatalogSnapshot, build: Callable[[pd.DataFrame], pd.DataFrame], batch_rows: int
+) -> Iterator[pd.DataFrame]:
+    df = snapshot.df
+    for start in range(0, len(df), batch_rows):
+        yield build(df.iloc[start : start + batch_rows])
+
+
+def feature_batches(
+    batch_rows: int = STREAM_BATCH_ROWS, snapshot: Optional[CatalogSnapshot] = None
+) -> ExportBatches:
+    """`prepare_feature_matrix` rows, batched; pins one snapshot so a reload cannot mix versions."""
+    snapshot = snapshot or get_catalog()
+    categories = [str(name) for name in snapshot.category_column.categories]
+    if "unknown" not in categories:
+        categories.append("unknown")
+    return ExportBatches(FEATURE_EXPORT_COLUMNS, categories, _batches(snapshot, _feature_frame, batch_rows))
+
+
+def training_batches(
+    batch_rows: int = STREAM_BATCH_ROWS, snapshot: Optional[CatalogSnapshot] = None
+) -> ExportBatches:
+    """`prepare_training_dataset` records, batched; pins one snapshot like `feature_batches`."""
+    snapshot = snapshot or get_catalog()
+    categories = [str(name) for name in snapshot.category_column.categories]
+    return ExportBatches(TRAINING_EXPORT_COLUMNS, categories, _batches(snapshot, _training_frame, batch_rows))
+
+
+def encode_ndjson(export: ExportBatches) -> Iterator[bytes]:
+    """One JSON object per line, one chunk per batch."""
+    for batch in export.batches:
+        records = _clean_dataframe(batch).to_dict(orient="records")
+        yield b"".join(dumps(record) + b"\n" for record in records)
+
+
+def encode_csv(export: ExportBatches) -> Iterator[bytes]:
+    """CSV with a single header row, one chunk per batch."""
+    yield (",".join(export.columns) + "\n").encode("utf-8")
+    for batch in export.batches:
+        yield batch.to_csv(index=False, header=False, lineterminator="\n").encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last `drain()`.
+
+    `tell()` keeps counting across drains, since the Parquet footer records
+    absolute offsets.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def arrow_schema(columns: List[str]):
+    """Export dtypes: dictionary-encoded `category`, bool `in_stock`, float64 `price`."""
+    pa = _pyarrow()
+    types = {
+        "id": pa.int64(),
+        "category": pa.dictionary(pa.int32(), pa.string()),
+        "price": pa.float64(),
+        "rating": pa.int64(),
+        "in_stock": pa.bool_(),
     }
+    return pa.schema([(column, types.get(column, pa.string())) for column in columns])
 
 
-def summarize_predictions(predictions: List[Dict[str, object]]) -> Dict[str, object]:
-    """Return a simple acknowledgement payload for received predictions."""
-    total = len(predictions)
-    sources = sorted({item.get("model", "unknown") for item in predictions})
-    avg_score = None
-    scores = [
-        float(item["score"])
-        for item in predictions
-        if isinstance(item, dict) and "score" in item and isinstance(item["score"], (int, float, str))
-    ]
-    if scores:
-        avg_score = round(sum(scores) / len(scores), 4)
+def _record_batches(export: ExportBatches, schema) -> Iterator[Any]:
+    pa = _pyarrow()
+    for batch in export.batches:
+        batch = batch.assign(category=pd.Categorical(batch["category"], categories=export.categories))
+        yield pa.RecordBatch.from_pandas(batch, schema=schema, preserve_index=False)
 
+
+def encode_arrow_stream(export: ExportBatches) -> Iterator[bytes]:
+    """Arrow IPC stream: schema first, then one record batch per chunk."""
+    pa = _pyarrow()
+    schema = arrow_schema(export.columns)
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        yield sink.drain()
+        for record_batch in _record_batches(export, schema):
+            writer.write_batch(record_batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def encode_parquet(export: ExportBatches) -> Iterator[bytes]:
+    """Parquet file with one row group per chunk; readable once the footer (last chunk) arrives."""
+    pa = _pyarrow()
+    schema = arrow_schema(export.columns)
+    sink = _ChunkSink()
+    with pa.parquet.ParquetWriter(sink, schema) as writer:
+        for record_batch in _record_batches(export, schema):
+            writer.write_batch(record_batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+@dataclass(frozen=True)
+class FeatureSchema:
+    """Column layout of a `FeatureMatrix`; `hash` changes whenever the layout does."""
+
+    columns: Tuple[str, ...]
+    target: Optional[str]
+    title_hash_buckets: int
+
+    @property
+    def hash(self) -> str:
+        layout = {"columns": self.columns, "target": self.target, "title_hashing": "crc32"}
+        return hashlib.blake2b(json.dumps(layout).encode("utf-8"), digest_size=8).hexdigest()
+
+
+@dataclass(frozen=True)
+class FeatureMatrix:
+    """Dense float32 features for one catalog version.
+
+    `features[i]` and `target[i]` describe book `ids[i]`. The target column
+    is never part of `features`; `target` keeps its NaNs so callers decide
+    how to treat unlabeled rows.
+    """
+
+    ids: np.ndarray
+    features: np.ndarray
+    target: np.ndarray
+    schema: FeatureSchema
+    catalog_version: str
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def take(self, mask: np.ndarray) -> "FeatureMatrix":
+        return FeatureMatrix(self.ids[mask], self.features[mask], self.target[mask], self.schema, self.catalog_version)
+
+    def split(
+        self, validation_fraction: float = DEFAULT_VALIDATION_FRACTION, seed: int = DEFAULT_SPLIT_SEED
+    ) -> Tuple["FeatureMatrix", "FeatureMatrix"]:
+        """(train, validation), assigned per book id so a book keeps its side across catalog versions."""
+        validation = split_scores(self.ids, seed) < validation_fraction
+        return self.take(~validation), self.take(validation)
+
+
+def split_scores(ids: np.ndarray, seed: int) -> np.ndarray:
+    """Deterministic pseudo-uniform [0, 1) value per id (SplitMix64 of id and seed)."""
+    offset = np.uint64((seed * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF)
+    z = ids.astype(np.uint64) + offset
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def build_feature_matrix(
+    df: pd.DataFrame,
+    catalog_version: str = "",
+    target: Optional[str] = TARGET,
+    title_hash_buckets: int = TITLE_HASH_BUCKETS,
+) -> FeatureMatrix:
+    """Encode the catalog as model-ready features.
+
+    Columns: `price` and `rating` (minus the target; missing prices take the
+    median), `in_stock`, one-hot `category=<name>` over the sorted
+    categories, then `title_hash_<n>` token counts.
+    """
+    numeric = [column for column in ("price", "rating") if column != target]
+    categories = pd.Categorical(df["category"].fillna("unknown").astype(str))
+    columns = (
+        numeric
+        + ["in_stock"]
+        + [f"category={name}" for name in categories.categories]
+        + [f"title_hash_{bucket}" for bucket in range(title_hash_buckets)]
+    )
+    schema = FeatureSchema(tuple(columns), target, title_hash_buckets)
+
+    features = np.zeros((len(df), len(columns)), dtype=np.float32)
+    for position, column in enumerate(numeric):
+        values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64)
+        fill = np.nanmedian(values) if np.isfinite(values).any() else 0.0
+        features[:, position] = np.where(np.isnan(values), fill, values)
+    in_stock = len(numeric)
+    features[:, in_stock] = df["availability"].astype(str).str.contains("In stock", case=False).to_numpy()
+    features[np.arange(len(df)), in_stock + 1 + categories.codes] = 1.0
+    if title_hash_buckets:
+        features[:, -title_hash_buckets:] = hashed_token_counts(df["title"].tolist(), title_hash_buckets)
+
+    labels = (
+        pd.to_numeric(df[target], errors="coerce").to_numpy(dtype=np.float32)
+        if target is not None
+        else np.full(len(df), np.nan, dtype=np.float32)
+    )
+    ids = pd.to_numeric(df["id"]).to_numpy(dtype=np.int64)
+    return FeatureMatrix(ids, features, labels, schema, catalog_version)
+
+
+_matrix_cache: Dict[Tuple[str, int], FeatureMatrix] = {}
+_matrix_lock = threading.Lock()
+
+
+def cached_feature_matrix(
+    snapshot: CatalogSnapshot, title_hash_buckets: int = TITLE_HASH_BUCKETS
+) -> Optional[FeatureMatrix]:
+    """The matrix for `snapshot` if it was already built, without building it."""
+    with _matrix_lock:
+        return _matrix_cache.get((snapshot.version, title_hash_buckets))
+
+
+def feature_matrix(
+    snapshot: Optional[CatalogSnapshot] = None, title_hash_buckets: int = TITLE_HASH_BUCKETS
+) -> FeatureMatrix:
+    """`build_feature_matrix` for the current catalog, computed once per version and layout."""
+    snapshot = snapshot or get_catalog()
+    cached = cached_feature_matrix(snapshot, title_hash_buckets)
+    if cached is not None:
+        return cached
+    key = (snapshot.version, title_hash_buckets)
+    matrix = build_feature_matrix(snapshot.df, snapshot.version, title_hash_buckets=title_hash_buckets)
+    with _matrix_lock:
+        return _matrix_cache.setdefault(key, matrix)
+
+
+def clear_feature_cache(_snapshot: Optional[CatalogSnapshot] = None) -> None:
+    with _matrix_lock:
+        _matrix_cache.clear()
+
+
+catalog.add_listener(clear_feature_cache)
+
+
+def feature_matrix_payload(matrix: FeatureMatrix) -> Dict[str, object]:
     return {
-        "received": total,
-        "models": sources,
-        "average_score": avg_score,
+        "catalog_version": matrix.catalog_version,
+        "schema_hash": matrix.schema.hash,
+        "columns": list(matrix.schema.columns),
+        "target": matrix.schema.target,
+        "ids": matrix.ids,
+        "features": matrix.features,
+        # NaN is not valid JSON; unlabeled rows go out as null.
+        "labels": [None if np.isnan(value) else value for value in matrix.target.tolist()],
     }
+
+
+def encode_feature_matrix_arrow(matrix: FeatureMatrix) -> bytes:
+    """Arrow IPC stream with `id`, one float32 column per feature and the target."""
+    pa = _pyarrow()
+    arrays = [pa.array(matrix.ids)] + [pa.array(matrix.features[:, i]) for i in range(matrix.features.shape[1])]
+    names = ["id", *matrix.schema.columns]
+    if matrix.schema.target is not None:
+        arrays.append(pa.array(matrix.target, from_pandas=True))
+        names.append(matrix.schema.target)
+    metadata = {"schema_hash": matrix.schema.hash, "catalog_version": matrix.catalog_version}
+    table = pa.Table.from_arrays(arrays, names=names, metadata=metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+# Entry points for `api.core.execution.run_heavy`: they run in a worker process against its own
+# catalog cache and return encoded bytes, which are cheap to send back.
+
+
+def render_features_json(snapshot: Optional[CatalogSnapshot] = None) -> bytes:
+    return dumps(prepare_feature_matrix(snapshot))
+
+
+def render_training_json(snapshot: Optional[CatalogSnapshot] = None) -> bytes:
+    return dumps(prepare_training_dataset(snapshot))
+
+
+def render_feature_matrix(
+    snapshot: Optional[CatalogSnapshot],
+    split: Optional[str],
+    validation_fraction: float,
+    seed: int,
+    title_hash_buckets: int,
+    arrow: bool,
+) -> Tuple[bytes, str]:
+    """(body, schema hash) for GET /ml/feature-matrix."""
+    matrix = feature_matrix(snapshot, title_hash_buckets=title_hash_buckets)
+    if split is not None:
+        train, validation = matrix.split(validation_fraction, seed)
+        matrix = train if split == "train" else validation
+    body = encode_feature_matrix_arrow(matrix) if arrow else dumps(feature_matrix_payload(matrix))
+    return body, matrix.schema.hash
+
+
+def render_at_version(render: Callable[..., T], version: str, *args: Any) -> T:
+    """`render(snapshot, *args)` against catalog `version`; the entry point for pool workers.
+
+    Snapshots are not sent across processes, only their version: the worker
+    renders from its own cache and refuses (`CatalogVersionMismatch`) rather
+    than answer from a different catalog than the caller's ETag and cache key.
+    """
+    return render(get_catalog_version(version), *args)
@@ -0,0 +1,101 @@
+"""Vectorized cleaning shared by the API loader and `scripts/transform.py`.
+
+Scraped columns are highly repetitive (a few thousand distinct prices, five
+rating words), so every conversion factorizes the column first, cleans the
+distinct values only, and broadcasts the result back through the integer codes.
+"""
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+RATING_MAP = {
+    "One": 1,
+    "Two": 2,
+    "Three": 3,
+    "Four": 4,
+    "Five": 5,
+    "one": 1,
+    "two": 2,
+    "three": 3,
+    "four": 4,
+    "five": 5,
+}
+
+DEFAULT_COLUMNS = [
+    "id",
+    "title",
+    "category",
+    "price",
+    "rating",
+    "availability",
+    "link",
+    "image",
+]
+
+# Anything that is not part of a number: currency symbols, spaces and the "Â" left behind
+# when the site's UTF-8 "£" is decoded as Latin-1 ("Â£45.17").
+NON_NUMERIC_PATTERN = r"[^\d.,-]"
+
+
+def _map_distinct(series: pd.Series, convert: Callable[[pd.Index], pd.Series]) -> np.ndarray:
+    """Apply `convert` to the distinct values of `series` and expand back to full length."""
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    converted = np.append(np.asarray(convert(pd.Index(uniques)), dtype=float), np.nan)
+    # Code -1 (missing) indexes the trailing NaN.
+    return converted[codes]
+
+
+def _clean_prices(values: pd.Index) -> pd.Series:
+    cleaned = (
+        values.astype(str)
+        .str.replace(NON_NUMERIC_PATTERN, "", regex=True)
+        .str.replace(",", ".", regex=False)
+    )
+    return pd.to_numeric(pd.Series(cleaned), errors="coerce")
+
+
+def _map_ratings(values: pd.Index) -> pd.Series:
+    words = pd.Series(values.astype(str))
+    mapped = words.map(RATING_MAP)
+    return mapped.fillna(pd.to_numeric(words, errors="coerce"))
+
+
+def normalize_price(series: pd.Series) -> pd.Series:
+    """'Â£45.17' / '£45,17' / '45.17' -> 45.17 (float64, NaN when unparseable)."""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype("float64")
+    return pd.Series(_map_distinct(series, _clean_prices), index=series.index, name=series.name)
+
+
+def normalize_rating(series: pd.Series) -> pd.Series:
+    """'Three' / 'three' / '3' -> 3 (int64, 0 when unknown)."""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.fillna(0).astype("int64")
+    ratings = _map_distinct(series, _map_ratings)
+    return pd.Series(np.nan_to_num(ratings, nan=0.0).astype("int64"), index=series.index, name=series.name)
+
+
+def normalize_books(df: pd.DataFrame) -> pd.DataFrame:
+    """Clean a raw scraped frame into the catalog schema (typed price/rating, `id`, default columns)."""
+    df = df.copy()
+    if "price" in df.columns:
+        df["price"] = normalize_price(df["price"])
+    if "rating" in df.columns:
+        df["rating"] = normalize_rating(df["rating"])
+
+    if "id" not in df.columns:
+        df = df.reset_index(drop=True).reset_index().rename(columns={"index": "id"})
+
+    for column in DEFAULT_COLUMNS:
+        if column not in df.columns:
+            df[column] = None
+
+    return df[DEFAULT_COLUMNS + [col for col in df.columns if col not in DEFAULT_COLUMNS]]
+
+
+def nulls_to_none(df: pd.DataFrame) -> pd.DataFrame:
+    """Replace NaN/NA with None, touching only the columns that actually contain nulls."""
+    for column in df.columns[df.isna().any().to_numpy()]:
+        df[column] = df[column].astype(object).where(df[column].notna(), None)
+    return df
@@ -0,0 +1,191 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from api.core.responses import dumps
+
+PREDICTIONS_DB_PATH = os.getenv("PREDICTIONS_DB_PATH", "data/predictions.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    batch_id TEXT NOT NULL,
+    received_at REAL NOT NULL,
+    book_id INTEGER,
+    model TEXT NOT NULL,
+    score REAL,
+    label TEXT,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS predictions_book ON predictions (book_id, id);
+CREATE INDEX IF NOT EXISTS predictions_model ON predictions (model, id);
+CREATE TABLE IF NOT EXISTS model_stats (
+    model TEXT PRIMARY KEY,
+    predictions INTEGER NOT NULL,
+    scored INTEGER NOT NULL,
+    score_sum REAL NOT NULL,
+    score_min REAL,
+    score_max REAL,
+    first_received_at REAL NOT NULL,
+    last_received_at REAL NOT NULL
+);
+"""
+
+# Merges one ingest batch's per-model totals into the running aggregates.
+UPSERT_MODEL_STATS = """
+INSERT INTO model_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (model) DO UPDATE SET
+    predictions = predictions + excluded.predictions,
+    scored = scored + excluded.scored,
+    score_sum = score_sum + excluded.score_sum,
+    score_min = min(coalesce(score_min, excluded.score_min), coalesce(excluded.score_min, score_min)),
+    score_max = max(coalesce(score_max, excluded.score_max), coalesce(excluded.score_max, score_max)),
+    last_received_at = excluded.last_received_at
+"""
+
+COLUMNS = ("id", "batch_id", "received_at", "book_id", "model", "score", "label", "metadata")
+
+
+class PredictionStore:
+    """Append-only SQLite (WAL) log of received predictions.
+
+    Each ingest is one transaction: the rows are bulk-inserted and the
+    per-model aggregates in `model_stats` are bumped, so reading them never
+    scans the log. One connection per thread; WAL lets readers run while a
+    batch is being written.
+    """
+
+    def __init__(self, path: str = PREDICTIONS_DB_PATH) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._initialized = False
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.row_factory = sqlite3.Row
+            with self._schema_lock:
+                if not self._initialized:
+                    connection.executescript(SCHEMA)
+                    self._initialized = True
+            self._local.connection = connection
+        return connection
+
+    def append(self, predictions: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Store one batch; returns its id plus the received count, models and mean score."""
+        batch_id = uuid.uuid4().hex
+        received_at = time.time()
+        rows: List[Tuple[Any, ...]] = []
+        # model -> [predictions, scored, score_sum, score_min, score_max]
+        per_model: Dict[str, List[Any]] = {}
+        for item in predictions:
+            model = item.get("model") or "unknown"
+            score = item.get("score")
+            metadata = item.get("metadata")
+            rows.append(
+                (
+                    batch_id,
+                    received_at,
+                    item.get("book_id"),
+                    model,
+                    score,
+                    item.get("label"),
+                    dumps(metadata).decode("utf-8") if metadata is not None else None,
+                )
+            )
+            totals = per_model.setdefault(model, [0, 0, 0.0, None, None])
+            totals[0] += 1
+            if score is not None:
+                totals[1] += 1
+                totals[2] += score
+                totals[3] = score if totals[3] is None else min(totals[3], score)
+                totals[4] = score if totals[4] is None else max(totals[4], score)
+
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.executemany(
+                "INSERT INTO predictions (batch_id, received_at, book_id, model, score, label, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            connection.executemany(
+                UPSERT_MODEL_STATS,
+                [(model, *totals, received_at, received_at) for model, totals in per_model.items()],
+            )
+
+        scored = sum(totals[1] for totals in per_model.values())
+        score_sum = sum(totals[2] for totals in per_model.values())
+        return {
+            "batch_id": batch_id,
+            "received": len(rows),
+            "models": sorted(per_model),
+            "average_score": round(score_sum / scored, 4) if scored else None,
+        }
+
+    def query(
+        self,
+        book_id: Optional[int] = None,
+        model: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Newest first; returns (page, total matching rows)."""
+        clauses, params = [], []
+        if book_id is not None:
+            clauses.append("book_id = ?")
+            params.append(book_id)
+        if model is not None:
+            clauses.append("model = ?")
+            params.append(model)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        connection = self._connection()
+        rows = connection.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM predictions{where} ORDER BY id DESC LIMIT ? OFFSET ?",
+            (*params, limit, skip),
+        ).fetchall()
+        if book_id is None:
+            # Unfiltered and per-model totals come from the aggregates, not a COUNT over the log.
+            total = connection.execute(
+                "SELECT coalesce(sum(predictions), 0) FROM model_stats"
+                + (" WHERE model = ?" if model is not None else ""),
+                params,
+            ).fetchone()[0]
+        else:
+            total = connection.execute(f"SELECT count(*) FROM predictions{where}", params).fetchone()[0]
+        items = [dict(row) for row in rows]
+        for item in items:
+            if item["metadata"] is not None:
+                item["metadata"] = json.loads(item["metadata"])
+        return items, int(total)
+
+    def model_stats(self) -> List[Dict[str, Any]]:
+        rows = self._connection().execute("SELECT * FROM model_stats ORDER BY model").fetchall()
+        return [
+            {
+                "model": row["model"],
+                "predictions": row["predictions"],
+                "scored": row["scored"],
+                "average_score": round(row["score_sum"] / row["scored"], 4) if row["scored"] else None,
+                "min_score": row["score_min"],
+                "max_score": row["score_max"],
+                "first_received_at": row["first_received_at"],
+                "last_received_at": row["last_received_at"],
+            }
+            for row in rows
+        ]
+
+
+prediction_store = PredictionStore()
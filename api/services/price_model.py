@@ -0,0 +1,186 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from api.services.batching import MicroBatcher
+from api.services.ml_data import DEFAULT_SPLIT_SEED, FeatureMatrix, FeatureSchema, feature_matrix
+
+logger = logging.getLogger("books_api.ml")
+
+MODEL_PATH = os.getenv("ML_MODEL_PATH", "data/price_model.npz")
+DEFAULT_ALPHA = 1.0
+
+
+@dataclass
+class RidgePriceModel:
+    """Linear price model over `FeatureMatrix` columns, fitted in closed form.
+
+    Features are standardized for the fit and the weights folded back, so
+    `predict` is a single `features @ weights + bias`.
+    """
+
+    columns: Tuple[str, ...]
+    weights: np.ndarray
+    bias: float
+    alpha: float = DEFAULT_ALPHA
+    trained_on: str = ""
+    metrics: Dict[str, float] = field(default_factory=dict)
+    name: str = "ridge-price"
+    _alignments: Dict[str, np.ndarray] = field(default_factory=dict, repr=False)
+
+    @property
+    def version(self) -> str:
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update("\0".join(self.columns).encode("utf-8"))
+        digest.update(self.weights.astype(np.float32).tobytes())
+        digest.update(np.float64(self.bias).tobytes())
+        return digest.hexdigest()
+
+    @classmethod
+    def fit(
+        cls, matrix: FeatureMatrix, alpha: float = DEFAULT_ALPHA, seed: int = DEFAULT_SPLIT_SEED
+    ) -> "RidgePriceModel":
+        """Fit on the train split of `matrix`; metrics come from its validation split."""
+        train, validation = matrix.split(seed=seed)
+        labeled = ~np.isnan(train.target)
+        features = train.features[labeled].astype(np.float64)
+        target = train.target[labeled].astype(np.float64)
+        if not len(target):
+            raise ValueError("No labeled rows to train the price model on")
+
+        means = features.mean(axis=0)
+        scales = features.std(axis=0)
+        scales[scales == 0] = 1.0
+        standardized = (features - means) / scales
+        gram = standardized.T @ standardized + alpha * np.eye(standardized.shape[1])
+        coefficients = np.linalg.solve(gram, standardized.T @ (target - target.mean()))
+
+        weights = coefficients / scales
+        model = cls(
+            columns=matrix.schema.columns,
+            weights=weights.astype(np.float32),
+            bias=float(target.mean() - means @ weights),
+            alpha=alpha,
+            trained_on=matrix.catalog_version,
+        )
+        model.metrics = model.evaluate(validation, baseline=float(target.mean()))
+        return model
+
+    def evaluate(self, matrix: FeatureMatrix, baseline: Optional[float] = None) -> Dict[str, float]:
+        labeled = ~np.isnan(matrix.target)
+        if not labeled.any():
+            return {}
+        target = matrix.target[labeled].astype(np.float64)
+        errors = self.predict(self.align(matrix.features[labeled], matrix.schema)) - target
+        metrics = {
+            "validation_rows": int(labeled.sum()),
+            "rmse": float(np.sqrt(np.mean(errors**2))),
+            "mae": float(np.mean(np.abs(errors))),
+        }
+        if baseline is not None:
+            metrics["baseline_rmse"] = float(np.sqrt(np.mean((target - baseline) ** 2)))
+        return metrics
+
+    def align(self, features: np.ndarray, schema: FeatureSchema) -> np.ndarray:
+        """Reorder `features` (laid out as `schema`) into this model's columns.
+
+        Columns the model never saw are dropped and columns missing from the
+        catalog (e.g. a category that disappeared) are zero.
+        """
+        if schema.columns == self.columns:
+            return features
+        positions = self._alignments.get(schema.hash)
+        if positions is None:
+            lookup = {column: index for index, column in enumerate(schema.columns)}
+            positions = np.array([lookup.get(column, -1) for column in self.columns], dtype=np.int64)
+            self._alignments[schema.hash] = positions
+        aligned = np.zeros((len(features), len(self.columns)), dtype=np.float32)
+        present = positions >= 0
+        aligned[:, present] = features[:, positions[present]]
+        return aligned
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        return features @ self.weights + np.float32(self.bias)
+
+    def save(self, path: Path) -> None:
+        metadata = {
+            "name": self.name,
+            "alpha": self.alpha,
+            "bias": self.bias,
+            "trained_on": self.trained_on,
+            "metrics": self.metrics,
+        }
+        with open(path, "wb") as handle:
+            np.savez(
+                handle,
+                columns=np.array(self.columns, dtype=str),
+                weights=self.weights,
+                metadata=np.array(json.dumps(metadata)),
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> "RidgePriceModel":
+        with np.load(path, allow_pickle=False) as archive:
+            metadata = json.loads(str(archive["metadata"]))
+            return cls(
+                columns=tuple(str(column) for column in archive["columns"]),
+                weights=archive["weights"].astype(np.float32),
+                bias=float(metadata["bias"]),
+                alpha=float(metadata["alpha"]),
+                trained_on=metadata["trained_on"],
+                metrics=metadata["metrics"],
+                name=metadata["name"],
+            )
+
+    def describe(self) -> Dict[str, object]:
+        return {
+            "name": self.name,
+            "version": self.version,
+            "alpha": self.alpha,
+            "trained_on": self.trained_on,
+            "columns": list(self.columns),
+            "metrics": self.metrics,
+        }
+
+
+_model: Optional[RidgePriceModel] = None
+_model_lock = threading.Lock()
+
+
+def load_price_model(path: Optional[str] = None) -> Optional[RidgePriceModel]:
+    """Load the serialized model at `path`, or fit one on the current catalog if there is none.
+
+    With nothing to train on (an empty or missing catalog) no model is loaded
+    and `None` is returned; the next call tries again.
+    """
+    global _model
+    path = path or MODEL_PATH
+    with _model_lock:
+        if Path(path).exists():
+            _model = RidgePriceModel.load(Path(path))
+            logger.info("Loaded price model %s from %s", _model.version, path)
+        else:
+            try:
+                _model = RidgePriceModel.fit(feature_matrix())
+            except ValueError as exc:
+                _model = None
+                logger.warning("No price model at %s and none could be trained: %s", path, exc)
+            else:
+                logger.warning("No price model at %s; trained %s in memory", path, _model.version)
+        return _model
+
+
+def get_price_model() -> Optional[RidgePriceModel]:
+    model = _model
+    return model if model is not None else load_price_model()
+
+
+# Concurrent /ml/predict requests share one matrix multiply per batch.
+price_batcher = MicroBatcher(lambda rows: get_price_model().predict(rows))
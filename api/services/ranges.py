@@ -0,0 +1,42 @@
+from typing import Optional
+
+import numpy as np
+
+
+class SortedIndex:
+    """Values sorted once with their catalog positions, so range filters are `searchsorted` slices.
+
+    NaN values are left out of the index: they never satisfy a range predicate.
+    """
+
+    def __init__(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=float)
+        valid = np.flatnonzero(~np.isnan(values))
+        order = np.argsort(values[valid], kind="stable")
+        self.positions: np.ndarray = valid[order]
+        self.values: np.ndarray = values[self.positions]
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def range(self, low: Optional[float] = None, high: Optional[float] = None) -> np.ndarray:
+        """Positions with `low <= value <= high`, ordered by value (O(log n + k))."""
+        start = 0 if low is None else int(np.searchsorted(self.values, low, side="left"))
+        stop = len(self.values) if high is None else int(np.searchsorted(self.values, high, side="right"))
+        return self.positions[start:max(start, stop)]
+
+
+def intersect_positions(*candidates: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    """Intersect position sets, smallest first; `None` means "no constraint".
+
+    The result is sorted, i.e. in catalog order.
+    """
+    active = sorted((np.sort(c) for c in candidates if c is not None), key=len)
+    if not active:
+        return None
+    result = active[0]
+    for other in active[1:]:
+        if not len(result):
+            break
+        result = np.intersect1d(result, other, assume_unique=True)
+    return result
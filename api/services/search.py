@@ -0,0 +1,121 @@
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Score multiplier for a query token found inside a word rather than at its start.
+INNER_MATCH_WEIGHT = 0.1
+
+
+def normalize_text(value: object) -> str:
+    """Lowercase and strip accents so 'Café' and 'cafe' index the same way."""
+    if value is None:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", str(value))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(value: object) -> List[str]:
+    return TOKEN_PATTERN.findall(normalize_text(value))
+
+
+class _TermIndex:
+    """Token -> {position: term frequency} postings, plus the vocabulary for fragment lookups."""
+
+    def __init__(self, documents: Iterable[object]) -> None:
+        postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        lengths: List[int] = []
+        for position, document in enumerate(documents):
+            tokens = tokenize(document)
+            lengths.append(len(tokens))
+            for token in tokens:
+                bucket = postings[token]
+                bucket[position] = bucket.get(position, 0) + 1
+        self.postings: Dict[str, Dict[int, int]] = dict(postings)
+        self.vocabulary: List[str] = sorted(self.postings)
+        self.lengths = lengths
+        self.avg_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+
+    def expand(self, fragment: str) -> List[str]:
+        """Vocabulary terms containing `fragment` anywhere (the vocabulary is far smaller than the catalog)."""
+        return [term for term in self.vocabulary if fragment in term]
+
+    def match(self, fragment: str) -> Set[int]:
+        matched: Set[int] = set()
+        for term in self.expand(fragment):
+            matched.update(self.postings[term])
+        return matched
+
+
+class SearchIndex:
+    """Inverted index over title and category with BM25 ranking.
+
+    Every query token must occur inside at least one token of the field, so
+    results include everything the original case-insensitive substring
+    filters returned ("light" still finds "Twilight"). Matches at the start
+    of a word score higher than matches inside one.
+    """
+
+    def __init__(self, titles: Sequence[object], categories: Sequence[object]) -> None:
+        self.size = len(titles)
+        self.titles = _TermIndex(titles)
+        self.categories = _TermIndex(categories)
+
+    def _idf(self, term: str) -> float:
+        doc_freq = len(self.titles.postings[term])
+        return math.log(1 + (self.size - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def rank_titles(self, query: str) -> Dict[int, float]:
+        """Return {position: BM25 score} for titles matching every token of `query`."""
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return {}
+
+        scores: Optional[Dict[int, float]] = None
+        avg_length = self.titles.avg_length or 1.0
+        for token in query_tokens:
+            token_scores: Dict[int, float] = {}
+            for term in self.titles.expand(token):
+                idf = self._idf(term) * (1.0 if term.startswith(token) else INNER_MATCH_WEIGHT)
+                for position, freq in self.titles.postings[term].items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self.titles.lengths[position] / avg_length)
+                    score = idf * freq * (BM25_K1 + 1) / (freq + norm)
+                    # A token can expand to several terms in one title; count the best one only.
+                    if score > token_scores.get(position, 0.0):
+                        token_scores[position] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {
+                    position: score + token_scores[position]
+                    for position, score in scores.items()
+                    if position in token_scores
+                }
+            if not scores:
+                return {}
+        return scores or {}
+
+    def match_categories(self, query: str) -> Set[int]:
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return set()
+        matched = self.categories.match(query_tokens[0])
+        for token in query_tokens[1:]:
+            matched &= self.categories.match(token)
+        return matched
+
+    def search(self, title: Optional[str] = None, category: Optional[str] = None) -> List[int]:
+        """Return matching positions, best title matches first (catalog order otherwise)."""
+        category_matches = self.match_categories(category) if category else None
+        if not title:
+            return sorted(category_matches) if category_matches is not None else list(range(self.size))
+
+        scores = self.rank_titles(title)
+        if category_matches is not None:
+            scores = {position: score for position, score in scores.items() if position in category_matches}
+        return sorted(scores, key=lambda position: (-scores[position], position))
@@ -0,0 +1,130 @@
+import os
+import zlib
+from functools import cached_property
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from api.services.search import tokenize
+
+SIMILAR_TITLE_BUCKETS = int(os.getenv("SIMILAR_TITLE_BUCKETS", "256"))
+# Neighbors precomputed per book (0 disables the table); requests for more fall back to a scan.
+SIMILAR_TABLE_WIDTH = int(os.getenv("SIMILAR_TABLE_WIDTH", "20"))
+# The table costs n x n dot products (~1.5 s at 10k books, ~40 s at 50k) on first use; past this
+# size a per-request scan (~7 ms at 50k books) is the better trade.
+SIMILAR_TABLE_MAX_BOOKS = int(os.getenv("SIMILAR_TABLE_MAX_BOOKS", "10000"))
+PRICE_BUCKETS = 10
+BLOCK_WEIGHTS = {"title": 1.0, "category": 0.8, "price": 0.4, "rating": 0.4}
+# Score-matrix elements per block while building the table (~64 MB of float32).
+TABLE_BLOCK_ELEMENTS = 16_000_000
+
+
+def hashed_token_counts(titles: Sequence[object], buckets: int) -> np.ndarray:
+    """Title token counts hashed into `buckets` columns (crc32, so stable across processes)."""
+    rows, columns = [], []
+    for row, title in enumerate(titles):
+        for token in tokenize(title):
+            rows.append(row)
+            columns.append(zlib.crc32(token.encode("utf-8")) % buckets)
+    counts = np.zeros((len(titles), buckets), dtype=np.float32)
+    np.add.at(counts, (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)), 1.0)
+    return counts
+
+
+def _l2_normalize(block: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(block, axis=1, keepdims=True)
+    return np.divide(block, norms, out=np.zeros_like(block), where=norms > 0)
+
+
+def _ordinal_one_hot(buckets: np.ndarray, size: int) -> np.ndarray:
+    """One-hot with half weight on the adjacent buckets, so nearby values still overlap."""
+    block = np.zeros((len(buckets), size), dtype=np.float32)
+    valid = np.flatnonzero(buckets >= 0)
+    for offset, weight in ((0, 1.0), (-1, 0.5), (1, 0.5)):
+        neighbor = buckets[valid] + offset
+        inside = (neighbor >= 0) & (neighbor < size)
+        block[valid[inside], neighbor[inside]] = weight
+    return block
+
+
+class SimilarityIndex:
+    """L2-normalized content vectors for "similar books", built once per catalog version.
+
+    Each book is TF-IDF over hashed title tokens, one-hot category, price
+    quantile bucket and rating, each block normalized and weighted by
+    `BLOCK_WEIGHTS`, so a dot product is a weighted cosine similarity.
+    """
+
+    def __init__(
+        self,
+        titles: Sequence[object],
+        categories: Sequence[object],
+        prices: np.ndarray,
+        ratings: np.ndarray,
+        title_buckets: int = SIMILAR_TITLE_BUCKETS,
+        table_width: int = SIMILAR_TABLE_WIDTH,
+    ) -> None:
+        self.table_width = table_width
+        counts = hashed_token_counts(titles, title_buckets)
+        document_frequency = (counts > 0).sum(axis=0)
+        idf = np.log((1 + len(counts)) / (1 + document_frequency)) + 1
+        title_block = _l2_normalize(counts * idf.astype(np.float32))
+
+        codes, uniques = pd.factorize(pd.Series(categories, dtype=object))
+        category_block = np.zeros((len(codes), len(uniques)), dtype=np.float32)
+        known = codes >= 0
+        category_block[np.flatnonzero(known), codes[known]] = 1.0
+
+        prices = np.asarray(prices, dtype=np.float64)
+        price_buckets = np.full(len(prices), -1)
+        if np.isfinite(prices).any():
+            edges = np.nanquantile(prices, np.linspace(0, 1, PRICE_BUCKETS + 1)[1:-1])
+            finite = np.isfinite(prices)
+            price_buckets[finite] = np.searchsorted(edges, prices[finite], side="right")
+        ratings = np.nan_to_num(np.asarray(ratings, dtype=np.float64)).astype(np.intp)
+        blocks = {
+            "title": title_block,
+            "category": category_block,
+            "price": _l2_normalize(_ordinal_one_hot(price_buckets, PRICE_BUCKETS)),
+            "rating": _l2_normalize(_ordinal_one_hot(np.where(ratings > 0, ratings - 1, -1), 5)),
+        }
+        self.vectors = _l2_normalize(
+            np.hstack([block * np.float32(np.sqrt(BLOCK_WEIGHTS[name])) for name, block in blocks.items()])
+        )
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def _top_k(self, positions: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Best `k` neighbors of each row in `positions` (itself excluded), best first."""
+        scores = self.vectors[positions] @ self.vectors.T
+        scores[np.arange(len(positions)), positions] = -np.inf
+        k = min(k, len(self) - 1)
+        if k <= 0:
+            return np.empty((len(positions), 0), dtype=np.intp), np.empty((len(positions), 0), dtype=np.float32)
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        # Best score first; ties go to the earlier book so results are stable.
+        order = np.lexsort((candidates, -candidate_scores), axis=1)
+        return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(candidate_scores, order, axis=1)
+
+    @cached_property
+    def neighbor_table(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(positions, scores) of each book's `table_width` nearest neighbors, or None if disabled."""
+        if not self.table_width or not len(self) or len(self) > SIMILAR_TABLE_MAX_BOOKS:
+            return None
+        block = max(1, TABLE_BLOCK_ELEMENTS // len(self))
+        parts = [
+            self._top_k(np.arange(start, min(start + block, len(self))), self.table_width)
+            for start in range(0, len(self), block)
+        ]
+        return np.vstack([p for p, _ in parts]), np.vstack([s for _, s in parts])
+
+    def similar(self, position: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions and cosine scores of the `k` books most similar to `position`."""
+        table = self.neighbor_table if k <= self.table_width else None
+        if table is not None:
+            return table[0][position, :k], table[1][position, :k]
+        positions, scores = self._top_k(np.array([position]), k)
+        return positions[0], scores[0]
@@ -0,0 +1,147 @@
+import io
+import mmap
+import os
+from pathlib import Path
+from typing import Dict, Optional, Protocol, Union
+
+import pandas as pd
+
+from api.services import insights
+from api.services.normalization import nulls_to_none
+
+
+class CatalogStorage(Protocol):
+    """How a catalog file is turned into the cleaned, typed books DataFrame."""
+
+    name: str
+    # True if `read` can work straight off a read-only memory map of the file.
+    memory_mapped: bool
+
+    def read(self, path: Path, content: Optional[bytes] = None) -> pd.DataFrame:
+        ...
+
+    def write(self, df: pd.DataFrame, path: Path) -> None:
+        ...
+
+
+class CsvStorage:
+    """Scraper output: mojibake prices and word ratings, cleaned on every read."""
+
+    name = "csv"
+    memory_mapped = False
+
+    def read(self, path: Path, content: Optional[bytes] = None) -> pd.DataFrame:
+        return insights.load_books_dataframe(io.BytesIO(content) if content is not None else path)
+
+    def write(self, df: pd.DataFrame, path: Path) -> None:
+        df.to_csv(path, index=False)
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError as exc:  # pragma: no cover - pyarrow ships with the pinned requirements
+        raise RuntimeError("Columnar catalog storage requires pyarrow (pip install pyarrow)") from exc
+    return pyarrow
+
+
+def _typed(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast numeric columns to real dtypes; the CSV loader may leave them as object-with-None."""
+    typed = df.copy()
+    typed["id"] = pd.to_numeric(typed["id"], errors="coerce").astype("int64")
+    typed["price"] = pd.to_numeric(typed["price"], errors="coerce").astype("float64")
+    typed["rating"] = pd.to_numeric(typed["rating"], errors="coerce").fillna(0).astype("int64")
+    return typed
+
+
+def _from_arrow(table) -> pd.DataFrame:
+    # split_blocks lets null-free numeric columns stay views over the (memory-mapped) Arrow buffers.
+    df = table.to_pandas(split_blocks=True)
+    columns = insights.DEFAULT_COLUMNS + [col for col in df.columns if col not in insights.DEFAULT_COLUMNS]
+    # Reordering copies every column, so only do it for files written by something else.
+    df = df if list(df.columns) == columns else df[columns]
+    # Missing values as None, like the CSV path; columns without nulls are left as they are.
+    return nulls_to_none(df)
+
+
+class FeatherStorage:
+    """Uncompressed Arrow IPC file, memory-mapped so every worker shares the page cache."""
+
+    name = "feather"
+    memory_mapped = True
+
+    def read(self, path: Path, content: Optional[Union[bytes, mmap.mmap]] = None) -> pd.DataFrame:
+        pa = _pyarrow()
+        if content is not None:
+            # Zero-copy over the caller's mapping (see `map_file`): the same bytes that were hashed.
+            return _from_arrow(pa.ipc.open_file(pa.py_buffer(content)).read_all())
+        return _from_arrow(pa.feather.read_table(str(path), memory_map=True))
+
+    def write(self, df: pd.DataFrame, path: Path) -> None:
+        pa = _pyarrow()
+        pa.feather.write_feather(_typed(df), str(path), compression="uncompressed")
+
+
+class ParquetStorage:
+    """Compressed columnar file; smaller on disk, decoded (not mapped) on read."""
+
+    name = "parquet"
+    memory_mapped = False
+
+    def read(self, path: Path, content: Optional[bytes] = None) -> pd.DataFrame:
+        pa = _pyarrow()
+        if content is not None:
+            # Decode the bytes that were hashed, not whatever the path points to by now.
+            return _from_arrow(pa.parquet.read_table(pa.BufferReader(content)))
+        return _from_arrow(pa.parquet.read_table(str(path), memory_map=True))
+
+    def write(self, df: pd.DataFrame, path: Path) -> None:
+        pa = _pyarrow()
+        pa.parquet.write_table(pa.Table.from_pandas(_typed(df), preserve_index=False), str(path))
+
+
+STORAGES: Dict[str, CatalogStorage] = {
+    ".csv": CsvStorage(),
+    ".feather": FeatherStorage(),
+    ".arrow": FeatherStorage(),
+    ".parquet": ParquetStorage(),
+}
+
+
+def storage_for(path: Path) -> CatalogStorage:
+    try:
+        return STORAGES[Path(path).suffix.lower()]
+    except KeyError:
+        raise ValueError(f"Unsupported catalog format: {path}") from None
+
+
+def convert_catalog(source: Path, destination: Path) -> pd.DataFrame:
+    """Import `source` (usually the scraper's CSV) and persist it cleaned and typed at `destination`."""
+    df = storage_for(source).read(Path(source))
+    storage_for(destination).write(df, Path(destination))
+    return df
+
+
+def map_file(path: Path) -> Union[bytes, mmap.mmap]:
+    """Read-only memory map of `path`; pages come from the shared page cache, not the heap."""
+    with open(path, "rb") as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            return b""  # empty files cannot be mapped
+        return mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def publish_catalog(source: Path, destination: Path) -> pd.DataFrame:
+    """`convert_catalog` through a temporary file and a rename.
+
+    Readers that have the previous file mapped keep their (now unlinked)
+    copy; new readers only ever see a complete file.
+    """
+    destination = Path(destination)
+    df = storage_for(source).read(Path(source))
+    temporary = destination.with_name(f".{destination.name}.{os.getpid()}.tmp")
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    storage_for(destination).write(df, temporary)
+    os.replace(temporary, destination)
+    return df
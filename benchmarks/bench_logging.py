@@ -0,0 +1,119 @@
+"""Per-request overhead of the request logging middleware.
+
+Usage: python benchmarks/bench_logging.py [--requests 5000] [--concurrency 32]
+
+Drives a one-route Starlette app over httpx's ASGI transport several ways: no
+logging middleware, the previous `BaseHTTPMiddleware` version (json.dumps plus
+a synchronous stdout handler on the event loop), and the current pure-ASGI
+middleware shipping records through a queue (all and 10% sampled). Log output goes to /dev/null so
+only the server-side cost is measured; the difference from the bare app is
+the middleware's overhead.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx  # noqa: E402
+from starlette.applications import Starlette  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.responses import PlainTextResponse  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+from api.middleware.logging import (  # noqa: E402
+    JSONMessageFormatter,
+    RequestLoggingMiddleware,
+    start_log_listener,
+    stop_log_listener,
+)
+
+
+class LegacyRequestLoggingMiddleware(BaseHTTPMiddleware):
+    """The middleware as it was before the rewrite, kept here as the baseline."""
+
+    def __init__(self, app, log):
+        super().__init__(app)
+        self.log = log
+
+    async def dispatch(self, request, call_next):
+        start_time = time.perf_counter()
+        response = await call_next(request)
+        self.log.info(
+            json.dumps(
+                {
+                    "event": "request_completed",
+                    "method": request.method,
+                    "path": request.url.path,
+                    "status_code": response.status_code,
+                    "client_ip": request.client.host if request.client else None,
+                    "duration_ms": round((time.perf_counter() - start_time) * 1000, 2),
+                }
+            )
+        )
+        return response
+
+
+def make_app():
+    async def ok(request):
+        return PlainTextResponse("ok")
+
+    return Starlette(routes=[Route("/ok", ok)])
+
+
+async def drive(app, requests, concurrency):
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one(_):
+            async with semaphore:
+                await client.get("/ok")
+
+        await asyncio.gather(*(one(i) for i in range(200)))  # warm-up
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    devnull = open(os.devnull, "w")
+    legacy_logger = logging.getLogger("bench.legacy")
+    legacy_logger.addHandler(logging.StreamHandler(devnull))
+    legacy_logger.setLevel(logging.INFO)
+    legacy_logger.propagate = False
+
+    queued_target = logging.StreamHandler(devnull)
+    queued_target.setFormatter(JSONMessageFormatter("%(message)s"))
+    listener = start_log_listener(queued_target)
+
+    variants = {
+        "no logging middleware": make_app(),
+        "BaseHTTPMiddleware (before)": LegacyRequestLoggingMiddleware(make_app(), legacy_logger),
+        "pure ASGI + queue": RequestLoggingMiddleware(make_app(), sample_rate=1.0),
+        "pure ASGI + queue, 10% sampled": RequestLoggingMiddleware(make_app(), sample_rate=0.1),
+    }
+    baseline = None
+    for name, app in variants.items():
+        elapsed = asyncio.run(drive(app, args.requests, args.concurrency))
+        per_request = elapsed / args.requests * 1e6
+        baseline = per_request if baseline is None else baseline
+        print(
+            f"{name:32s} {args.requests / elapsed:8.0f} req/s  {per_request:7.1f} us/req  "
+            f"overhead {per_request - baseline:+7.1f} us/req"
+        )
+    stop_log_listener(listener)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Per-load cost of price/rating normalization: legacy row-wise path vs. api.services.normalization.
+
+Usage: python benchmarks/bench_normalization.py [--sizes 1000 100000 1000000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pandas as pd  # noqa: E402
+
+from api.services.normalization import RATING_MAP, normalize_price, normalize_rating  # noqa: E402
+from benchmarks.synthetic import generate_raw_catalog  # noqa: E402
+
+
+def legacy(df: pd.DataFrame) -> None:
+    cleaned_price = (
+        df["price"]
+        .astype(str)
+        .str.replace(r"[^\d.,-]", "", regex=True)
+        .str.replace(",", ".", regex=False)
+    )
+    pd.to_numeric(cleaned_price, errors="coerce")
+    rating = df["rating"].apply(lambda r: RATING_MAP.get(str(r), r))
+    pd.to_numeric(rating, errors="coerce").fillna(0).astype(int)
+
+
+def vectorized(df: pd.DataFrame) -> None:
+    normalize_price(df["price"])
+    normalize_rating(df["rating"])
+
+
+def best_of(fn, df: pd.DataFrame, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'legacy ms':>12} {'vectorized ms':>14} {'speed-up':>9}")
+    for rows in args.sizes:
+        df = generate_raw_catalog(rows)
+        old = best_of(legacy, df, args.repeat)
+        new = best_of(vectorized, df, args.repeat)
+        print(f"{rows:>10} {old * 1000:>12.2f} {new * 1000:>14.2f} {old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
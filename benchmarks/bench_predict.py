@@ -0,0 +1,103 @@
+"""Latency/throughput of POST /ml/predict, with and without micro-batching.
+
+Usage: python benchmarks/bench_predict.py [--requests 2000] [--concurrency 64] [--ids 1]
+
+Part 1 calls the model directly: one matrix multiply per request versus
+concurrent requests coalesced by `MicroBatcher`. Part 2 drives the whole app
+in-process over httpx's ASGI transport (no sockets, so it measures the
+server-side stack, not the network).
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+
+from api.core.security import create_access_token  # noqa: E402
+from api.services.batching import MicroBatcher  # noqa: E402
+from api.services.ml_data import feature_matrix  # noqa: E402
+from api.services.price_model import get_price_model  # noqa: E402
+
+
+def percentiles(latencies):
+    ordered = sorted(latencies)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000  # noqa: E731
+    return f"p50 {pick(0.50):.2f} ms  p95 {pick(0.95):.2f} ms  p99 {pick(0.99):.2f} ms"
+
+
+async def drive(call, requests, concurrency):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index):
+        async with semaphore:
+            started = time.perf_counter()
+            await call(index)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    return latencies, time.perf_counter() - started
+
+
+async def bench_model(args):
+    model = get_price_model()
+    rows = model.align(feature_matrix().features, feature_matrix().schema)
+    samples = [rows[np.arange(i, i + args.ids) % len(rows)] for i in range(args.requests)]
+
+    async def unbatched(index):
+        model.predict(samples[index])
+        await asyncio.sleep(0)
+
+    batcher = MicroBatcher(model.predict)
+
+    async def batched(index):
+        await batcher.submit(samples[index])
+
+    for label, call in (("per-request predict", unbatched), ("micro-batched", batched)):
+        latencies, elapsed = await drive(call, args.requests, args.concurrency)
+        print(f"{label:22s} {args.requests / elapsed:10.0f} req/s  {percentiles(latencies)}")
+    await batcher.close()
+    print(f"{'':22s} mean batch: {batcher.stats()['mean_batch_rows']} rows")
+
+
+async def bench_http(args):
+    from api.main import app
+
+    headers = {"Authorization": f"Bearer {create_access_token('bench')}"}
+    ids = list(range(args.ids))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/api/v1/ml/predict", json={"book_ids": ids}, headers=headers)  # warm-up
+
+        async def call(index):
+            response = await client.post("/api/v1/ml/predict", json={"book_ids": ids}, headers=headers)
+            response.raise_for_status()
+
+        latencies, elapsed = await drive(call, args.requests, args.concurrency)
+    print(f"{'HTTP /ml/predict':22s} {args.requests / elapsed:10.0f} req/s  {percentiles(latencies)}")
+    print(f"{'':22s} mean latency {statistics.mean(latencies) * 1000:.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--ids", type=int, default=1, help="books scored per request")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f"requests: {args.requests}, concurrency: {args.concurrency}, rows per request: {args.ids}")
+    asyncio.run(bench_model(args))
+    asyncio.run(bench_http(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Throughput of `scripts/serve.py` as the number of workers grows.
+
+Usage: python benchmarks/bench_workers.py [--workers 1 2 4] [--clients 4] [--seconds 10]
+
+Starts the server for each worker count on a local port and loads it over
+real sockets from `--clients` separate processes (one client process can
+saturate before the server does). Clients share the machine with the server,
+so leave them enough cores: scaling is only meaningful while
+workers + clients <= available cores.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import httpx  # noqa: E402
+
+from api.core.security import create_access_token  # noqa: E402
+
+PATHS = ["/api/v1/books?limit=20", "/api/v1/books/1", "/api/v1/stats/overview", "/api/v1/categories"]
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def wait_until_up(base_url, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/api/v1/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def client_loop(base_url, token, seconds, concurrency):
+    headers = {"Authorization": f"Bearer {token}"}
+    deadline = time.monotonic() + seconds
+    completed = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits) as client:
+
+        async def worker(offset):
+            nonlocal completed
+            index = offset
+            while time.monotonic() < deadline:
+                response = await client.get(PATHS[index % len(PATHS)])
+                response.raise_for_status()
+                completed += 1
+                index += 1
+
+        await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+    return completed
+
+
+def run_client(base_url, token, seconds, concurrency, results):
+    results.put(asyncio.run(client_loop(base_url, token, seconds, concurrency)))
+
+
+def measure(workers, clients, seconds, concurrency):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {**os.environ, "LOG_SAMPLE_RATE": "0"}
+    server = subprocess.Popen(
+        [sys.executable, str(ROOT / "scripts" / "serve.py"), "--workers", str(workers), "--port", str(port)],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_up(base_url)
+        token = create_access_token("bench")
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=run_client, args=(base_url, token, seconds, concurrency, results))
+            for _ in range(clients)
+        ]
+        for process in processes:
+            process.start()
+        total = sum(results.get() for _ in processes)
+        for process in processes:
+            process.join()
+        return total / seconds
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=16, help="in-flight requests per client")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"cores available: {len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()}")
+    baseline = None
+    for workers in args.workers:
+        throughput = measure(workers, args.clients, args.seconds, args.concurrency)
+        baseline = baseline or throughput
+        print(f"workers={workers:<3d} {throughput:8.0f} req/s  speedup x{throughput / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""Reproducible performance suite: micro-benchmarks plus in-process HTTP load tests.
+
+Usage:
+    python benchmarks/suite.py [--sizes 1000 100000 1000000] [--http-rows 100000]
+                               [--output results.json] [--baseline baseline.json]
+    python benchmarks/suite.py --compare results.json baseline.json
+
+Catalogs come from `benchmarks/synthetic.py` (same seed, same data) and are
+cached as CSV under `benchmarks/.data/`. Micro-benchmarks time the service
+functions on each size; load tests drive the whole app over httpx's ASGI
+transport (no sockets) and report p50/p95/p99 latency and requests/second.
+Results are written as JSON. With `--baseline`, every metric is compared to
+the baseline file and the run exits with status 1 if any got worse by more
+than `--threshold`.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from benchmarks.synthetic import SIZES, TITLE_WORDS, write_catalog_csv  # noqa: E402
+
+DATA_DIR = ROOT / "benchmarks" / ".data"
+DEFAULT_THRESHOLD = 0.2
+# metric -> True when a larger value is better. Micro-benchmarks compare the fastest run, which is
+# far less sensitive to background noise than the median.
+COMPARED_METRICS = {"min_ms": False, "p95_ms": False, "rps": True}
+
+
+def catalog_file(rows: int, seed: int) -> Path:
+    return write_catalog_csv(DATA_DIR / f"books-{rows}-seed{seed}.csv", rows, seed)
+
+
+def use_catalog(path: Path) -> None:
+    """Point the API's catalog at `path` and load it."""
+    from api.services import insights
+    from api.services.catalog import catalog
+
+    insights.BOOKS_CSV_PATH = path
+    insights.BOOKS_DATA_PATH = None
+    catalog.refresh(force=True)
+
+
+def time_call(fn: Callable[[], object], repeat: int, budget: float, min_sample: float = 0.05) -> Dict[str, float]:
+    """Per-call time of `fn` over up to `repeat` samples, stopping early (after at least 3) past `budget` seconds.
+
+    Fast functions are looped within a sample until it lasts `min_sample`
+    seconds, like `timeit.Timer.autorange`, so timer resolution and
+    scheduling jitter do not dominate.
+    """
+    start = time.perf_counter()
+    fn()
+    first = time.perf_counter() - start
+    loops = max(1, int(min_sample / first)) if first > 0 else 1
+    timings: List[float] = [] if loops > 1 else [first * 1000]
+    spent = first
+    while len(timings) < repeat and (len(timings) < min(3, repeat) or spent < budget):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed / loops * 1000)
+        spent += elapsed
+    return {
+        "median_ms": round(statistics.median(timings), 4),
+        "min_ms": round(min(timings), 4),
+        "runs": len(timings) * loops,
+    }
+
+
+def run_micro(sizes: List[int], seed: int, repeat: int, budget: float) -> Dict[str, Dict[str, float]]:
+    from fastapi import Response
+
+    from api.routes.books import search_books
+    from api.services import insights
+    from api.services.aggregates import StatsAggregates
+    from api.services.catalog import get_catalog
+    from api.services.search import SearchIndex
+
+    rng = np.random.default_rng(seed)
+    words = TITLE_WORDS[rng.integers(0, len(TITLE_WORDS), 64)].tolist()
+    results: Dict[str, Dict[str, float]] = {}
+    for rows in sizes:
+        path = catalog_file(rows, seed)
+        df = insights.load_books_dataframe(path)
+        word_cycle = itertools.cycle(words)
+        # A reload that repriced 0.1% of the books: incremental stats vs. a full rebuild.
+        edited = df.copy()
+        repriced = rng.choice(rows, max(1, rows // 1000), replace=False)
+        edited.loc[repriced, "price"] = edited.loc[repriced, "price"] + 1.0
+        # Applying "no changes" once records the row hashes, as after any previous reload.
+        aggregates = StatsAggregates.from_dataframe(df).apply_changes(df, df)
+
+        def search() -> object:
+            return search_books(
+                Response(), title=next(word_cycle), category=None, min_price=None, max_price=None,
+                min_rating=None, skip=0, limit=100, sort=None,
+            )
+
+        cases = {
+            "load_books_dataframe": lambda: insights.load_books_dataframe(path),
+            "compute_categories_stats": lambda: insights.compute_categories_stats(df),
+            "get_top_rated_books": lambda: insights.get_top_rated_books(df, 10),
+            "filter_books_by_price": lambda: insights.filter_books_by_price(df, 20.0, 21.0),
+            "stats_rebuild": lambda: StatsAggregates.from_dataframe(edited),
+            "stats_apply_changes": lambda: aggregates.apply_changes(df, edited),
+        }
+        for name, fn in cases.items():
+            results[f"micro.{name}[{rows}]"] = time_call(fn, repeat, budget)
+
+        # What the first search after each reload pays.
+        titles, categories = df["title"].tolist(), df["category"].tolist()
+        results[f"micro.search_index_build[{rows}]"] = time_call(
+            lambda: SearchIndex(titles, categories), repeat, budget
+        )
+        use_catalog(path)
+        get_catalog().search_index
+        results[f"micro.search_books[{rows}]"] = time_call(search, repeat, budget)
+        for name in [*cases, "search_index_build", "search_books"]:
+            print(f"  {name:28s} {rows:>9d} rows  {results[f'micro.{name}[{rows}]']['median_ms']:10.3f} ms")
+    return results
+
+
+def http_scenarios(rows: int, seed: int) -> Dict[str, Callable[[int], str]]:
+    """Name -> path for the i-th request; parameters are drawn from a seeded stream."""
+    rng = np.random.default_rng(seed)
+    ids = rng.integers(0, rows, 100_000).tolist()
+    prices = rng.uniform(10, 59, 100_000).round(2).tolist()
+    words = TITLE_WORDS[rng.integers(0, len(TITLE_WORDS), 100_000)].tolist()
+    size = len(ids)
+    return {
+        "health": lambda i: "/api/v1/health",
+        "books_page": lambda i: f"/api/v1/books?skip={ids[i % size] % max(1, rows - 50)}&limit=50",
+        "book_by_id": lambda i: f"/api/v1/books/{ids[i % size]}",
+        "search_title": lambda i: f"/api/v1/books/search?title={words[i % size]}&limit=20",
+        "price_range": lambda i: (
+            f"/api/v1/books/price-range?min={prices[i % size]}&max={prices[i % size] + 0.5}&limit=50"
+        ),
+        "top_rated": lambda i: "/api/v1/books/top-rated?limit=10",
+        "stats_overview": lambda i: "/api/v1/stats/overview",
+        "stats_categories": lambda i: "/api/v1/stats/categories",
+    }
+
+
+def latency_summary(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    ordered = np.sort(np.asarray(latencies)) * 1000
+    p50, p95, p99 = np.percentile(ordered, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+    }
+
+
+async def drive(client, path_for: Callable[[int], str], requests: int, concurrency: int) -> Dict[str, float]:
+    latencies: List[float] = []
+
+    async def worker(indexes) -> None:
+        for index in indexes:
+            start = time.perf_counter()
+            response = await client.get(path_for(index))
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise RuntimeError(f"{path_for(index)} -> {response.status_code}")
+
+    # Warm-up: the first requests load the catalog and build the derived indexes.
+    warm_up = iter(range(min(requests, 2 * concurrency)))
+    await asyncio.gather(*(worker(warm_up) for _ in range(concurrency)))
+    latencies.clear()
+    measured = iter(range(requests))
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(measured) for _ in range(concurrency)))
+    return latency_summary(latencies, time.perf_counter() - start)
+
+
+def run_http(
+    rows: int, seed: int, requests: int, concurrency: int, response_cache: bool = False
+) -> Dict[str, Dict[str, float]]:
+    import httpx
+
+    from api.core.security import create_access_token
+    from api.main import app
+    from api.middleware import response_cache as response_cache_module
+
+    # Off by default: with a few hundred distinct URLs the cache would answer most requests.
+    response_cache_module.RESPONSE_CACHE_ENABLED = response_cache
+    use_catalog(catalog_file(rows, seed))
+    logging.disable(logging.CRITICAL)  # measure the server, not the log sink
+    headers = {"Authorization": f"Bearer {create_access_token('benchmark')}"}
+    results: Dict[str, Dict[str, float]] = {}
+
+    async def scenario_run() -> None:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+            for name, path_for in http_scenarios(rows, seed).items():
+                summary = await drive(client, path_for, requests, concurrency)
+                results[f"http.{name}[{rows}]"] = {**summary, "concurrency": concurrency}
+                print(
+                    f"  {name:20s} {summary['rps']:9.1f} req/s  p50 {summary['p50_ms']:8.2f} ms  "
+                    f"p95 {summary['p95_ms']:8.2f} ms  p99 {summary['p99_ms']:8.2f} ms"
+                )
+
+    try:
+        asyncio.run(scenario_run())
+    finally:
+        logging.disable(logging.NOTSET)
+    return results
+
+
+def environment(seed: int) -> Dict[str, object]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "seed": seed,
+    }
+
+
+def compare(current: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[Dict[str, object]]:
+    """One row per metric present in both runs; `regression` is set when it got worse by > threshold."""
+    rows = []
+    for name in sorted(set(current) & set(baseline)):
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            if metric not in current[name] or not baseline[name].get(metric):
+                continue
+            before, after = baseline[name][metric], current[name][metric]
+            change = (after - before) / before
+            worse = -change if higher_is_better else change
+            rows.append(
+                {
+                    "benchmark": name,
+                    "metric": metric,
+                    "baseline": before,
+                    "current": after,
+                    "change": round(change, 4),
+                    "regression": worse > threshold,
+                }
+            )
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, object]], threshold: float) -> int:
+    regressions = [row for row in rows if row["regression"]]
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(
+            f"  {row['benchmark']:42s} {row['metric']:10s} {row['baseline']:>12.3f} -> {row['current']:>12.3f}"
+            f"  {row['change']:+7.1%}  {flag}"
+        )
+    print(f"{len(regressions)} regression(s) beyond {threshold:.0%} in {len(rows)} compared metrics")
+    return 1 if regressions else 0
+
+
+def load_results(path: Path) -> Dict[str, Dict]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+# Differences here make a comparison unreliable, so they are called out before the table.
+COMPARABLE_SETTINGS = ("cpus", "python", "numpy", "pandas", "seed", "response_cache")
+
+
+def compare_runs(current: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> int:
+    for setting in COMPARABLE_SETTINGS:
+        now, before = current["environment"].get(setting), baseline["environment"].get(setting)
+        if now != before:
+            print(f"warning: {setting} differs from the baseline ({before!r} -> {now!r})")
+    return print_comparison(compare(current["benchmarks"], baseline["benchmarks"], threshold), threshold)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(SIZES), help="micro-benchmark catalog sizes")
+    parser.add_argument("--http-rows", type=int, default=100_000, help="catalog size for load tests (0 skips)")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per load-test scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--response-cache", action="store_true", help="keep the response cache on in load tests")
+    parser.add_argument("--repeat", type=int, default=7, help="max runs per micro-benchmark")
+    parser.add_argument("--budget", type=float, default=5.0, help="seconds per micro-benchmark before stopping early")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=ROOT / "benchmarks" / "results.json")
+    parser.add_argument("--baseline", type=Path, help="compare against this results file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown (0.2 = 20%%)")
+    parser.add_argument("--compare", type=Path, nargs=2, metavar=("CURRENT", "BASELINE"), help="only compare")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        current, baseline = (load_results(path) for path in args.compare)
+        return compare_runs(current, baseline, args.threshold)
+
+    results: Dict[str, Dict[str, float]] = {}
+    if args.sizes:
+        print("micro-benchmarks")
+        results.update(run_micro(args.sizes, args.seed, args.repeat, args.budget))
+    if args.http_rows:
+        print(f"load tests ({args.http_rows} books, {args.requests} requests x {args.concurrency} concurrent)")
+        results.update(
+            run_http(args.http_rows, args.seed, args.requests, args.concurrency, args.response_cache)
+        )
+
+    payload = {
+        "environment": {**environment(args.seed), "response_cache": args.response_cache},
+        "benchmarks": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+    print(f"wrote {args.output}")
+
+    if args.baseline:
+        return compare_runs(payload, load_results(args.baseline), args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
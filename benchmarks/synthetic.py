@@ -0,0 +1,98 @@
+"""Deterministic synthetic catalogs shaped like the scraper's `data/books.csv`.
+
+Same seed and size, same bytes: categories follow the real site's skew, and
+prices, ratings and titles carry the encoding artifacts the loader has to
+clean ("Â£45.17", "Noahâ\x80\x99s", lowercase rating words).
+"""
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+SIZES = (1_000, 100_000, 1_000_000)
+RATING_WORDS = np.array(["One", "Two", "Three", "Four", "Five"])
+# Category -> number of books on books.toscrape.com (1,000 books), used as sampling weights.
+CATEGORY_WEIGHTS = {
+    "Default": 152, "Nonfiction": 110, "Sequential Art": 75, "Add a comment": 67, "Fiction": 65,
+    "Young Adult": 54, "Fantasy": 48, "Romance": 35, "Mystery": 32, "Food and Drink": 30,
+    "Childrens": 29, "Historical Fiction": 26, "Classics": 19, "Poetry": 19, "History": 18,
+    "Womens Fiction": 17, "Horror": 17, "Science Fiction": 16, "Science": 14, "Music": 13,
+    "Business": 12, "Travel": 11, "Philosophy": 11, "Thriller": 11, "Humor": 10,
+    "Autobiography": 9, "Art": 8, "Religion": 7, "Psychology": 7, "Christian Fiction": 6,
+    "Spirituality": 6, "New Adult": 6, "Sports and Games": 5, "Biography": 5, "Self Help": 5,
+    "Health": 4, "Politics": 3, "Contemporary": 3, "Christian": 3, "Historical": 2,
+    "Paranormal": 1, "Parenting": 1, "Adult Fiction": 1, "Academic": 1, "Short Stories": 1,
+    "Suspense": 1, "Novels": 1, "Cultural": 1, "Erotica": 1, "Crime": 1,
+}
+CATEGORIES = np.array(list(CATEGORY_WEIGHTS))
+TITLE_WORDS = np.array(
+    """the a of and in to my love night house girl dark light secret last world life city
+    time story war king queen blood moon star sea river garden lost little book road heart
+    shadow fire summer winter home journey history guide art kitchen music dream child
+    mountain island family stranger empire ghost murder letters song wild silent red black
+    golden hidden broken beautiful great first new other modern complete american english""".split()
+)
+# UTF-8 punctuation read back as Latin-1, as in the scraped titles.
+MOJIBAKE = np.array(["Noahâ\x80\x99s", "CafÃ©", "â\x80\x9cBÃ¡nâ\x80\x9d", "Worldâ\x80\x99s"])
+MOJIBAKE_RATE = 0.01
+SERIES_RATE = 0.1
+ALTERNATE_FORMAT_RATE = 0.002
+OUT_OF_STOCK_RATE = 0.03
+
+
+def _titles(rng: np.random.Generator, rows: int) -> list:
+    vocabulary = TITLE_WORDS.tolist() + MOJIBAKE.tolist()
+    lengths = rng.integers(1, 8, rows)
+    words = rng.integers(0, len(TITLE_WORDS), (rows, 7))
+    mojibake = np.flatnonzero(rng.random(rows) < MOJIBAKE_RATE)
+    words[mojibake, rng.integers(0, 7, len(mojibake))] = len(TITLE_WORDS) + rng.integers(
+        0, len(MOJIBAKE), len(mojibake)
+    )
+    series = (rng.random(rows) < SERIES_RATE).tolist()
+    volumes = rng.integers(1, 9, rows).tolist()
+    titles = []
+    for row_words, length, in_series, volume in zip(words.tolist(), lengths.tolist(), series, volumes):
+        title = " ".join([vocabulary[word] for word in row_words[: length + 1]]).capitalize()
+        if in_series:
+            title = f"{title} ({vocabulary[row_words[0]].capitalize()} Saga #{volume})"
+        titles.append(title)
+    return titles
+
+
+def generate_raw_catalog(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Raw rows as scraped: mojibake prices ('Â£45.17') and rating words."""
+    rng = np.random.default_rng(seed)
+    weights = np.array(list(CATEGORY_WEIGHTS.values()), dtype=float)
+    prices = rng.uniform(10, 60, rows).round(2)
+    price_text = np.char.add("Â£", np.char.mod("%.2f", prices)).astype(object)
+    # A few prices as other scrapes have produced them: decimal comma, plain number.
+    alternate = np.flatnonzero(rng.random(rows) < ALTERNATE_FORMAT_RATE)
+    price_text[alternate] = [f"£{value:.2f}".replace(".", ",") for value in prices[alternate]]
+    ratings = RATING_WORDS[rng.integers(0, 5, rows)].astype(object)
+    lowercase = np.flatnonzero(rng.random(rows) < ALTERNATE_FORMAT_RATE)
+    ratings[lowercase] = [word.lower() for word in ratings[lowercase]]
+    slugs = [f"book-{index}_{index + 1}" for index in range(rows)]
+    return pd.DataFrame(
+        {
+            "id": np.arange(rows),
+            "title": _titles(rng, rows),
+            "price": price_text,
+            "rating": ratings,
+            "availability": np.where(rng.random(rows) < OUT_OF_STOCK_RATE, "Out of stock", "In stock"),
+            "category": CATEGORIES[rng.choice(len(CATEGORIES), rows, p=weights / weights.sum())],
+            "link": [f"https://books.toscrape.com/catalogue/{slug}/index.html" for slug in slugs],
+            "image": [f"https://books.toscrape.com/media/cache/{index:032x}.jpg" for index in range(rows)],
+        }
+    )
+
+
+def write_catalog_csv(path: Union[str, Path], rows: int, seed: int = 0) -> Path:
+    """Write a synthetic catalog in the scraper's CSV layout (skipped if already there)."""
+    path = Path(path)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f".{path.name}.tmp")
+        generate_raw_catalog(rows, seed).to_csv(temporary, index=False)
+        temporary.replace(path)
+    return path
@@ -0,0 +1,22 @@
+"""Importa o CSV do scraper e grava o catálogo limpo em formato colunar.
+
+Uso:
+    python scripts/build_catalog.py [origem.csv] [destino.feather|.arrow|.parquet]
+
+Depois aponte a API para o arquivo gerado com `BOOKS_DATA_PATH=data/books.feather`.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from api.services.storage import convert_catalog  # noqa: E402
+
+
+def run(source: str = "data/books.csv", destination: str = "data/books.feather") -> None:
+    df = convert_catalog(Path(source), Path(destination))
+    print(f"Saved {len(df)} books to {destination}")
+
+
+if __name__ == "__main__":
+    run(*sys.argv[1:3])
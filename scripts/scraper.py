@@ -1,83 +1,461 @@
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-from bs4 import BeautifulSoup
-import pandas as pd
-from urllib.parse import urljoin
+import argparse
+import asyncio
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import sys
 import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+import numpy as np
+import pandas as pd
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from api.services.normalization import normalize_books  # noqa: E402
 
 BASE = "https://books.toscrape.com/"
-CATALOGUE = urljoin(BASE, "catalogue/")
-
-session = requests.Session()
-session.headers.update({"User-Agent": "Mozilla/5.0"})
-retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
-session.mount("https://", HTTPAdapter(max_retries=retries))
-session.mount("http://", HTTPAdapter(max_retries=retries))
-
-def get_soup(url: str) -> BeautifulSoup:
-    try:
-        r = session.get(url, timeout=30)
-        r.raise_for_status()
-        return BeautifulSoup(r.text, "html.parser")
-    except requests.exceptions.SSLError:
-        # fallback p/ http se houver problema de certificado
-        url_http = url.replace("https://", "http://", 1)
-        r = session.get(url_http, timeout=30, verify=False)  # apenas para este site de exemplo
-        r.raise_for_status()
-        return BeautifulSoup(r.text, "html.parser")
-
-def extract_categories() -> dict:
-    soup = get_soup(BASE)
-    cats = {}
-    for a in soup.select("div.side_categories ul li ul li a"):
-        name = a.text.strip()
-        href = urljoin(BASE, a["href"])
-        cats[name] = href
-    return cats
-
-def extract_books_from_category(cat_name: str, cat_url: str):
+STATE_PATH = "data/.scraper_state.json"
+DELTA_PATH = "data/books_delta.csv"
+BOOK_FIELDS = ["title", "price", "rating", "availability", "category", "link", "image"]
+
+DEFAULT_CONCURRENCY = 10
+DEFAULT_REQUESTS_PER_SECOND = 10.0
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+PAGE_COUNT_PATTERN = re.compile(r"Page\s+\d+\s+of\s+(\d+)")
+
+
+def default_parser() -> str:
+    # lxml is several times faster than the pure-Python parser, but optional.
+    return "lxml" if importlib.util.find_spec("lxml") is not None else "html.parser"
+
+
+class HostRateLimiter:
+    """Spaces out request starts per host to at most `rate` per second."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def wait(self, url: str) -> None:
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def parse_books(soup: BeautifulSoup, cat_name: str, base_url: str = BASE) -> List[Dict[str, str]]:
+    catalogue = urljoin(base_url, "catalogue/")
     books = []
-    page_url = cat_url
-    while True:
-        soup = get_soup(page_url)
-        for pod in soup.select(".product_pod"):
-            title = pod.h3.a["title"].strip()
-            price_text = pod.select_one(".price_color").text.strip().lstrip("£").replace(",", ".")
-            rating = pod.p["class"][1]  # e.g., 'One', 'Two'
-            availability = pod.select_one(".instock.availability").text.strip()
-            rel_link = pod.h3.a["href"]
-            # some product links are relative with ../
-            product_link = urljoin(CATALOGUE, rel_link.replace("../../../", ""))
-            img = urljoin(BASE, pod.img["src"].lstrip("./"))
-            books.append({
-                "title": title,
-                "price": price_text,
-                "rating": rating,
-                "availability": availability,
-                "category": cat_name,
-                "link": product_link,
-                "image": img,
-            })
-        # next page?
-        next_li = soup.select_one("li.next a")
-        if next_li and next_li.get("href"):
-            page_url = urljoin(page_url, next_li["href"])
-            time.sleep(0.3)
-        else:
-            break
+    for pod in soup.select(".product_pod"):
+        title = pod.h3.a["title"].strip()
+        price_text = pod.select_one(".price_color").text.strip().lstrip("£").replace(",", ".")
+        rating = pod.p["class"][1]  # e.g., 'One', 'Two'
+        availability = pod.select_one(".instock.availability").text.strip()
+        rel_link = pod.h3.a["href"]
+        # some product links are relative with ../
+        product_link = urljoin(catalogue, rel_link.replace("../../../", ""))
+        img = urljoin(base_url, pod.img["src"].lstrip("./"))
+        books.append({
+            "title": title,
+            "price": price_text,
+            "rating": rating,
+            "availability": availability,
+            "category": cat_name,
+            "link": product_link,
+            "image": img,
+        })
     return books
 
-def run():
-    all_books = []
-    cats = extract_categories()
-    for name, url in cats.items():
-        print(f"Scraping category: {name}")
-        all_books.extend(extract_books_from_category(name, url))
-    df = pd.DataFrame(all_books)
-    df = df.reset_index().rename(columns={"index": "id"})
-    df.to_csv("data/books.csv", index=False)
-    print(f"Saved {len(df)} books to data/books.csv")
+
+def page_urls(soup: BeautifulSoup, first_page_url: str) -> List[str]:
+    """URLs of pages 2..N of a category, read from its "Page 1 of N" pager."""
+    current = soup.select_one("ul.pager li.current")
+    match = PAGE_COUNT_PATTERN.search(current.text) if current else None
+    if not match:
+        return []
+    return [urljoin(first_page_url, f"page-{page}.html") for page in range(2, int(match.group(1)) + 1)]
+
+
+def build_dataframe(books: List[Dict[str, str]]) -> pd.DataFrame:
+    df = pd.DataFrame(books)
+    return df.reset_index().rename(columns={"index": "id"})
+
+
+class AsyncScraper:
+    """Concurrent books.toscrape.com scraper producing the `data/books.csv` schema."""
+
+    def __init__(
+        self,
+        base_url: str = BASE,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        parser: Optional[str] = None,
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> None:
+        self.base_url = base_url
+        self.retries = retries
+        self.backoff = backoff
+        self.parser = parser or default_parser()
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.rate_limiter = HostRateLimiter(requests_per_second)
+        self._client = client
+        self._concurrency = concurrency
+
+    def _new_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(max_connections=self._concurrency, max_keepalive_connections=self._concurrency)
+        return httpx.AsyncClient(
+            headers={"User-Agent": "Mozilla/5.0"},
+            timeout=30,
+            limits=limits,
+            follow_redirects=True,
+        )
+
+    async def _get(self, client: httpx.AsyncClient, url: str, **kwargs) -> httpx.Response:
+        attempt = 0
+        while True:
+            await self.rate_limiter.wait(url)
+            try:
+                async with self.semaphore:
+                    response = await client.get(url, **kwargs)
+                if response.status_code == 304:
+                    return response
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    response.raise_for_status()
+                    return response
+            except httpx.TransportError as exc:
+                if url.startswith("https://") and "SSL" in str(exc):
+                    # fallback p/ http se houver problema de certificado
+                    url = url.replace("https://", "http://", 1)
+                elif attempt >= self.retries:
+                    raise
+            await asyncio.sleep(self.backoff * (2 ** attempt))
+            attempt += 1
+
+    async def fetch(self, client: httpx.AsyncClient, url: str) -> str:
+        return (await self._get(client, url)).text
+
+    async def soup(self, client: httpx.AsyncClient, url: str) -> BeautifulSoup:
+        return BeautifulSoup(await self.fetch(client, url), self.parser)
+
+    async def extract_categories(self, client: httpx.AsyncClient) -> Dict[str, str]:
+        soup = await self.soup(client, self.base_url)
+        cats = {}
+        for a in soup.select("div.side_categories ul li ul li a"):
+            cats[a.text.strip()] = urljoin(self.base_url, a["href"])
+        return cats
+
+    async def extract_books_from_category(
+        self, client: httpx.AsyncClient, cat_name: str, cat_url: str
+    ) -> List[Dict[str, str]]:
+        first = await self.soup(client, cat_url)
+        books = parse_books(first, cat_name, self.base_url)
+        remaining = page_urls(first, cat_url)
+        if remaining:
+            pages = await asyncio.gather(*(self.soup(client, url) for url in remaining))
+            for soup in pages:
+                books.extend(parse_books(soup, cat_name, self.base_url))
+        else:
+            # No "Page x of N" pager: walk the "next" links one by one.
+            soup, page_url = first, cat_url
+            while (next_link := soup.select_one("li.next a")) and next_link.get("href"):
+                page_url = urljoin(page_url, next_link["href"])
+                soup = await self.soup(client, page_url)
+                books.extend(parse_books(soup, cat_name, self.base_url))
+        return books
+
+    async def scrape(self) -> pd.DataFrame:
+        client = self._client or self._new_client()
+        try:
+            cats = await self.extract_categories(client)
+            print(f"Scraping {len(cats)} categories ({self.parser} parser)")
+            per_category = await asyncio.gather(
+                *(self.extract_books_from_category(client, name, url) for name, url in cats.items())
+            )
+        finally:
+            if self._client is None:
+                await client.aclose()
+        return build_dataframe([book for books in per_category for book in books])
+
+
+class ScrapeState:
+    """Per-URL validators, content hashes and book links, plus the checkpoint of an unfinished run."""
+
+    def __init__(self, path: str = STATE_PATH) -> None:
+        self.path = Path(path)
+        data: Dict[str, Any] = {}
+        if self.path.exists():
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        self.categories: Dict[str, str] = data.get("categories", {})
+        self.pages: Dict[str, Dict[str, Any]] = data.get("pages", {})
+        self.run: Optional[Dict[str, Any]] = data.get("run")
+
+    def start_run(self) -> Dict[str, Any]:
+        if self.run is None:
+            self.run = {"done": [], "changed": []}
+        return self.run
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"categories": self.categories, "pages": self.pages, "run": self.run}
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+class IncrementalScraper(AsyncScraper):
+    """Re-downloads only what changed since the previous run.
+
+    Pages are requested with `If-None-Match`/`If-Modified-Since`; a 304 or
+    an identical content hash reuses the links recorded last time. Each
+    finished category is checkpointed, so an interrupted run resumes where
+    it stopped.
+    """
+
+    def __init__(self, state: ScrapeState, **options) -> None:
+        super().__init__(**options)
+        self.state = state
+        self.stats = {"not_modified": 0, "unchanged": 0, "changed": 0}
+
+    async def fetch_page(
+        self, client: httpx.AsyncClient, url: str
+    ) -> Tuple[Optional[BeautifulSoup], Dict[str, Any]]:
+        """Return (soup, entry); soup is None when the page did not change."""
+        entry = self.state.pages.get(url, {})
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        response = await self._get(client, url, headers=headers)
+        if response.status_code == 304:
+            self.stats["not_modified"] += 1
+            return None, entry
+
+        updated = {
+            **entry,
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "hash": hashlib.sha256(response.content).hexdigest(),
+        }
+        if entry and updated["hash"] == entry.get("hash"):
+            self.stats["unchanged"] += 1
+            return None, updated
+        self.stats["changed"] += 1
+        return BeautifulSoup(response.text, self.parser), updated
+
+    async def _page_books(
+        self, client: httpx.AsyncClient, url: str, cat_name: str
+    ) -> Tuple[Optional[BeautifulSoup], Dict[str, Any], List[Dict[str, str]]]:
+        soup, entry = await self.fetch_page(client, url)
+        books: List[Dict[str, str]] = []
+        if soup is not None:
+            books = parse_books(soup, cat_name, self.base_url)
+            entry["links"] = [book["link"] for book in books]
+        return soup, entry, books
+
+    async def scrape_category(
+        self, client: httpx.AsyncClient, cat_name: str, cat_url: str
+    ) -> Tuple[Dict[str, Dict[str, Any]], List[Dict[str, str]]]:
+        """Return the category's new page entries and the books found on its changed pages."""
+        soup, first, changed = await self._page_books(client, cat_url, cat_name)
+        if soup is not None:
+            first["pages"] = page_urls(soup, cat_url)
+        entries = {cat_url: first}
+        remaining = first.get("pages", [])
+        results = await asyncio.gather(*(self._page_books(client, url, cat_name) for url in remaining))
+        for url, (_, entry, books) in zip(remaining, results):
+            entries[url] = entry
+            changed.extend(books)
+        return entries, changed
+
+    async def _checkpointed(self, client: httpx.AsyncClient, cat_name: str, cat_url: str) -> None:
+        entries, books = await self.scrape_category(client, cat_name, cat_url)
+        # Page entries and their changed rows are committed together, so a resumed
+        # run never sees a page as unchanged whose rows were not recorded yet.
+        self.state.pages.update(entries)
+        self.state.run["changed"].extend(books)
+        self.state.run["done"].append(cat_url)
+        self.state.save()
+
+    async def scrape_changes(self) -> List[Dict[str, str]]:
+        """Scrape and return book rows found on changed pages (including rows from a resumed run)."""
+        run = self.state.start_run()
+        client = self._client or self._new_client()
+        try:
+            soup, entry = await self.fetch_page(client, self.base_url)
+            if soup is not None:
+                self.state.categories = {
+                    a.text.strip(): urljoin(self.base_url, a["href"])
+                    for a in soup.select("div.side_categories ul li ul li a")
+                }
+            self.state.pages[self.base_url] = entry
+            done = set(run["done"])
+            pending = {name: url for name, url in self.state.categories.items() if url not in done}
+            print(f"Scraping {len(pending)} of {len(self.state.categories)} categories (incremental)")
+            await asyncio.gather(*(self._checkpointed(client, name, url) for name, url in pending.items()))
+        finally:
+            if self._client is None:
+                await client.aclose()
+        return run["changed"]
+
+    def seen_links(self) -> Set[str]:
+        links: Set[str] = set()
+        for cat_url in self.state.categories.values():
+            entry = self.state.pages.get(cat_url, {})
+            for url in [cat_url] + entry.get("pages", []):
+                links.update(self.state.pages.get(url, {}).get("links", []))
+        return links
+
+
+def _changed_rows(existing: pd.DataFrame, scraped: pd.DataFrame) -> np.ndarray:
+    """Row-wise `existing != scraped` for two aligned frames, after cleaning both with `normalize_books`.
+
+    A catalog already normalized by transform.py (45.17, 3) thus matches
+    freshly scraped text ("Â£45.17", "Three").
+    """
+    old = normalize_books(existing[BOOK_FIELDS].reset_index(drop=True))
+    new = normalize_books(scraped[BOOK_FIELDS].reset_index(drop=True))
+    changed = np.zeros(len(new), dtype=bool)
+    for field in BOOK_FIELDS:
+        if field in ("price", "rating"):
+            before, after = old[field].to_numpy(dtype=float), new[field].to_numpy(dtype=float)
+            changed |= (before != after) & ~(np.isnan(before) & np.isnan(after))
+        else:
+            changed |= (old[field].astype(str) != new[field].astype(str)).to_numpy()
+    return changed
+
+
+def apply_delta(
+    existing: pd.DataFrame, scraped: List[Dict[str, str]], seen_links: Set[str]
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Merge scraped rows into the catalog keyed on `link`; returns (catalog, delta).
+
+    Existing books keep their `id`; new books get ids after the current
+    maximum. The delta has one row per inserted, updated or deleted book.
+    A link listed more than once in `existing` keeps its last row; the
+    earlier ones are deleted.
+    """
+    if existing.empty:
+        existing = pd.DataFrame(columns=["id"] + BOOK_FIELDS)
+    next_id = int(existing["id"].max()) + 1 if len(existing) else 0
+    duplicated = existing["link"].duplicated(keep="last").to_numpy()
+    superseded, existing = existing[duplicated], existing[~duplicated]
+
+    books = pd.DataFrame(scraped, columns=BOOK_FIELDS).drop_duplicates("link").reset_index(drop=True)
+    positions = pd.Index(existing["link"]).get_indexer(books["link"])
+    known = positions >= 0
+    changed = np.zeros(len(books), dtype=bool)
+    changed[known] = _changed_rows(existing.iloc[positions[known]], books[known])
+    existing_ids = existing["id"].to_numpy()
+
+    upserts: Dict[str, Dict[str, Any]] = {}
+    for row in np.flatnonzero(changed | ~known):
+        book = books.iloc[row].to_dict()
+        if known[row]:
+            upserts[book["link"]] = {"id": int(existing_ids[positions[row]]), **book, "change": "update"}
+        else:
+            upserts[book["link"]] = {"id": next_id, **book, "change": "insert"}
+            next_id += 1
+
+    delta_columns = ["id"] + BOOK_FIELDS + ["change"]
+    deleted = pd.concat([superseded, existing[~existing["link"].isin(seen_links)]])
+    deleted = deleted.sort_values("id", kind="stable").assign(change="delete")[delta_columns]
+    delta = pd.DataFrame(list(upserts.values()), columns=delta_columns)
+    if not deleted.empty:
+        delta = pd.concat([delta, deleted], ignore_index=True) if len(delta) else deleted.reset_index(drop=True)
+
+    updates = {link: row for link, row in upserts.items() if row["change"] == "update"}
+    merged = existing[existing["link"].isin(seen_links)].copy()
+    for field in BOOK_FIELDS:
+        merged[field] = [
+            updates[link][field] if link in updates else value
+            for link, value in zip(merged["link"], merged[field])
+        ]
+    inserts = [row for row in upserts.values() if row["change"] == "insert"]
+    if inserts:
+        new_rows = pd.DataFrame(inserts, columns=["id"] + BOOK_FIELDS)
+        merged = pd.concat([merged, new_rows], ignore_index=True) if len(merged) else new_rows
+    merged = merged.sort_values("id", kind="stable")
+    return merged[["id"] + BOOK_FIELDS].reset_index(drop=True), delta
+
+
+def run_incremental(
+    output: str = "data/books.csv",
+    state_path: str = STATE_PATH,
+    delta_path: str = DELTA_PATH,
+    **scraper_options,
+) -> pd.DataFrame:
+    state = ScrapeState(state_path)
+    scraper = IncrementalScraper(state, **scraper_options)
+    changed = asyncio.run(scraper.scrape_changes())
+
+    existing = pd.read_csv(output) if Path(output).exists() else pd.DataFrame()
+    catalog, delta = apply_delta(existing, changed, scraper.seen_links())
+    delta.to_csv(delta_path, index=False)
+    if not delta.empty:
+        catalog.to_csv(output, index=False)
+
+    state.run = None
+    state.save()
+    print(
+        f"Pages: {scraper.stats['changed']} changed, {scraper.stats['unchanged']} same content, "
+        f"{scraper.stats['not_modified']} not modified. "
+        f"Delta: {len(delta)} rows written to {delta_path}; catalog has {len(catalog)} books."
+    )
+    return delta
+
+
+def run(output: str = "data/books.csv", **scraper_options) -> pd.DataFrame:
+    df = asyncio.run(AsyncScraper(**scraper_options).scrape())
+    df.to_csv(output, index=False)
+    print(f"Saved {len(df)} books to {output}")
+    return df
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Scraper assíncrono do books.toscrape.com")
+    parser.add_argument("--output", default="data/books.csv")
+    parser.add_argument("--base-url", default=BASE)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=DEFAULT_REQUESTS_PER_SECOND, help="requisições/s por host")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES)
+    parser.add_argument("--parser", default=None, help="backend do BeautifulSoup (padrão: lxml se instalado)")
+    parser.add_argument("--incremental", action="store_true", help="baixa só páginas alteradas e grava um delta")
+    parser.add_argument("--state", default=STATE_PATH, help="checkpoint/validadores do modo incremental")
+    parser.add_argument("--delta", default=DELTA_PATH, help="CSV com as linhas alteradas (modo incremental)")
+    args = parser.parse_args()
+    options = dict(
+        output=args.output,
+        base_url=args.base_url,
+        concurrency=args.concurrency,
+        requests_per_second=args.rate,
+        retries=args.retries,
+        parser=args.parser,
+    )
+    if args.incremental:
+        run_incremental(state_path=args.state, delta_path=args.delta, **options)
+    else:
+        run(**options)
+
 
 if __name__ == "__main__":
-    run()
+    main()
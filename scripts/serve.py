@@ -0,0 +1,54 @@
+"""Sobe a API com um ou mais workers uvicorn.
+
+Uso:
+    python scripts/serve.py [--workers N] [--host 0.0.0.0] [--port 8000]
+
+Com mais de um worker (`--workers` ou `WEB_CONCURRENCY`), este processo
+publica o catálogo como snapshot Arrow (`CATALOG_SNAPSHOT_PATH`), que cada
+worker mapeia em memória só para leitura, republica o snapshot quando o CSV
+muda e liga o modo multiprocesso do Prometheus (`PROMETHEUS_MULTIPROC_DIR`)
+para que `/metrics` some todos os workers. Com um worker, equivale a
+`uvicorn api.main:app`.
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import uvicorn  # noqa: E402
+
+from api.core.workers import WORKERS, SnapshotPublisher, configure_multiworker  # noqa: E402
+from api.middleware.logging import start_log_listener  # noqa: E402
+from api.services import insights  # noqa: E402
+
+
+def run(host: str = "0.0.0.0", port: int = 8000, workers: int = WORKERS) -> None:
+    if workers <= 1:
+        uvicorn.run("api.main:app", host=host, port=port)
+        return
+
+    start_log_listener()
+    env = configure_multiworker()
+    publisher = None
+    if "BOOKS_DATA_PATH" in env:
+        publisher = SnapshotPublisher(insights.catalog_path(), Path(env["BOOKS_DATA_PATH"]))
+        publisher.publish_if_changed()  # before the workers start, so they find it
+        publisher.start()
+    # Workers are spawned, so they read these at import like any other setting.
+    os.environ.update(env)
+    try:
+        uvicorn.run("api.main:app", host=host, port=port, workers=workers)
+    finally:
+        if publisher is not None:
+            publisher.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sobe a Books API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args()
+    run(args.host, args.port, args.workers)
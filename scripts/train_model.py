@@ -0,0 +1,31 @@
+"""Treina o modelo de preço (ridge) sobre a matriz de features do catálogo e salva em .npz.
+
+Uso:
+    python scripts/train_model.py [destino.npz] [--alpha 1.0]
+
+A API carrega o arquivo no startup (`ML_MODEL_PATH`, padrão `data/price_model.npz`).
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from api.services.ml_data import feature_matrix  # noqa: E402
+from api.services.price_model import DEFAULT_ALPHA, MODEL_PATH, RidgePriceModel  # noqa: E402
+
+
+def run(destination: str = MODEL_PATH, alpha: float = DEFAULT_ALPHA) -> RidgePriceModel:
+    model = RidgePriceModel.fit(feature_matrix(), alpha=alpha)
+    model.save(Path(destination))
+    metrics = ", ".join(f"{name}={value:.4g}" for name, value in model.metrics.items())
+    print(f"Saved {model.name} {model.version} to {destination} ({metrics})")
+    return model
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Treina o modelo de preço da API")
+    parser.add_argument("destination", nargs="?", default=MODEL_PATH)
+    parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA)
+    args = parser.parse_args()
+    run(args.destination, args.alpha)
@@ -1,15 +1,15 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from api.services.normalization import normalize_books  # noqa: E402
+
 df = pd.read_csv("data/books.csv")
-# Exemplo simples de limpeza: normalizar preços e ratings
-df["price"] = pd.to_numeric(df["price"], errors="coerce")
-map_rating = {
-    "One": 1, "Two": 2, "Three": 3, "Four": 4, "Five": 5,
-    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
-}
-if "rating" in df.columns:
-    df["rating"] = df["rating"].apply(lambda r: map_rating.get(str(r), r))
-    df["rating"] = pd.to_numeric(df["rating"], errors="coerce").fillna(0).astype(int)
+# Mesma limpeza usada pela API: preços numéricos (remove "Â£"/"£") e ratings inteiros
+df = normalize_books(df)
 
 df.to_csv("data/books.csv", index=False)
 print("Transform complete.")
@@ -0,0 +1,79 @@
+import asyncio
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from api.middleware.admission import (
+    AdmissionControlMiddleware,
+    ConcurrencyLimiter,
+    Overloaded,
+    parse_route_limits,
+)
+
+
+def test_parse_route_limits_prefers_longest_prefix():
+    limiters = parse_route_limits("/api=4:8, /api/v1/ml/features=1:2")
+    assert [(limiter.prefix, limiter.max_concurrent, limiter.max_queue) for limiter in limiters] == [
+        ("/api/v1/ml/features", 1, 2),
+        ("/api", 4, 8),
+    ]
+
+
+def test_limiter_queues_then_sheds():
+    async def scenario():
+        limiter = ConcurrencyLimiter("/slow", max_concurrent=1, max_queue=1)
+        await limiter.acquire()
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert (limiter.active, limiter.queued) == (1, 1)
+
+        with pytest.raises(Overloaded):
+            await limiter.acquire()
+
+        limiter.release()  # slot goes straight to the queued request
+        await waiting
+        assert (limiter.active, limiter.queued) == (1, 0)
+
+        with pytest.raises(Overloaded):
+            await limiter.acquire(timeout=0.01)  # queued, but nothing frees up in time
+        limiter.release()
+        assert (limiter.active, limiter.queued, limiter.rejected) == (0, 0, 2)
+
+    asyncio.run(scenario())
+
+
+def test_middleware_returns_503_with_retry_after():
+    gate = asyncio.Event()
+
+    async def slow(request):
+        await gate.wait()
+        return PlainTextResponse("done")
+
+    async def fast(request):
+        return PlainTextResponse("fast")
+
+    limiter = ConcurrencyLimiter("/slow", max_concurrent=1, max_queue=0)
+    app = AdmissionControlMiddleware(
+        Starlette(routes=[Route("/slow", slow), Route("/fast", fast)]), limiters=[limiter]
+    )
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.ensure_future(client.get("/slow"))
+            while limiter.active == 0:
+                await asyncio.sleep(0)
+            shed = await client.get("/slow")
+            unaffected = await client.get("/fast")
+            gate.set()
+            return await first, shed, unaffected
+
+    first, shed, unaffected = asyncio.run(scenario())
+    assert first.status_code == 200
+    assert shed.status_code == 503
+    assert shed.headers["retry-after"] == "1"
+    assert unaffected.text == "fast"
+    assert limiter.active == 0
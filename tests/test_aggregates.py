@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from api.services.aggregates import StatsAggregates
+from api.services.insights import (
+    compute_categories_stats,
+    compute_overview,
+    load_books_dataframe,
+    top_rated_positions,
+)
+
+
+def _frame(rows):
+    return pd.DataFrame(rows, columns=["id", "title", "category", "price", "rating", "availability"])
+
+
+def test_aggregates_match_dataframe_stats():
+    df = load_books_dataframe()
+    aggregates = StatsAggregates.from_dataframe(df)
+
+    assert aggregates.overview() == compute_overview(df)
+    assert aggregates.category_stats() == compute_categories_stats(df)
+
+
+def test_apply_changes_matches_full_rebuild():
+    rows = [[i, f"Book {i}", "Poetry" if i % 2 else "Travel", 10.0 + i, i % 5 + 1, "In stock"] for i in range(40)]
+    old = _frame(rows)
+    new_rows = [list(row) for row in rows[1:]]           # id 0 removed (cheapest Travel book)
+    new_rows[0][3] = 99.5                                  # id 1 repriced
+    new_rows.append([40, "Book 40", "Fiction", 12.0, 5, "In stock"])
+    new = _frame(new_rows)
+
+    updated = StatsAggregates.from_dataframe(old).apply_changes(old, new)
+
+    assert updated is not None
+    rebuilt = StatsAggregates.from_dataframe(new)
+    assert updated.overview() == rebuilt.overview()
+    assert updated.category_stats() == rebuilt.category_stats()
+
+
+def test_apply_changes_leaves_the_previous_version_untouched():
+    rows = [[i, f"Book {i}", "Poetry" if i % 2 else "Travel", 10.0 + i, i % 5 + 1, "In stock"] for i in range(40)]
+    old = _frame(rows)
+    middle = _frame(rows + [[40, "Book 40", "Poetry", 99.0, 5, "In stock"]])
+    new = middle.assign(price=middle["price"].where(middle["id"] != 3, 1.0))
+
+    original = StatsAggregates.from_dataframe(old)
+    expected = original.category_stats()
+    step = original.apply_changes(old, middle)
+    final = step.apply_changes(middle, new)
+
+    assert original.category_stats() == expected
+    assert step.category_stats() == StatsAggregates.from_dataframe(middle).category_stats()
+    assert final.category_stats() == StatsAggregates.from_dataframe(new).category_stats()
+    assert final.overview() == StatsAggregates.from_dataframe(new).overview()
+
+
+def test_apply_changes_gives_up_on_large_deltas():
+    old = _frame([[i, f"Book {i}", "Poetry", 10.0, 3, "In stock"] for i in range(10)])
+    new = _frame([[i, f"Book {i}", "Poetry", 20.0, 3, "In stock"] for i in range(10)])
+
+    assert StatsAggregates.from_dataframe(old).apply_changes(old, new) is None
+
+
+def test_top_rated_positions_matches_full_sort():
+    rng = np.random.default_rng(3)
+    ratings = rng.integers(0, 6, 2_000).astype(float)
+    prices = rng.integers(1_000, 1_100, 2_000) / 100  # plenty of exact (rating, price) ties
+    ratings[::97] = np.nan
+    prices[::89] = np.nan
+    expected = np.lexsort(
+        (np.arange(2_000), np.nan_to_num(prices, nan=np.inf), np.nan_to_num(-ratings, nan=np.inf))
+    )
+
+    for limit in (1, 7, 250, 1_999, 5_000):
+        assert top_rated_positions(ratings, prices, limit).tolist() == expected[:limit].tolist()
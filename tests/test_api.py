@@ -1,8 +1,18 @@
+import io
+import json
 import os
 
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 from fastapi.testclient import TestClient
+from api.core.responses import negotiate_media_type
 from api.main import app
+from api.middleware.response_cache import response_cache
+from api.services import insights, ml_data, price_model
+from api.routes import ml as ml_routes
+from api.services.catalog import CatalogVersionMismatch, catalog
+from api.services.prediction_store import PredictionStore
 
 client = TestClient(app)
 
@@ -19,11 +29,13 @@ def access_token():
     assert response.status_code == 200
     return response.json()["access_token"]
 
+
 def test_health():
     r = client.get('/api/v1/health')
     assert r.status_code == 200
     assert r.json()['status'] == 'ok'
 
+
 def test_routes_exist(access_token):
     # these should exist even if CSV is empty
     headers = {"Authorization": f"Bearer {access_token}"}
@@ -34,7 +46,14 @@ def test_routes_exist(access_token):
     assert client.get('/api/v1/ml/training-data', headers=headers).status_code == 200
 
 
-def test_ml_predictions(access_token):
+@pytest.fixture
+def predictions_db(tmp_path, monkeypatch):
+    store = PredictionStore(str(tmp_path / "predictions.db"))
+    monkeypatch.setattr(ml_routes, "prediction_store", store)
+    return store
+
+
+def test_ml_predictions(access_token, predictions_db):
     headers = {"Authorization": f"Bearer {access_token}"}
     payload = {
         "predictions": [
@@ -47,3 +66,300 @@ def test_ml_predictions(access_token):
     body = response.json()
     assert body["status"] == "accepted"
     assert body["summary"]["received"] == 2
+
+    stored = client.get('/api/v1/ml/predictions?book_id=2&model=baseline-v1', headers=headers)
+    assert stored.status_code == 200
+    assert stored.headers["x-total-count"] == "1"
+    [item] = stored.json()
+    assert (item["batch_id"], item["book_id"], item["score"], item["label"]) == (body["batch_id"], 2, 2.1, "hold")
+
+    everything = client.get('/api/v1/ml/predictions', headers=headers)
+    assert everything.headers["x-total-count"] == "2"
+    assert [item["book_id"] for item in everything.json()] == [2, 1]  # newest first
+    models = client.get('/api/v1/ml/predictions/models', headers=headers).json()
+    assert [(item["model"], item["predictions"], item["average_score"]) for item in models] == [
+        ("baseline-v1", 2, 3.2)
+    ]
+
+    bad = {"predictions": [{"book_id": 1, "model": "baseline-v1", "score": "high"}]}
+    assert client.post('/api/v1/ml/predictions', json=bad, headers=headers).status_code == 422
+
+
+def test_catalog_stats(access_token):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    response = client.get('/api/v1/stats/catalog', headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["reloads"] >= 1
+    assert body["version"]
+    assert "hits" in body
+
+
+def test_get_book_and_batch(access_token):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    book = client.get('/api/v1/books/1', headers=headers)
+    assert book.status_code == 200
+    assert book.json()["id"] == 1
+    assert client.get('/api/v1/books/999999', headers=headers).status_code == 404
+
+    by_query = client.get('/api/v1/books?ids=3,1,999999', headers=headers)
+    assert by_query.status_code == 200
+    assert [item["id"] for item in by_query.json()] == [3, 1]
+    assert client.get('/api/v1/books?ids=1,abc', headers=headers).status_code == 422
+
+    batch = client.post('/api/v1/books/batch', json={"ids": [2, 999999]}, headers=headers)
+    assert batch.status_code == 200
+    assert [item["id"] for item in batch.json()["books"]] == [2]
+    assert batch.json()["missing"] == [999999]
+
+
+def test_search_books(access_token):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    response = client.get('/api/v1/books/search?title=light&limit=5', headers=headers)
+    assert response.status_code == 200
+    results = response.json()
+    assert 0 < len(results) <= 5
+    assert all("light" in item["title"].lower() for item in results)
+
+    filtered = client.get('/api/v1/books/search?category=poetry&min_price=20&max_price=40&min_rating=3', headers=headers)
+    assert filtered.status_code == 200
+    for item in filtered.json():
+        assert "Poetry" in item["category"]
+        assert 20 <= item["price"] <= 40 and item["rating"] >= 3
+
+
+def test_price_range(access_token):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    response = client.get('/api/v1/books/price-range?min=10&max=12', headers=headers)
+    assert response.status_code == 200
+    ids = [item["id"] for item in response.json()]
+    assert ids == sorted(ids)
+    assert all(10 <= item["price"] <= 12 for item in response.json())
+
+
+def test_pagination_and_sorting(access_token):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    everything = client.get('/api/v1/books/price-range?min=0&max=1000&limit=500', headers=headers)
+    total = int(everything.headers["X-Total-Count"])
+    assert total > 500
+    assert len(everything.json()) == 500
+
+    cheapest = client.get('/api/v1/books/search?min_price=0&sort=price&limit=5', headers=headers).json()
+    prices = [item["price"] for item in cheapest]
+    assert prices == sorted(prices)
+    second_page = client.get('/api/v1/books/search?min_price=0&sort=price&skip=5&limit=5', headers=headers).json()
+    assert second_page[0]["price"] >= prices[-1]
+
+    priciest = client.get('/api/v1/books?sort=-price&limit=3', headers=headers).json()
+    assert [item["price"] for item in priciest] == sorted((item["price"] for item in priciest), reverse=True)
+    assert client.get('/api/v1/books?sort=unknown', headers=headers).status_code == 422
+
+
+def test_top_rated_pages(access_token):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    top = client.get('/api/v1/books/top-rated?limit=10', headers=headers).json()
+    tail = client.get('/api/v1/books/top-rated?skip=5&limit=5', headers=headers)
+    assert tail.json() == top[5:]
+    assert tail.headers["x-total-count"] == "10"
+    keys = [(-item["rating"], item["price"]) for item in top]
+    assert keys == sorted(keys)
+
+
+def test_stats_etag(access_token):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    first = client.get('/api/v1/stats/categories', headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    cached = client.get('/api/v1/stats/categories', headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+
+def test_conditional_get_on_catalog_endpoints(access_token):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    first = client.get('/api/v1/books/top-rated?limit=5', headers=headers)
+    etag = first.headers["ETag"]
+    assert "max-age" in first.headers["Cache-Control"]
+    assert client.get('/api/v1/books/top-rated?limit=6', headers=headers).headers["ETag"] != etag
+
+    cached = client.get('/api/v1/books/top-rated?limit=5', headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+
+    anonymous = client.get('/api/v1/books/top-rated?limit=5', headers={"If-None-Match": etag})
+    assert anonymous.status_code == 401
+
+
+def test_response_cache_serves_repeated_requests(access_token):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    first = client.get('/api/v1/stats/overview?cache-test=1', headers=headers)
+    second = client.get('/api/v1/stats/overview?cache-test=1', headers=headers)
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+    assert client.get('/api/v1/stats/overview?cache-test=1').status_code == 401
+
+
+def test_categories_with_counts(access_token):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    plain = client.get('/api/v1/categories', headers=headers).json()
+    assert plain["categories"] == sorted(plain["categories"])
+    assert "counts" not in plain
+
+    detailed = client.get('/api/v1/categories?with_counts=true', headers=headers).json()
+    assert detailed["categories"] == plain["categories"]
+    assert list(detailed["counts"]) == plain["categories"]
+    total = client.get('/api/v1/stats/overview', headers=headers).json()["total_books"]
+    assert sum(detailed["counts"].values()) == total
+
+
+def _small_feature_batches(snapshot):
+    # Small batches so the stream really spans several chunks.
+    return ml_data.feature_batches(batch_rows=7, snapshot=snapshot)
+
+
+def test_ml_exports_stream_ndjson_and_csv(access_token, monkeypatch):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    expected = client.get('/api/v1/ml/features', headers=headers).json()
+    monkeypatch.setattr(ml_routes, "feature_batches", _small_feature_batches)
+
+    ndjson = client.get('/api/v1/ml/features', headers={**headers, "Accept": "application/x-ndjson"})
+    assert ndjson.status_code == 200
+    assert ndjson.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in ndjson.text.splitlines()] == expected
+
+    csv = client.get('/api/v1/ml/training-data', headers={**headers, "Accept": "text/csv"})
+    assert csv.status_code == 200
+    assert csv.headers["content-type"].startswith("text/csv")
+    assert csv.headers["x-target"] == "price"
+    lines = csv.text.splitlines()
+    assert lines[0].split(",")[:3] == ["id", "title", "category"]
+    assert len(lines) == len(expected) + 1
+
+
+def test_negotiate_media_type():
+    offered = ("application/json", "application/x-ndjson", "text/csv")
+    assert negotiate_media_type(None, offered) == "application/json"
+    assert negotiate_media_type("*/*", offered) == "application/json"
+    assert negotiate_media_type("application/ndjson", offered) == "application/x-ndjson"
+    assert negotiate_media_type("application/json;q=0.5, text/csv", offered) == "text/csv"
+    assert negotiate_media_type("text/*", offered) == "text/csv"
+    assert negotiate_media_type("image/png", offered) == "application/json"
+
+
+def test_ml_exports_arrow_and_parquet(access_token, monkeypatch):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    expected = client.get('/api/v1/ml/features', headers=headers).json()
+    monkeypatch.setattr(ml_routes, "feature_batches", _small_feature_batches)
+
+    arrow = client.get('/api/v1/ml/features', headers={**headers, "Accept": "application/vnd.apache.arrow.stream"})
+    assert arrow.status_code == 200
+    table = pa.ipc.open_stream(arrow.content).read_all()
+    assert table.num_rows == len(expected)
+    assert table.schema.field("in_stock").type == pa.bool_()
+    assert table.schema.field("price").type == pa.float64()
+    assert pa.types.is_dictionary(table.schema.field("category").type)
+    assert table.column("id").to_pylist() == [row["id"] for row in expected]
+
+    parquet = client.get('/api/v1/ml/training-data?format=parquet', headers=headers)
+    assert parquet.status_code == 200
+    assert parquet.headers["content-type"] == "application/vnd.apache.parquet"
+    table = pq.read_table(io.BytesIO(parquet.content))
+    assert table.num_rows == len(expected)
+    assert pa.types.is_dictionary(table.schema.field("category").type)
+
+    assert client.get('/api/v1/ml/features?format=xml', headers=headers).status_code == 422
+
+
+def test_ml_feature_matrix(access_token):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    full = client.get('/api/v1/ml/feature-matrix', headers=headers)
+    assert full.status_code == 200
+    body = full.json()
+    assert full.headers["x-feature-schema"] == body["schema_hash"]
+    assert len(body["features"]) == len(body["ids"]) == len(body["labels"])
+    assert all(len(row) == len(body["columns"]) for row in body["features"])
+
+    train = client.get('/api/v1/ml/feature-matrix?split=train&seed=3', headers=headers).json()
+    validation = client.get('/api/v1/ml/feature-matrix?split=validation&seed=3', headers=headers).json()
+    assert sorted(train["ids"] + validation["ids"]) == sorted(body["ids"])
+
+
+def test_ml_export_media_types_are_documented():
+    paths = app.openapi()["paths"]
+    features = paths["/api/v1/ml/features"]["get"]["responses"]["200"]["content"]
+    matrix = paths["/api/v1/ml/feature-matrix"]["get"]["responses"]["200"]["content"]
+    assert set(features) == set(ml_routes.EXPORT_MEDIA_TYPES)
+    assert set(matrix) == {"application/json", "application/vnd.apache.arrow.stream"}
+
+
+def test_ml_exports_render_in_process_on_catalog_version_mismatch(access_token, monkeypatch):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    url = '/api/v1/ml/feature-matrix?seed=7'
+    expected = client.get(url, headers=headers).json()
+
+    async def mismatched(*args):
+        raise CatalogVersionMismatch("catalog is at another version")
+
+    monkeypatch.setattr(ml_routes, "run_heavy", mismatched)
+    response_cache.clear()
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json() == expected
+
+
+def test_ml_predict(access_token):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    model = client.get('/api/v1/ml/model', headers=headers).json()
+    assert model["name"] == "ridge-price"
+
+    by_id = client.post('/api/v1/ml/predict', json={"book_ids": [1, 0, 999999]}, headers=headers)
+    assert by_id.status_code == 200
+    body = by_id.json()
+    assert [item["book_id"] for item in body["predictions"]] == [1, 0]
+    assert body["missing"] == [999999]
+    assert body["model_version"] == model["version"]
+
+    row = [0.0] * len(model["columns"])
+    by_row = client.post('/api/v1/ml/predict', json={"features": [row, row]}, headers=headers)
+    assert by_row.status_code == 200
+    assert len(by_row.json()["predictions"]) == 2
+
+    assert client.post('/api/v1/ml/predict', json={"features": [[1.0]]}, headers=headers).status_code == 422
+    assert client.post('/api/v1/ml/predict', json={}, headers=headers).status_code == 400
+
+
+def test_app_starts_without_price_model_on_empty_catalog(access_token, tmp_path, monkeypatch):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    with monkeypatch.context() as patch:
+        patch.setattr(insights, "BOOKS_CSV_PATH", tmp_path / "missing.csv")
+        patch.setattr(insights, "BOOKS_DATA_PATH", None)
+        patch.setattr(price_model, "MODEL_PATH", str(tmp_path / "missing.npz"))
+        with TestClient(app) as started:
+            assert started.get('/api/v1/health').status_code == 200
+            assert started.get('/api/v1/books', headers=headers).json() == []
+            assert started.get('/api/v1/ml/model', headers=headers).status_code == 503
+            assert started.post('/api/v1/ml/predict', json={"book_ids": [1]}, headers=headers).status_code == 503
+    catalog.refresh(force=True)
+    assert client.get('/api/v1/ml/model', headers=headers).status_code == 200
+
+
+def test_similar_books(access_token):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    book = client.get('/api/v1/books/0', headers=headers).json()
+    response = client.get('/api/v1/books/0/similar?k=5', headers=headers)
+    assert response.status_code == 200
+    similar = response.json()
+    assert len(similar) == 5
+    assert book["id"] not in [item["id"] for item in similar]
+    scores = [item["similarity"] for item in similar]
+    assert scores == sorted(scores, reverse=True)
+
+    assert client.get('/api/v1/books/999999/similar', headers=headers).status_code == 404
+    assert client.get('/api/v1/books/0/similar?k=0', headers=headers).status_code == 422
+
+
+def test_jwks_not_published_for_hmac_tokens():
+    assert client.get('/api/v1/auth/jwks').status_code == 404
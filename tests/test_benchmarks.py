@@ -0,0 +1,46 @@
+from benchmarks.suite import compare, latency_summary
+from benchmarks.synthetic import CATEGORY_WEIGHTS, generate_raw_catalog, write_catalog_csv
+from api.services import insights
+
+
+def test_synthetic_catalog_is_deterministic_and_cleans_like_scraped_data(tmp_path):
+    first = write_catalog_csv(tmp_path / "a.csv", 2_000, seed=7)
+    second = write_catalog_csv(tmp_path / "b.csv", 2_000, seed=7)
+    assert first.read_bytes() == second.read_bytes()
+    assert not generate_raw_catalog(50, seed=8).equals(generate_raw_catalog(50, seed=7))
+
+    raw = generate_raw_catalog(2_000, seed=7)
+    assert raw["price"].str.startswith("Â£").mean() > 0.99
+    assert raw["title"].str.contains("â\x80|Ã", regex=True).any()
+
+    df = insights.load_books_dataframe(first)
+    assert len(df) == 2_000
+    assert df["price"].between(10, 60).all()
+    assert df["rating"].between(1, 5).all()
+    assert set(df["category"]) <= set(CATEGORY_WEIGHTS)
+    assert df["category"].value_counts().index[0] == "Default"
+
+
+def test_compare_flags_regressions_in_the_right_direction():
+    baseline = {
+        "micro.load[1000]": {"min_ms": 10.0},
+        "http.books[1000]": {"p95_ms": 2.0, "rps": 1000.0},
+        "http.removed[1000]": {"rps": 5.0},
+    }
+    current = {
+        "micro.load[1000]": {"min_ms": 13.0},
+        "http.books[1000]": {"p95_ms": 1.0, "rps": 700.0},
+        "http.added[1000]": {"rps": 5.0},
+    }
+    rows = {(row["benchmark"], row["metric"]): row for row in compare(current, baseline, threshold=0.2)}
+
+    assert set(rows) == {("micro.load[1000]", "min_ms"), ("http.books[1000]", "p95_ms"), ("http.books[1000]", "rps")}
+    assert rows[("micro.load[1000]", "min_ms")]["regression"]
+    assert not rows[("http.books[1000]", "p95_ms")]["regression"]  # faster is fine
+    assert rows[("http.books[1000]", "rps")]["regression"]
+
+
+def test_latency_summary_percentiles():
+    summary = latency_summary([i / 1000 for i in range(1, 101)], elapsed=2.0)
+    assert summary["requests"] == 100 and summary["rps"] == 50.0
+    assert 50 <= summary["p50_ms"] <= 51 and 99 <= summary["p99_ms"] <= 100
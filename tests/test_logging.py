@@ -0,0 +1,141 @@
+import asyncio
+import json
+import logging
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+import api.main  # noqa: F401  (importing the app must not start the log thread)
+from api.middleware.logging import (
+    JSONMessageFormatter,
+    RequestLoggingMiddleware,
+    logger as books_logger,
+    request_id_var,
+    start_log_listener,
+    stop_log_listener,
+)
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def log():
+    handler = RecordingHandler()
+    test_logger = logging.getLogger("books_api.test")
+    test_logger.addHandler(handler)
+    test_logger.setLevel(logging.INFO)
+    test_logger.propagate = False
+    yield test_logger, handler.records
+    test_logger.removeHandler(handler)
+
+
+def make_app(sample_rate, logger):
+    async def ok(request: Request):
+        return PlainTextResponse(f"{request.state.request_id}|{request_id_var.get()}")
+
+    async def missing(request):
+        return PlainTextResponse("nope", status_code=404)
+
+    async def boom(request):
+        raise RuntimeError("boom")
+
+    async def stream(request):
+        async def chunks():
+            for part in (b"a", b"b", b"c"):
+                yield part
+
+        return StreamingResponse(chunks())
+
+    routes = [Route("/ok", ok), Route("/missing", missing), Route("/boom", boom), Route("/stream", stream)]
+    return RequestLoggingMiddleware(Starlette(routes=routes), sample_rate=sample_rate, log=logger)
+
+
+def call(app, *requests):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.get(path, headers=headers) for path, headers in requests]
+
+    return asyncio.run(scenario())
+
+
+def test_request_id_generated_and_echoed(log):
+    logger, records = log
+    (response,) = call(make_app(1.0, logger), ("/ok", {}))
+
+    request_id = response.headers["x-request-id"]
+    assert response.text == f"{request_id}|{request_id}"
+    (record,) = records
+    assert record.msg == {
+        "event": "request_completed",
+        "method": "GET",
+        "path": "/ok",
+        "client_ip": "127.0.0.1",
+        "duration_ms": record.msg["duration_ms"],
+        "request_id": request_id,
+        "status_code": 200,
+    }
+
+
+def test_incoming_request_id_is_propagated_only_if_well_formed(log):
+    logger, records = log
+    kept, replaced = call(
+        make_app(1.0, logger),
+        ("/ok", {"X-Request-ID": "abc-123"}),
+        ("/ok", {"X-Request-ID": "bad id\twith spaces"}),
+    )
+    assert kept.headers["x-request-id"] == "abc-123"
+    assert records[0].msg["request_id"] == "abc-123"
+    assert replaced.headers["x-request-id"] != "bad id\twith spaces"
+    assert len(replaced.headers["x-request-id"]) == 32
+
+
+def test_sampling_skips_successes_but_keeps_errors(log):
+    logger, records = log
+    responses = call(make_app(0.0, logger), ("/ok", {}), ("/missing", {}), ("/boom", {}))
+
+    assert [response.status_code for response in responses] == [200, 404, 500]
+    assert [(record.msg["event"], record.msg["path"]) for record in records] == [
+        ("request_completed", "/missing"),
+        ("request_failed", "/boom"),
+    ]
+    assert records[1].exc_info is not None
+
+
+def test_streaming_response_passes_through(log):
+    logger, records = log
+    (response,) = call(make_app(1.0, logger), ("/stream", {}))
+    assert response.content == b"abc"
+    assert records[0].msg["status_code"] == 200
+
+
+def test_formatter_serializes_dict_messages():
+    record = logging.LogRecord("books_api", logging.INFO, __file__, 1, {"event": "x", "n": 1}, None, None)
+    assert json.loads(JSONMessageFormatter().format(record)) == {"event": "x", "n": 1}
+
+
+def test_log_listener_ships_records_until_stopped():
+    handler = RecordingHandler()
+    listener = start_log_listener(handler)
+    books_logger.info({"event": "queued"})
+    stop_log_listener(listener)
+    stop_log_listener(listener)  # shutdown and atexit may both stop it
+
+    assert [record.msg for record in handler.records] == [{"event": "queued"}]
+    assert books_logger.propagate
+    assert not any(h.queue is listener.queue for h in books_logger.handlers if hasattr(h, "queue"))
+
+
+def test_importing_the_app_starts_no_log_thread():
+    assert not any(hasattr(h, "queue") for h in books_logger.handlers)
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from api.services.ml_data import build_feature_matrix, feature_matrix
+
+
+def _frame(rows):
+    return pd.DataFrame(rows, columns=["id", "title", "category", "price", "rating", "availability"])
+
+
+def test_build_feature_matrix_encodes_catalog():
+    df = _frame(
+        [
+            [0, "Travel light", "Travel", 10.0, 3, "In stock"],
+            [1, "Poems", "Poetry", None, 5, "Out of stock"],
+            [2, "More poems", "Poetry", 30.0, 1, "In stock"],
+        ]
+    )
+
+    matrix = build_feature_matrix(df, "v1", title_hash_buckets=4)
+
+    assert matrix.features.dtype == np.float32
+    assert matrix.schema.columns[:4] == ("rating", "in_stock", "category=Poetry", "category=Travel")
+    assert len(matrix.schema.columns) == 8
+    assert matrix.features[:, :4].tolist() == [[3, 1, 0, 1], [5, 0, 1, 0], [1, 1, 1, 0]]
+    assert matrix.features[:, 4:].sum(axis=1).tolist() == [2, 1, 2]
+    assert np.isnan(matrix.target[1]) and matrix.target[2] == 30.0
+
+    with_price = build_feature_matrix(df, "v1", target="rating", title_hash_buckets=0)
+    assert with_price.schema.columns[0] == "price"
+    assert with_price.features[1, 0] == 20.0  # missing price takes the median
+    assert with_price.schema.hash != matrix.schema.hash
+
+
+def test_split_is_seeded_and_stable_per_id():
+    df = _frame([[i, f"Book {i}", "Poetry", 10.0 + i, 3, "In stock"] for i in range(200)])
+    matrix = build_feature_matrix(df, "v1")
+
+    train, validation = matrix.split(0.25, seed=7)
+    assert len(train) + len(validation) == 200
+    assert 30 < len(validation) < 70
+    assert not set(train.ids) & set(validation.ids)
+    assert matrix.split(0.25, seed=7)[1].ids.tolist() == validation.ids.tolist()
+    assert matrix.split(0.25, seed=8)[1].ids.tolist() != validation.ids.tolist()
+
+    # Adding books does not move existing ones between splits.
+    grown = build_feature_matrix(_frame([[i, f"Book {i}", "Poetry", 10.0, 3, "In stock"] for i in range(300)]), "v2")
+    assert set(validation.ids) <= set(grown.split(0.25, seed=7)[1].ids)
+
+
+def test_feature_matrix_is_cached_per_version():
+    assert feature_matrix() is feature_matrix()
+    assert feature_matrix(title_hash_buckets=4) is not feature_matrix()
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+from api.services.normalization import normalize_books, normalize_price, normalize_rating
+
+
+def test_normalize_price_handles_mojibake_and_separators():
+    raw = pd.Series(["Â£45.17", "£12,50", "51.77", None, "n/a", "Â£45.17"])
+    result = normalize_price(raw)
+
+    assert result.dtype == "float64"
+    assert result.iloc[:3].tolist() == [45.17, 12.5, 51.77]
+    assert np.isnan(result.iloc[3]) and np.isnan(result.iloc[4])
+    assert result.iloc[5] == 45.17
+
+
+def test_normalize_rating_maps_words_and_numbers():
+    raw = pd.Series(["Three", "five", "2", None, "Unknown"])
+
+    assert normalize_rating(raw).tolist() == [3, 5, 2, 0, 0]
+    assert normalize_rating(pd.Series([4.0, np.nan])).tolist() == [4, 0]
+
+
+def test_normalize_books_adds_ids_and_default_columns():
+    df = normalize_books(pd.DataFrame({"title": ["A", "B"], "price": ["Â£1.00", "Â£2.00"], "rating": ["One", "Two"]}))
+
+    assert df["id"].tolist() == [0, 1]
+    assert list(df.columns[:8]) == ["id", "title", "category", "price", "rating", "availability", "link", "image"]
+    assert df["category"].isna().all()
@@ -0,0 +1,41 @@
+from api.services.prediction_store import PredictionStore
+
+
+def test_append_and_query(tmp_path):
+    store = PredictionStore(str(tmp_path / "predictions.db"))
+    summary = store.append(
+        [
+            {"book_id": 1, "model": "a", "score": 4.0, "label": "buy", "metadata": {"run": 1}},
+            {"book_id": 2, "model": "a", "score": 2.0},
+            {"book_id": 1, "model": "b", "score": None},
+            {"book_id": 3},
+        ]
+    )
+    assert summary["received"] == 4
+    assert summary["models"] == ["a", "b", "unknown"]
+    assert summary["average_score"] == 3.0
+
+    items, total = store.query(book_id=1)
+    assert total == 2
+    assert [item["model"] for item in items] == ["b", "a"]  # newest first
+    assert items[1]["metadata"] == {"run": 1}
+
+    page, total = store.query(skip=1, limit=2)
+    assert total == 4
+    assert [item["book_id"] for item in page] == [1, 2]
+    assert store.query(model="a")[1] == 2
+
+
+def test_model_stats_accumulate_across_batches(tmp_path):
+    store = PredictionStore(str(tmp_path / "predictions.db"))
+    store.append([{"model": "a", "score": 1.0}, {"model": "a", "score": 5.0}])
+    store.append([{"model": "a", "score": 3.0}, {"model": "a", "score": None}])
+
+    (stats,) = store.model_stats()
+    assert stats["predictions"] == 4
+    assert stats["scored"] == 3
+    assert stats["average_score"] == 3.0
+    assert (stats["min_score"], stats["max_score"]) == (1.0, 5.0)
+
+    # A fresh instance (another worker) reads the same aggregates.
+    assert PredictionStore(store.path).model_stats() == [stats]
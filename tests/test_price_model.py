@@ -0,0 +1,63 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from api.services.batching import MicroBatcher
+from api.services.ml_data import build_feature_matrix
+from api.services.price_model import RidgePriceModel
+
+
+def _matrix():
+    rows = [
+        [i, f"Book {i}", "Poetry" if i % 2 else "Travel", 10.0 + 5 * (i % 5 + 1) + (20.0 if i % 2 else 0.0), i % 5 + 1, "In stock"]
+        for i in range(200)
+    ]
+    df = pd.DataFrame(rows, columns=["id", "title", "category", "price", "rating", "availability"])
+    return build_feature_matrix(df, "v1")
+
+
+def test_ridge_fit_recovers_linear_prices(tmp_path):
+    matrix = _matrix()
+    model = RidgePriceModel.fit(matrix, alpha=1e-6)
+
+    assert model.metrics["rmse"] < 0.01 < model.metrics["baseline_rmse"]
+
+    path = tmp_path / "model.npz"
+    model.save(path)
+    loaded = RidgePriceModel.load(path)
+    assert loaded.version == model.version
+    np.testing.assert_allclose(loaded.predict(matrix.features), model.predict(matrix.features))
+
+
+def test_align_reorders_and_zero_fills_columns():
+    model = RidgePriceModel(("rating", "category=Travel"), np.array([1.0, 10.0], dtype=np.float32), 0.0)
+    matrix = _matrix()
+
+    aligned = model.align(matrix.features[:2], matrix.schema)
+    assert aligned.tolist() == [[1.0, 1.0], [2.0, 0.0]]
+
+    fresh = RidgePriceModel(("rating", "category=Fiction"), np.ones(2, dtype=np.float32), 0.0)
+    assert fresh.align(matrix.features[:1], matrix.schema).tolist() == [[1.0, 0.0]]
+
+
+def test_micro_batcher_coalesces_concurrent_requests():
+    calls = []
+
+    def predict(rows):
+        calls.append(len(rows))
+        return rows.sum(axis=1)
+
+    batcher = MicroBatcher(predict, max_rows=100, max_wait_ms=20)
+
+    async def scenario():
+        requests = [np.full((i + 1, 2), i, dtype=np.float32) for i in range(5)]
+        results = await asyncio.gather(*(batcher.submit(rows) for rows in requests))
+        await batcher.close()
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert calls == [15]
+    assert [result.tolist() for result in results] == [[2.0 * i] * (i + 1) for i in range(5)]
+    assert batcher.stats() == {"batches": 1, "rows": 15, "mean_batch_rows": 15.0}
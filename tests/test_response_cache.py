@@ -0,0 +1,45 @@
+import time
+
+from api.middleware.response_cache import ResponseCache
+
+HEADERS = [(b"content-type", b"application/json")]
+HEADER_BYTES = len(b"content-type") + len(b"application/json")
+
+
+def _key(name, version="v1"):
+    return (f"/api/v1/{name}", "", "", version)
+
+
+def test_lru_evicts_least_recently_used_by_bytes():
+    cache = ResponseCache(max_bytes=3 * (100 + HEADER_BYTES), max_entry_bytes=1000, ttl=60)
+    for name in ("a", "b", "c"):
+        cache.put(_key(name), 200, HEADERS, b"x" * 100)
+    assert cache.get(_key("a")) is not None  # "a" becomes most recently used
+
+    cache.put(_key("d"), 200, HEADERS, b"x" * 100)
+
+    assert cache.get(_key("b")) is None
+    assert cache.get(_key("a")) is not None
+    assert cache.evictions == 1
+    assert cache.current_bytes == 3 * (100 + HEADER_BYTES)
+
+
+def test_entries_expire_and_oversized_bodies_are_skipped():
+    cache = ResponseCache(max_bytes=10_000, max_entry_bytes=200, ttl=0.01)
+    assert cache.put(_key("big"), 200, HEADERS, b"x" * 500) is False
+
+    cache.put(_key("a"), 200, HEADERS, b"{}")
+    time.sleep(0.02)
+
+    assert cache.get(_key("a")) is None
+    assert cache.expirations == 1
+    assert len(cache) == 0
+
+
+def test_clear_invalidates_everything():
+    cache = ResponseCache(max_bytes=10_000, max_entry_bytes=1000, ttl=60)
+    cache.put(_key("a"), 200, HEADERS, b"{}")
+    cache.clear()
+
+    assert len(cache) == 0 and cache.current_bytes == 0
+    assert cache.invalidations == 1
@@ -0,0 +1,214 @@
+import asyncio
+import os
+import shutil
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from scripts import scraper
+
+FIXTURES = Path(__file__).parent / "fixtures" / "scraper"
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Serves the saved pages with ETags; `failures` makes the first N requests answer 503.
+
+    Every request is logged in `exchanges` as (path, If-None-Match sent, status).
+    """
+
+    failures = 0
+    requests = 0
+    paths = []
+    exchanges = []
+
+    def do_GET(self):
+        type(self).requests += 1
+        type(self).paths.append(self.path)
+        if type(self).failures > 0:
+            type(self).failures -= 1
+            self.send_error(503)
+            return
+        file_path = Path(self.translate_path(self.path))
+        if file_path.is_dir():
+            file_path = file_path / "index.html"
+        stat = file_path.stat()
+        self.etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        validator = self.headers.get("If-None-Match")
+        if validator == self.etag:
+            self.send_response(304)
+            self.end_headers()
+        else:
+            super().do_GET()
+        type(self).exchanges.append((self.path, validator, self.status))
+
+    def send_response(self, code, message=None):
+        self.status = code
+        super().send_response(code, message)
+
+    def end_headers(self):
+        if getattr(self, "etag", None):
+            self.send_header("ETag", self.etag)
+        super().end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site_dir(tmp_path):
+    # A copy, so tests can edit pages without touching the saved fixtures.
+    return shutil.copytree(FIXTURES, tmp_path / "site")
+
+
+@pytest.fixture
+def fixture_site(site_dir):
+    FixtureHandler.failures = 0
+    FixtureHandler.requests = 0
+    FixtureHandler.paths = []
+    FixtureHandler.exchanges = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(FixtureHandler, directory=str(site_dir)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def _scrape(base_url, **options):
+    return asyncio.run(scraper.AsyncScraper(base_url=base_url, requests_per_second=0, **options).scrape())
+
+
+def test_scraper_produces_books_csv_schema(fixture_site, tmp_path):
+    output = tmp_path / "books.csv"
+    scraper.run(output=str(output), base_url=fixture_site, requests_per_second=0)
+
+    df = pd.read_csv(output)
+    expected_columns = pd.read_csv("data/books.csv", nrows=0).columns.tolist()
+    assert df.columns.tolist() == expected_columns
+    assert df["id"].tolist() == [0, 1, 2, 3, 4]
+    assert df["category"].tolist() == ["Travel", "Travel", "Poetry", "Poetry", "Poetry"]
+    assert df["title"].iloc[2] == "A Light in the Attic"
+    assert df["price"].tolist() == [45.17, 49.43, 51.77, 23.88, 14.19]
+    assert df["rating"].tolist() == ["Two", "Four", "Three", "One", "Four"]
+    assert df["availability"].unique().tolist() == ["In stock"]
+    assert df["link"].iloc[0] == f"{fixture_site}catalogue/its-only-the-himalayas_981/index.html"
+    assert df["image"].iloc[0] == f"{fixture_site}media/cache/its-only-the-himalayas_981.jpg"
+
+
+def test_scraper_retries_transient_errors(fixture_site):
+    FixtureHandler.failures = 2
+    df = _scrape(fixture_site, retries=3, backoff=0.01)
+
+    assert len(df) == 5
+    assert FixtureHandler.requests == 4 + 2
+
+
+def test_scraper_gives_up_after_retries(fixture_site):
+    FixtureHandler.failures = 10
+    with pytest.raises(scraper.httpx.HTTPStatusError):
+        _scrape(fixture_site, retries=1, backoff=0.01)
+
+
+def _edit_page(path, old, new):
+    path.write_text(path.read_text(encoding="utf-8").replace(old, new), encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, (stat.st_atime + 5, stat.st_mtime + 5))
+
+
+def scraper_pod(title, slug):
+    return (
+        '<li><article class="product_pod">'
+        f'<div class="image_container"><a href="../../../{slug}/index.html">'
+        f'<img src="../../../../media/cache/{slug}.jpg" alt="{title}" class="thumbnail"></a></div>'
+        '<p class="star-rating Five"></p>'
+        f'<h3><a href="../../../{slug}/index.html" title="{title}">{title}</a></h3>'
+        '<div class="product_price"><p class="price_color">£36.94</p>'
+        '<p class="instock availability">In stock</p></div>'
+        "</article></li>\n"
+    )
+
+
+def test_incremental_run_writes_only_changed_rows(fixture_site, site_dir, tmp_path):
+    output, state, delta = tmp_path / "books.csv", tmp_path / "state.json", tmp_path / "delta.csv"
+    options = dict(output=str(output), base_url=fixture_site, requests_per_second=0)
+    scraper.run(**options)
+
+    # First incremental run has no validators yet: everything is fetched, nothing differs.
+    assert scraper.run_incremental(state_path=str(state), delta_path=str(delta), **options).empty
+
+    FixtureHandler.exchanges = []
+    assert scraper.run_incremental(state_path=str(state), delta_path=str(delta), **options).empty
+    # Every page is revalidated with the ETag from the previous run, and none is sent again.
+    assert len(FixtureHandler.exchanges) == 4
+    assert all(validator is not None and status == 304 for _, validator, status in FixtureHandler.exchanges)
+
+    poetry = site_dir / "catalogue/category/books/poetry_23/page-2.html"
+    _edit_page(poetry, "£23.88", "£19.99")
+    travel = site_dir / "catalogue/category/books/travel_2/index.html"
+    _edit_page(travel, "</ol>", scraper_pod("Vagabonding", "vagabonding_200") + "</ol>")
+
+    FixtureHandler.exchanges = []
+    changes = scraper.run_incremental(state_path=str(state), delta_path=str(delta), **options)
+
+    refetched = sorted(path for path, _, status in FixtureHandler.exchanges if status == 200)
+    assert refetched == [
+        "/catalogue/category/books/poetry_23/page-2.html",
+        "/catalogue/category/books/travel_2/index.html",
+    ]
+    assert sorted(changes["change"]) == ["insert", "update"]
+    assert pd.read_csv(delta).shape[0] == 2
+    catalog = pd.read_csv(output)
+    assert catalog["id"].tolist() == [0, 1, 2, 3, 4, 5]
+    assert catalog.loc[catalog["title"] == "Olio", "price"].item() == 19.99
+    assert catalog.loc[catalog["id"] == 5, "title"].item() == "Vagabonding"
+
+
+def test_apply_delta_ignores_normalization_only_differences():
+    book = {
+        "title": "Olio", "price": "Â£23.88", "rating": "One", "availability": "In stock",
+        "category": "Poetry", "link": "https://example.test/olio", "image": "https://example.test/olio.jpg",
+    }
+    # As left by transform.py: numeric price and rating.
+    existing = pd.DataFrame([{"id": 0, **book, "price": 23.88, "rating": 1}])
+
+    catalog, delta = scraper.apply_delta(existing, [book], {book["link"]})
+    assert delta.empty
+    assert len(catalog) == 1
+
+    catalog, delta = scraper.apply_delta(existing, [{**book, "rating": "Two"}], {book["link"]})
+    assert delta["change"].tolist() == ["update"]
+
+
+def test_apply_delta_keeps_the_last_row_of_a_duplicated_link():
+    book = {
+        "title": "Olio", "price": "Â£23.88", "rating": "One", "availability": "In stock",
+        "category": "Poetry", "link": "https://example.test/olio", "image": "https://example.test/olio.jpg",
+    }
+    existing = pd.DataFrame([{"id": 0, **book, "price": 30.0}, {"id": 1, **book}])
+
+    catalog, delta = scraper.apply_delta(existing, [book], {book["link"]})
+    assert catalog["id"].tolist() == [1]
+    assert list(zip(delta["id"], delta["change"])) == [(0, "delete")]
+
+
+def test_incremental_run_resumes_from_checkpoint(fixture_site, tmp_path):
+    output, state_path = tmp_path / "books.csv", tmp_path / "state.json"
+    travel_url = f"{fixture_site}catalogue/category/books/travel_2/index.html"
+    state = scraper.ScrapeState(str(state_path))
+    state.categories = {"Travel": travel_url, "Poetry": f"{fixture_site}catalogue/category/books/poetry_23/index.html"}
+    state.run = {"done": [travel_url], "changed": []}
+    state.save()
+
+    delta = scraper.run_incremental(
+        output=str(output), state_path=str(state_path), delta_path=str(tmp_path / "delta.csv"),
+        base_url=fixture_site, requests_per_second=0,
+    )
+
+    assert not any("travel" in path for path in FixtureHandler.paths)
+    assert delta["category"].tolist() == ["Poetry", "Poetry", "Poetry"]
+    assert scraper.ScrapeState(str(state_path)).run is None
+
@@ -0,0 +1,56 @@
+import numpy as np
+
+from api.services.ranges import SortedIndex, intersect_positions
+from api.services.search import SearchIndex, tokenize
+
+TITLES = [
+    "A Light in the Attic",
+    "Tipping the Velvet",
+    "The Light of the Fireflies",
+    "Light, Light, Light: Poems",
+    "Café Society",
+]
+CATEGORIES = ["Poetry", "Historical Fiction", "Fiction", "Poetry", "Nonfiction"]
+
+
+def test_tokenize_normalizes_case_accents_and_punctuation():
+    assert tokenize("Café, SOCIETY!") == ["cafe", "society"]
+    assert tokenize(None) == []
+
+
+def test_search_ranks_by_term_frequency_and_supports_prefixes():
+    index = SearchIndex(TITLES, CATEGORIES)
+
+    assert index.search(title="light")[0] == 3
+    assert sorted(index.search(title="lig")) == [0, 2, 3]
+    assert index.search(title="light attic") == [0]
+    assert index.search(title="cafe") == [4]
+    assert index.search(title="nothing-here") == []
+
+
+def test_search_filters_by_category_tokens():
+    index = SearchIndex(TITLES, CATEGORIES)
+
+    assert index.search(category="fiction") == [1, 2, 4]  # "Nonfiction" too, as with substring filters
+    assert index.search(title="light", category="poetry")[0] == 3
+    assert index.search() == [0, 1, 2, 3, 4]
+
+
+def test_search_keeps_substring_matches_and_ranks_word_starts_first():
+    index = SearchIndex(["Twilight", "Lighthouse Keeper", "Moonlight Sonata"], ["Nonfiction", "Fiction", "Fiction"])
+
+    assert index.search(title="light") == [1, 0, 2]
+    assert index.search(title="ight") == [0, 1, 2]
+    assert index.search(title="hous kee") == [1]
+    assert index.search(category="fiction") == [0, 1, 2]
+
+
+def test_sorted_index_range_and_intersection():
+    prices = SortedIndex(np.array([30.0, 10.0, np.nan, 20.0, 10.0]))
+    ratings = SortedIndex(np.array([5, 1, 4, 3, 2]))
+
+    assert prices.range(10, 20).tolist() == [1, 4, 3]
+    assert prices.range(low=25).tolist() == [0]
+    assert prices.range(40, 50).tolist() == []
+    assert intersect_positions(prices.range(10, 30), ratings.range(2)).tolist() == [0, 3, 4]
+    assert intersect_positions(None, None) is None
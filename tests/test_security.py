@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+import jwt
+import pytest
+
+from api.core import security
+from api.core.security import TokenCache, create_access_token, decode_token, load_key_set
+
+
+class FakeClock:
+    def __init__(self, now=1_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_cache_expires_at_exp_and_evicts_lru():
+    clock = FakeClock()
+    cache = TokenCache(max_entries=2, clock=clock)
+    cache.put(b"a", {"sub": "a", "exp": 1_010})
+    cache.put(b"b", {"sub": "b", "exp": 1_100})
+    cache.put(b"stale", {"sub": "c", "exp": 999})  # already expired: never stored
+    cache.put(b"forever", {"sub": "d"})  # no exp: never stored
+    assert len(cache) == 2
+
+    assert cache.get(b"a")["sub"] == "a"
+    cache.put(b"e", {"sub": "e", "exp": 1_100})  # "b" is least recently used
+    assert cache.get(b"b") is None
+    assert cache.evictions == 1
+
+    clock.now = 1_010
+    assert cache.get(b"a") is None
+    assert (cache.hits, cache.misses, cache.expirations) == (1, 2, 1)
+
+
+def test_decode_token_hits_cache_and_returns_copies(monkeypatch):
+    cache = TokenCache()
+    monkeypatch.setattr(security, "token_cache", cache)
+    token = create_access_token("alice")
+
+    first = decode_token(token)
+    first["sub"] = "mallory"
+    assert decode_token(token)["sub"] == "alice"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    with pytest.raises(jwt.InvalidTokenError):
+        decode_token(token[:-2] + "xx")
+    assert len(cache) == 1
+
+
+def test_expired_token_is_rejected_and_not_cached(monkeypatch):
+    cache = TokenCache()
+    monkeypatch.setattr(security, "token_cache", cache)
+    with pytest.raises(jwt.ExpiredSignatureError):
+        decode_token(create_access_token("alice", expires_delta=timedelta(seconds=-1)))
+    assert len(cache) == 0
+
+
+def test_hmac_key_set_publishes_no_keys():
+    keys = load_key_set("HS256", secret="s3cret")
+    assert keys.jwks == [] and keys.signing_key == "s3cret"
+
+
+@pytest.mark.parametrize("algorithm", ["RS256", "EdDSA"])
+def test_asymmetric_key_set_signs_and_verifies(tmp_path, monkeypatch, algorithm):
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+    def write_private_key(name):
+        private_key = (
+            rsa.generate_private_key(public_exponent=65537, key_size=2048)
+            if algorithm == "RS256"
+            else ed25519.Ed25519PrivateKey.generate()
+        )
+        path = tmp_path / name
+        path.write_bytes(
+            private_key.private_bytes(
+                serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+            )
+        )
+        return path, private_key
+
+    old_path, old_key = write_private_key("old.pem")
+    new_path, _ = write_private_key("new.pem")
+    old_public = tmp_path / "old.pub.pem"
+    old_public.write_bytes(
+        old_key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+    )
+
+    old_keys = load_key_set(algorithm, private_key_path=str(old_path), public_key_paths="")
+    rotated = load_key_set(algorithm, private_key_path=str(new_path), public_key_paths=str(old_public))
+    assert [jwk["kid"] for jwk in rotated.jwks] == [rotated.kid, old_keys.kid]
+    assert all(jwk["alg"] == algorithm for jwk in rotated.jwks)
+
+    monkeypatch.setattr(security, "token_cache", TokenCache())
+    for keys in (old_keys, rotated):
+        monkeypatch.setattr(security, "get_key_set", lambda keys=keys: keys)
+        token = create_access_token("alice")
+        assert jwt.get_unverified_header(token)["kid"] == keys.kid
+        # Tokens from before the rotation still verify against the published old key.
+        monkeypatch.setattr(security, "get_key_set", lambda: rotated)
+        assert decode_token(token)["sub"] == "alice"
+
+    verifier_only = load_key_set(algorithm, private_key_path=None, public_key_paths=str(old_public))
+    assert verifier_only.signing_key is None and verifier_only.jwks[0]["kid"] == old_keys.kid
@@ -0,0 +1,39 @@
+import numpy as np
+
+from api.services.similarity import SimilarityIndex
+
+
+def _index(**options):
+    return SimilarityIndex(
+        ["The Art of Poetry", "Poetry for Beginners", "Travel in Italy", "Italy by Train", "Poetry and Travel"],
+        ["Poetry", "Poetry", "Travel", "Travel", None],
+        np.array([10.0, 12.0, 40.0, 41.0, np.nan]),
+        np.array([5, 4, 2, 2, 0]),
+        title_buckets=64,
+        **options,
+    )
+
+
+def test_vectors_are_unit_length_and_neighbors_make_sense():
+    index = _index()
+    np.testing.assert_allclose(np.linalg.norm(index.vectors, axis=1), 1.0, rtol=1e-5)
+
+    positions, scores = index.similar(0, 2)
+    assert positions.tolist()[0] == 1
+    assert 0 not in positions.tolist()
+    assert scores[0] >= scores[1]
+    assert index.similar(2, 1)[0].tolist() == [3]
+
+
+def test_neighbor_table_matches_direct_scan():
+    with_table = _index(table_width=3)
+    without = _index(table_width=0)
+
+    assert with_table.neighbor_table is not None and without.neighbor_table is None
+    for position in range(5):
+        table_positions, table_scores = with_table.similar(position, 3)
+        scan_positions, scan_scores = without.similar(position, 3)
+        assert table_positions.tolist() == scan_positions.tolist()
+        np.testing.assert_allclose(table_scores, scan_scores, rtol=1e-6)
+    # k beyond the table width, and beyond the catalog, still work.
+    assert len(with_table.similar(0, 10)[0]) == 4
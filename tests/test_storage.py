@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from api.services import insights
+from api.services.catalog import CatalogCache
+from api.services.storage import convert_catalog, storage_for
+
+
+@pytest.mark.parametrize("suffix", [".feather", ".parquet"])
+def test_columnar_round_trip_matches_csv_loader(tmp_path, suffix):
+    destination = tmp_path / f"books{suffix}"
+    expected = insights.load_books_dataframe()
+
+    convert_catalog(insights.BOOKS_CSV_PATH, destination)
+    loaded = storage_for(destination).read(destination)
+
+    assert loaded["price"].dtype == "float64"
+    assert loaded["rating"].dtype == "int64"
+    assert loaded.to_dict(orient="records") == expected.to_dict(orient="records")
+
+
+@pytest.mark.parametrize("suffix", [".feather", ".parquet"])
+def test_columnar_missing_values_match_csv_loader(tmp_path, suffix):
+    source = tmp_path / "books.csv"
+    source.write_text(
+        "id,title,price,rating,availability,category,link,image\n"
+        "0,A Light in the Attic,Â£51.77,Three,In stock,Poetry,,\n"
+        "1,,,,,,,\n",
+        encoding="utf-8",
+    )
+    destination = tmp_path / f"books{suffix}"
+    convert_catalog(source, destination)
+
+    records = storage_for(destination).read(destination).to_dict(orient="records")
+    assert records == insights.load_books_dataframe(source).to_dict(orient="records")
+    assert records[1]["price"] is None and records[1]["title"] is None
+    json.dumps(records, allow_nan=False)
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".feather", ".parquet"])
+def test_read_parses_the_given_content_not_the_current_file(tmp_path, suffix):
+    destination = tmp_path / f"books{suffix}"
+    convert_catalog(insights.BOOKS_CSV_PATH, destination)
+    content = destination.read_bytes()
+    storage = storage_for(destination)
+    storage.write(insights.load_books_dataframe().head(3), destination)  # published after the hash
+
+    assert len(storage.read(destination, content)) == len(insights.load_books_dataframe())
+
+
+def test_catalog_prefers_columnar_data_path(tmp_path, monkeypatch):
+    destination = tmp_path / "books.feather"
+    convert_catalog(insights.BOOKS_CSV_PATH, destination)
+    monkeypatch.setattr(insights, "BOOKS_DATA_PATH", destination)
+
+    snapshot = CatalogCache(refresh_interval=0).get()
+
+    assert snapshot.path == destination
+    assert len(snapshot) == len(insights.load_books_dataframe())
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        storage_for(tmp_path / "books.xlsx")
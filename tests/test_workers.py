@@ -0,0 +1,53 @@
+import os
+import shutil
+
+from api.core import workers
+from api.core.workers import SnapshotPublisher, configure_multiworker, prepare_metrics_dir
+from api.services import insights
+from api.services.catalog import CatalogCache
+
+
+def test_snapshot_is_republished_and_remapped_on_change(tmp_path, monkeypatch):
+    source = tmp_path / "books.csv"
+    shutil.copy(insights.BOOKS_CSV_PATH, source)
+    snapshot_path = tmp_path / "snapshot.arrow"
+    publisher = SnapshotPublisher(source, snapshot_path)
+
+    assert publisher.publish_if_changed()
+    assert not publisher.publish_if_changed()  # unchanged source: nothing to do
+    monkeypatch.setattr(insights, "BOOKS_DATA_PATH", snapshot_path)
+    cache = CatalogCache(refresh_interval=0)
+    before = cache.get()
+    assert len(before) == len(insights.load_books_dataframe())
+    assert not before.df["price"].to_numpy().flags.writeable  # a view over the read-only mapping
+
+    lines = source.read_text(encoding="utf-8").splitlines(keepends=True)
+    source.write_text("".join(lines[:11]), encoding="utf-8")
+    os.utime(source, ns=(1, 1))
+    assert publisher.publish_if_changed()
+
+    after = cache.get()
+    assert len(after) == 10 and after.version != before.version
+    assert len(before.df) == len(before)  # the old mapping stays valid for readers still holding it
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_configure_multiworker_maps_csv_catalogs_only(tmp_path, monkeypatch):
+    metrics_dir = tmp_path / "metrics"
+    metrics_dir.mkdir()
+    (metrics_dir / "counter_123.db").write_bytes(b"stale")
+    monkeypatch.setattr(insights, "BOOKS_DATA_PATH", None)
+
+    env = configure_multiworker(tmp_path / "snapshot.arrow", metrics_dir)
+    assert env == {
+        workers.MULTIPROC_ENV: str(metrics_dir),
+        "BOOKS_DATA_PATH": str(tmp_path / "snapshot.arrow"),
+    }
+    assert list(metrics_dir.iterdir()) == []
+
+    monkeypatch.setattr(insights, "BOOKS_DATA_PATH", tmp_path / "books.feather")
+    assert "BOOKS_DATA_PATH" not in configure_multiworker(tmp_path / "snapshot.arrow", metrics_dir)
+
+
+def test_prepare_metrics_dir_creates_missing_directory(tmp_path):
+    assert prepare_metrics_dir(tmp_path / "a" / "b").is_dir()